@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк кодеков конверта: время кодирования/декодирования на сообщение и
+размер тела в сравнении с JSON для типичных сообщений job-уровня.
+
+Запуск: PYTHONPATH=src python scripts/bench_codec.py
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from core.protocol import (
+    CODECS,
+    JSON_CODEC,
+    JobAssignPayload,
+    JobResultPayload,
+    MessageEnvelope,
+    MessageType,
+)
+from core.task import Task
+
+
+def sample_messages(items: int, matrix_size: int):
+    task = Task.create_map(owner_id="coordinator", data=list(range(items)), function="square")
+    assign = JobAssignPayload(
+        task_id=task.task_id,
+        job_id=f"{task.task_id}:0",
+        attempt=1,
+        code_ref={"language": "python", "entry": "builtin"},
+        sandbox_type="process_isolation",
+        input_payload={"task_snapshot": task.to_dict(), "job_payload": {"function": "square", "data": list(range(items))}},
+        requirements={"cpu_percent": 50.0, "ram_gb": 1.0, "timeout_seconds": 30},
+        deadline_ts=time.time() + 30,
+        privacy={},
+    )
+    result = JobResultPayload(
+        task_id=task.task_id,
+        job_id=f"{task.task_id}:0",
+        success=True,
+        output=np.random.default_rng(0).random((matrix_size, matrix_size)),
+        error=None,
+        runtime_ms=12.5,
+        worker_id="worker",
+        attempt=1,
+    )
+    return [
+        ("heartbeat", MessageEnvelope.create(MessageType.WORKER_HEARTBEAT, "worker", "coordinator", {"load": 0.3})),
+        (f"assign {items} ints", MessageEnvelope.create(MessageType.JOB_ASSIGN, "coordinator", "worker", assign.to_dict())),
+        (f"result {matrix_size}x{matrix_size}", MessageEnvelope.create(MessageType.JOB_RESULT, "worker", "coordinator", result.to_dict())),
+    ]
+
+
+def measure(codec, value, repeat: int):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        body = codec.encode(value)
+    encode_us = (time.perf_counter() - started) * 1e6 / repeat
+    started = time.perf_counter()
+    for _ in range(repeat):
+        codec.decode(body)
+    decode_us = (time.perf_counter() - started) * 1e6 / repeat
+    return len(body), encode_us, decode_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=10_000, help="элементов в job'е JOB_ASSIGN")
+    parser.add_argument("--matrix-size", type=int, default=256, help="сторона матрицы в JOB_RESULT")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'message':<20}{'codec':<10}{'bytes':>11}{'vs json':>9}{'encode, us':>12}{'decode, us':>12}")
+    for label, envelope in sample_messages(args.items, args.matrix_size):
+        value = envelope.to_dict()
+        json_size = len(JSON_CODEC.encode(value))
+        for name, codec in CODECS.items():
+            size, encode_us, decode_us = measure(codec, value, args.repeat)
+            print(f"{label:<20}{name:<10}{size:>11}{size / json_size:>8.0%}{encode_us:>12.1f}{decode_us:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк MATRIX_OPS multiply: NumPy/BLAS-движок против чистого Python.
+
+Чистый Python растёт как O(n^3) и на 2048 занял бы часы, поэтому он замеряется
+только до --python-max, а для больших размеров время экстраполируется (помечено `~`).
+
+Запуск: PYTHONPATH=src python scripts/bench_matrix_ops.py
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from core import matrix
+
+
+def python_multiply(a, b):
+    """Прежняя реализация: тройной цикл по вложенным спискам."""
+    result = [[0 for _ in range(len(b[0]))] for _ in range(len(a))]
+    for i in range(len(a)):
+        for j in range(len(b[0])):
+            for k in range(len(b)):
+                result[i][j] += a[i][k] * b[k][j]
+    return result
+
+
+def timed(fn, *args) -> float:
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[64, 128, 256, 512, 1024, 2048])
+    parser.add_argument("--python-max", type=int, default=256, help="максимальный размер для чистого Python")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'n':>6}{'python, s':>14}{'numpy lists, s':>16}{'numpy arrays, s':>17}{'speedup':>10}")
+    last_python = None
+    for n in args.sizes:
+        a = [[rng.random() for _ in range(n)] for _ in range(n)]
+        b = [[rng.random() for _ in range(n)] for _ in range(n)]
+        a_arr, b_arr = np.asarray(a), np.asarray(b)
+
+        if n <= args.python_max:
+            py_time = timed(python_multiply, a, b)
+            last_python = (n, py_time)
+            py_label = f"{py_time:.4f}"
+        else:
+            base_n, base_time = last_python
+            py_time = base_time * (n / base_n) ** 3
+            py_label = f"~{py_time:.1f}"
+
+        lists_time = timed(matrix.execute, "multiply", a, b)
+        arrays_time = timed(matrix.execute, "multiply", a_arr, b_arr)
+        print(f"{n:>6}{py_label:>14}{lists_time:>16.4f}{arrays_time:>17.4f}{py_time / max(arrays_time, 1e-9):>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
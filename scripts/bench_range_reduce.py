@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк range_reduce: формулы/дерево произведений против прямого перебора диапазона.
+
+Запуск: PYTHONPATH=src python scripts/bench_range_reduce.py
+"""
+
+import argparse
+import time
+
+from core.task import RangeReduceTask, TaskExecutor
+
+
+def legacy_range_reduce(task: RangeReduceTask):
+    """Прежняя реализация: материализует и перебирает range(start, end)."""
+    numbers = range(task.start, task.end)
+    if task.operation == 'sum':
+        return sum(numbers)
+    if task.operation == 'product':
+        result = 1
+        for num in numbers:
+            result *= num
+        return result
+    if task.operation == 'average':
+        numbers_list = list(numbers)
+        return sum(numbers_list) / len(numbers_list) if numbers_list else 0
+    if task.operation == 'min':
+        return min(numbers)
+    if task.operation == 'max':
+        return max(numbers)
+    raise ValueError(task.operation)
+
+
+def measure(fn, task: RangeReduceTask, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(task)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=10_000_000, help="длина диапазона для sum/average/min/max")
+    parser.add_argument("--product-size", type=int, default=20_000, help="длина диапазона для product")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    executor = TaskExecutor()
+    print(f"{'operation':<10}{'n':>12}{'legacy, s':>14}{'new, s':>14}{'speedup':>10}")
+    for operation in ("sum", "average", "min", "max", "product"):
+        size = args.product_size if operation == "product" else args.size
+        task = RangeReduceTask(start=1, end=size + 1, operation=operation)
+        assert legacy_range_reduce(task) == executor._execute_range_reduce(task)
+        legacy = measure(legacy_range_reduce, task, args.repeat)
+        new = measure(executor._execute_range_reduce, task, args.repeat)
+        print(f"{operation:<10}{size:>12}{legacy:>14.6f}{new:>14.6f}{legacy / max(new, 1e-9):>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
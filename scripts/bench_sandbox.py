@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк ProcessSandboxExecutor: процесс на job против тёплого пула интерпретаторов
+и fork-server (fork зиготы с предзагруженными модулями).
+
+Запуск: PYTHONPATH=src python scripts/bench_sandbox.py [--jobs 200] [--concurrency 4] [--numpy]
+"""
+
+import argparse
+import asyncio
+import time
+
+from sandbox.execution import CodeBundle, ProcessSandboxExecutor, SandboxLimits
+
+PLAIN_SOURCE = "import json\nprint(json.dumps(sum(range(1000))))\n"
+NUMPY_SOURCE = "import numpy as np\nprint(int(np.arange(1000).sum()))\n"
+
+
+async def measure(executor: ProcessSandboxExecutor, source: str, jobs: int, concurrency: int) -> float:
+    """Job'ов в секунду при `concurrency` одновременных execute."""
+    bundle = CodeBundle(entrypoint="main.py", source=source)
+    limits = SandboxLimits(wall_time_seconds=60, memory_bytes=2 * 1024 * 1024 * 1024)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            result = await executor.execute(job=None, code_bundle=bundle, limits=limits)
+            assert result.success, result.stderr
+
+    if executor.pool is not None:
+        await executor.pool.start()
+    if executor.fork_server is not None:
+        await executor.fork_server.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(jobs)))
+    elapsed = time.perf_counter() - started
+    await executor.close()
+    return jobs / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--max-jobs-per-worker", type=int, default=100)
+    parser.add_argument("--numpy", action="store_true", help="job импортирует numpy (пул делает preload)")
+    args = parser.parse_args()
+
+    source = NUMPY_SOURCE if args.numpy else PLAIN_SOURCE
+    preload = ["numpy"] if args.numpy else ["json"]
+    pool_limits = SandboxLimits(memory_bytes=4 * 1024 * 1024 * 1024, cpu_time_seconds=3600)
+    fork = asyncio.run(measure(ProcessSandboxExecutor(), source, args.jobs, args.concurrency))
+    pooled = asyncio.run(
+        measure(
+            ProcessSandboxExecutor(
+                pool_size=args.concurrency,
+                max_jobs_per_worker=args.max_jobs_per_worker,
+                preload=preload,
+                pool_limits=pool_limits,
+            ),
+            source,
+            args.jobs,
+            args.concurrency,
+        )
+    )
+    forked = asyncio.run(
+        measure(ProcessSandboxExecutor(fork_server=True, preload=preload), source, args.jobs, args.concurrency)
+    )
+    print(f"{'mode':<16}{'jobs/s':>10}{'speedup':>10}")
+    for mode, rate in (("fork-per-job", fork), ("pool", pooled), ("fork-server", forked)):
+        print(f"{mode:<16}{rate:>10.1f}{rate / fork:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк журнала TaskSchedulerState: запись переходов в WAL и время
+восстановления (снапшот + хвост WAL) для N job'ов.
+
+Запуск: PYTHONPATH=src python scripts/bench_scheduler_journal.py --jobs 1000000
+"""
+
+import argparse
+import tempfile
+import time
+
+from core.job import Job
+from core.journal import StateJournal
+from core.scheduler_state import TaskSchedulerState
+from core.task import Task, TaskType
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=1_000_000)
+    parser.add_argument("--tail", type=int, default=50_000, help="job'ов, чьи переходы остаются в WAL после снапшота")
+    parser.add_argument("--compact-every", type=int, default=100_000)
+    args = parser.parse_args()
+
+    task = Task.create_map("bench", [0], "square")
+    with tempfile.TemporaryDirectory() as directory:
+        state = TaskSchedulerState()
+        journal = StateJournal(directory, "jobs", compact_every=args.compact_every)
+        state.attach_journal(journal)
+
+        started = time.perf_counter()
+        jobs = [
+            Job(job_id=f"{task.task_id}:{index}", task_id=task.task_id, index=index,
+                task_type=TaskType.MAP.value, input_payload={})
+            for index in range(args.jobs)
+        ]
+        state.register_jobs_for_task(task, jobs)
+        now = time.time()
+        for job in jobs:
+            state.mark_assigned(job.job_id, "worker", now, deadline_ts=now + 30)
+            state.mark_ack(job.job_id, now)
+            state.mark_result(job.job_id, True, now)
+        # Хвост: переходы, которые ещё не попали в снапшот
+        journal.compact()
+        for job in jobs[:args.tail]:
+            state.mark_result(job.job_id, False, now)
+        journal.close()
+        write_s = time.perf_counter() - started
+        transitions = args.jobs * 4 + args.tail
+        print(f"write: {transitions} transitions in {write_s:.2f}s ({transitions / write_s:,.0f}/s), "
+              f"{journal.stats['snapshots']} snapshots")
+
+        started = time.perf_counter()
+        recovered = TaskSchedulerState()
+        journal = StateJournal(directory, "jobs", compact_every=args.compact_every)
+        count = recovered.attach_journal(journal)
+        replay_s = time.perf_counter() - started
+        counters = {status.value: value for status, value in recovered.status_counters().items() if value}
+        print(f"recover: {count} jobs from {journal.snapshot_size} snapshot + {journal.appended} WAL records "
+              f"in {replay_s:.2f}s, {counters}")
+
+
+if __name__ == "__main__":
+    main()
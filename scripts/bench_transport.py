@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк транспорта на loopback: TcpTransport (постоянное соединение) против
+прежнего пути ComputeNode.send_message (новое TCP-соединение на каждое сообщение).
+Колонки fan-out: отправитель шлёт окнами по --window конкурентных send(), как
+координатор, раздающий job'ы; с батчингом и без него (batch_max_messages=1).
+
+Запуск: PYTHONPATH=src python scripts/bench_transport.py
+"""
+
+import argparse
+import asyncio
+import time
+
+from core.framing import encode_json_frame, read_frame
+from core.protocol import MessageEnvelope, MessageType
+from core.transport import TcpTransport
+
+
+def make_message(index: int, payload_size: int) -> MessageEnvelope:
+    return MessageEnvelope.create(MessageType.WORKER_HEARTBEAT, "bench-src", "bench-dst", {"n": index, "blob": "x" * payload_size})
+
+
+async def bench_persistent(count: int, payload_size: int, window: int = 1, batch_max_messages: int = 64) -> float:
+    sender, receiver = TcpTransport(batch_max_messages=batch_max_messages), TcpTransport()
+    await sender.start()
+    await receiver.start()
+    done = asyncio.Event()
+    received = 0
+
+    async def on_message(envelope):
+        nonlocal received
+        received += 1
+        if received == count:
+            done.set()
+
+    receiver.register_handler("bench-dst", on_message)
+    sender.add_peer("bench-dst", "127.0.0.1", receiver.port)
+    started = time.perf_counter()
+    for first in range(0, count, window):
+        if window == 1:
+            await sender.send("bench-dst", make_message(first, payload_size))
+            continue
+        await asyncio.gather(
+            *(sender.send("bench-dst", make_message(index, payload_size)) for index in range(first, min(first + window, count)))
+        )
+    await done.wait()
+    elapsed = time.perf_counter() - started
+    await sender.close()
+    await receiver.close()
+    return elapsed
+
+
+async def bench_connect_per_message(count: int, payload_size: int) -> float:
+    done = asyncio.Event()
+    received = 0
+
+    async def on_connection(reader, writer):
+        # Как прежний handle_client_connection: одно сообщение на соединение
+        nonlocal received
+        await read_frame(reader)
+        writer.close()
+        received += 1
+        if received == count:
+            done.set()
+
+    server = await asyncio.start_server(on_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    started = time.perf_counter()
+    for index in range(count):
+        # Как прежний send_message: connect, write, close
+        _, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(encode_json_frame(make_message(index, payload_size).to_dict()))
+        await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+    await done.wait()
+    elapsed = time.perf_counter() - started
+    server.close()
+    await server.wait_closed()
+    return elapsed
+
+
+async def main_async(args) -> None:
+    print(
+        f"{'payload, B':>11}{'connect/msg, msg/s':>21}{'persistent, msg/s':>20}{'speedup':>10}"
+        f"{'fan-out, msg/s':>17}{'fan-out batched, msg/s':>25}"
+    )
+    for payload_size in args.payload_sizes:
+        legacy = await bench_connect_per_message(args.count, payload_size)
+        persistent = await bench_persistent(args.count, payload_size)
+        fan_out = await bench_persistent(args.count, payload_size, args.window, batch_max_messages=1)
+        batched = await bench_persistent(args.count, payload_size, args.window)
+        print(
+            f"{payload_size:>11}{args.count / legacy:>21.0f}{args.count / persistent:>20.0f}"
+            f"{legacy / max(persistent, 1e-9):>9.1f}x{args.count / fan_out:>17.0f}{args.count / batched:>25.0f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=2000, help="сообщений на прогон")
+    parser.add_argument("--payload-sizes", type=int, nargs="+", default=[64, 1024, 16384])
+    parser.add_argument("--window", type=int, default=256, help="конкурентных send() в fan-out")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
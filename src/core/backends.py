@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Бэкенды исполнения builtin-обработчиков TaskExecutor.
+
+По умолчанию обработчики (`_execute_map`, `_execute_range_reduce`, ...) вызываются
+прямо в потоке event loop. ProcessPoolBackend выносит тяжёлые вызовы в пул
+прогретых процессов, чтобы heartbeats и JOB_ACK не ждали вычислений.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Обработчики, которые можно исполнять вне event loop
+OFFLOADABLE_HANDLERS = ("range_reduce", "map", "map_reduce", "matrix_ops")
+
+# Executor внутри процесса пула; создаётся один раз в initializer'е
+_WORKER_EXECUTOR = None
+
+
+def _init_worker(preload: tuple) -> None:
+    """Прогревает процесс пула: импортирует модули и создаёт TaskExecutor."""
+    global _WORKER_EXECUTOR
+    import importlib
+
+    from core.task import TaskExecutor
+
+    for module_name in preload:
+        try:
+            importlib.import_module(module_name)
+        except ImportError:
+            pass
+    _WORKER_EXECUTOR = TaskExecutor(max_concurrent_jobs=1)
+
+
+def _run_in_worker(handler: str, payload: Any) -> Any:
+    return getattr(_WORKER_EXECUTOR, f"_execute_{handler}")(payload)
+
+
+def _warmup() -> int:
+    return os.getpid()
+
+
+def payload_size(handler: str, payload: Any) -> int:
+    """Грубая оценка объёма работы job'а (в элементах)."""
+    if handler == "range_reduce":
+        return max(0, payload.end - payload.start)
+    if handler in ("map", "map_reduce"):
+        return len(payload.data or [])
+    if handler == "matrix_ops":
+        rows = len(payload.matrix_a) if payload.matrix_a is not None else 0
+        cols = len(payload.matrix_a[0]) if rows else 0
+        return rows * cols
+    return 0
+
+
+class ExecutionBackend(ABC):
+    """Стратегия исполнения builtin-обработчиков."""
+
+    def accepts(self, handler: str, payload: Any) -> bool:
+        """Может ли бэкенд исполнить данный обработчик (иначе — inline)."""
+        return False
+
+    @abstractmethod
+    async def run(self, handler: str, payload: Any) -> Any:
+        """Исполняет `TaskExecutor._execute_<handler>(payload)`."""
+
+    async def start(self) -> None:
+        return None
+
+    async def close(self) -> None:
+        return None
+
+
+class ProcessPoolBackend(ExecutionBackend):
+    """Исполняет CPU-bound обработчики в пуле прогретых процессов.
+
+    В процесс передаётся только dataclass под-задачи (чанк данных), а не весь Task.
+    Маленькие чанки остаются inline: сериализация стоила бы дороже вычисления.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        min_offload_items: int = 10_000,
+        preload: tuple = ("numpy",),
+        mp_context: Optional[str] = "spawn",
+    ):
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self.min_offload_items = min_offload_items
+        self.preload = tuple(preload)
+        self._mp_context = multiprocessing.get_context(mp_context) if mp_context else None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.stats: Dict[str, int] = {"offloaded": 0}
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=self._mp_context,
+                initializer=_init_worker,
+                initargs=(self.preload,),
+            )
+        return self._pool
+
+    def accepts(self, handler: str, payload: Any) -> bool:
+        if handler not in OFFLOADABLE_HANDLERS:
+            return False
+        params = getattr(payload, "params", None) or {}
+        # lambda'ы в params (transform/filter) не сериализуются
+        if any(callable(value) for value in params.values()):
+            return False
+        return payload_size(handler, payload) >= self.min_offload_items
+
+    async def start(self) -> None:
+        """Поднимает все процессы пула заранее, чтобы первый job не платил за старт."""
+        pool = self._ensure_pool()
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*(loop.run_in_executor(pool, _warmup) for _ in range(self.max_workers)))
+        logger.debug("Process pool warmed up: %s", sorted(set(pids)))
+
+    async def run(self, handler: str, payload: Any) -> Any:
+        pool = self._ensure_pool()
+        self.stats["offloaded"] += 1
+        return await asyncio.get_running_loop().run_in_executor(pool, _run_in_worker, handler, payload)
+
+    async def close(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            # Ожидание выхода процессов — в потоке, а не в event loop
+            await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Ленивые чанки входных данных.
+
+ChunkView — это (source, offset, length) поверх общего буфера задачи: при
+разбиении на job'ы данные не копируются. Чанк материализуется срезом только
+при исполнении job'а или при отправке по сети; для ndarray срез — это view.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterator, Optional, Union
+
+
+class ChunkView:
+    """Окно [offset, offset + length) над общим источником данных."""
+
+    __slots__ = ("source", "offset", "length")
+
+    def __init__(self, source: Any, offset: int, length: int):
+        self.source = source
+        self.offset = offset
+        self.length = max(0, min(length, len(source) - offset))
+
+    def materialize(self) -> Any:
+        """Срез источника: список для list/tuple, view для ndarray."""
+        chunk = self.source[self.offset:self.offset + self.length]
+        return list(chunk) if isinstance(chunk, tuple) else chunk
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[Any]:
+        for position in range(self.offset, self.offset + self.length):
+            yield self.source[position]
+
+    def __getitem__(self, item: Any) -> Any:
+        if isinstance(item, slice):
+            start, stop, step = item.indices(self.length)
+            if step == 1:
+                return ChunkView(self.source, self.offset + start, stop - start)
+            return self.materialize()[item]
+        if item < 0:
+            item += self.length
+        if not 0 <= item < self.length:
+            raise IndexError("chunk index out of range")
+        return self.source[self.offset + item]
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "ChunkView":
+        # Источник неизменяем на время задачи: реплики job'ов делят его, а не копируют
+        return ChunkView(self.source, self.offset, self.length)
+
+    def __reduce__(self):
+        # При pickle (пул процессов) уезжает только сам чанк, а не весь источник
+        return (ChunkView, (self.materialize(), 0, self.length))
+
+    def __repr__(self) -> str:
+        return f"ChunkView(offset={self.offset}, length={self.length})"
+
+
+def as_chunk_source(data: Any) -> Any:
+    """Источник с произвольным доступом; итераторы и генераторы читаются один раз."""
+    if hasattr(data, "__getitem__") and hasattr(data, "__len__"):
+        return data
+    return list(data)
+
+
+def iter_chunks(source: Any, chunk_size: Union[int, Callable[[int], int]]) -> Iterator[ChunkView]:
+    """chunk_size — число или функция от числа оставшихся элементов (адаптивный режим)."""
+    total = len(source)
+    offset = 0
+    while offset < total:
+        size = max(1, chunk_size(total - offset) if callable(chunk_size) else chunk_size)
+        yield ChunkView(source, offset, size)
+        offset += size
+
+
+def handler_key(payload: Dict[str, Any], task_type: str) -> str:
+    """Ключ истории runtime: обработчик и функция job'а."""
+    code_ref = payload.get("code_ref") or {}
+    handler = code_ref.get("handler") or task_type
+    function = code_ref.get("function") or code_ref.get("map_function") or payload.get("function") or ""
+    return f"{handler}:{function}"
+
+
+def job_items(payload: Dict[str, Any]) -> int:
+    """Число элементов, которое обрабатывает job (0, если неизвестно)."""
+    for name in ("input_data", "data"):
+        value = payload.get(name)
+        if hasattr(value, "__len__") and not isinstance(value, (str, dict)):
+            return len(value)
+    if "start" in payload and "end" in payload:
+        return max(0, payload["end"] - payload["start"])
+    return 0
+
+
+class AdaptiveChunker:
+    """Подбирает размер чанка под целевое время job'а.
+
+    Для каждого обработчика хранится EMA времени на один элемент, которое
+    пополняется из локальных job'ов и из runtime_ms результатов воркеров.
+    Дорогие функции получают меньшие чанки, дешёвые — большие.
+    """
+
+    def __init__(
+        self,
+        target_job_ms: float = 250.0,
+        alpha: float = 0.3,
+        initial_chunk: int = 1024,
+        min_chunk: int = 1,
+        max_chunk: int = 1_000_000,
+    ):
+        self.target_job_ms = target_job_ms
+        self.alpha = alpha
+        self.initial_chunk = initial_chunk
+        self.min_chunk = min_chunk
+        self.max_chunk = max_chunk
+        self._per_item_ms: Dict[str, float] = {}
+
+    def observe(self, key: str, items: int, runtime_ms: Optional[float]) -> None:
+        if items <= 0 or not runtime_ms or runtime_ms < 0:
+            return
+        sample = runtime_ms / items
+        previous = self._per_item_ms.get(key)
+        self._per_item_ms[key] = sample if previous is None else previous + self.alpha * (sample - previous)
+
+    def per_item_ms(self, key: str) -> Optional[float]:
+        return self._per_item_ms.get(key)
+
+    def chunk_size(
+        self,
+        key: str,
+        remaining: int,
+        total: Optional[int] = None,
+        target_job_ms: Optional[float] = None,
+        min_jobs: int = 1,
+    ) -> int:
+        """Размер следующего чанка; min_jobs не даёт схлопнуть задачу в один job."""
+        total = total or remaining
+        per_item = self._per_item_ms.get(key)
+        if per_item is None:
+            # Истории нет: пробный чанк, по которому наберётся статистика
+            size = self.initial_chunk
+        else:
+            size = int((target_job_ms or self.target_job_ms) / max(per_item, 1e-9))
+        size = min(size, -(-total // max(1, min_jobs)), self.max_chunk)
+        return max(self.min_chunk, min(size, remaining))
+
+
+def materialize(value: Any) -> Any:
+    return value.materialize() if isinstance(value, ChunkView) else value
+
+
+def materialize_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Копия payload'а job'а с материализованными чанками (для отправки по сети)."""
+    if not any(isinstance(value, ChunkView) for value in payload.values()):
+        return payload
+    return {key: materialize(value) for key, value in payload.items()}
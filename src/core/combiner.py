@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Инкрементальная агрегация результатов job'ов.
+
+ResultAccumulator сворачивает каждый JobResult в текущее состояние сразу по
+приходу: для reduce-операций держится только аккумулятор (сумма, произведение,
+min/max, счётчик), поэтому пиковая память не зависит от числа элементов,
+а итог готов сразу после последнего job'а.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.job import JobResult
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy опционален
+    np = None
+
+REDUCE_OPERATIONS = ("sum", "product", "min", "max", "count", "average")
+
+
+def partial_result(value: Any, count: int) -> Dict[str, Any]:
+    """Частичная свёртка чанка, которую воркер отдаёт вместо списка элементов."""
+    return {"partial": value, "count": count}
+
+
+def _is_array(value: Any) -> bool:
+    return np is not None and isinstance(value, np.ndarray)
+
+
+def is_partial(output: Any) -> bool:
+    return isinstance(output, dict) and "partial" in output
+
+
+class RunningReduce:
+    """Свёртка потока скаляров одной ассоциативной операцией."""
+
+    def __init__(self, operation: Optional[str]):
+        self.operation = operation
+        self.value: Any = None
+        self.count = 0
+        self.last: Any = None
+
+    def add(self, value: Any) -> None:
+        op = self.operation
+        if op in ("sum", "average"):
+            self.value = value if self.count == 0 else self.value + value
+        elif op == "product":
+            self.value = value if self.count == 0 else self.value * value
+        elif op == "min":
+            self.value = value if self.count == 0 or value < self.value else self.value
+        elif op == "max":
+            self.value = value if self.count == 0 or value > self.value else self.value
+        self.count += 1
+        self.last = value
+
+    def add_many(self, values: Any) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, value: Any, count: int) -> None:
+        """Вливает частичный результат, посчитанный над count элементами."""
+        if count <= 0:
+            return
+        op = self.operation
+        if self.count == 0:
+            self.value = value
+        elif op in ("sum", "average"):
+            self.value = self.value + value
+        elif op == "product":
+            self.value = self.value * value
+        elif op == "min":
+            self.value = min(self.value, value)
+        elif op == "max":
+            self.value = max(self.value, value)
+        self.count += count
+        self.last = value
+
+    def result(self, empty: Any = None) -> Any:
+        op = self.operation
+        if op == "count":
+            return self.count
+        if self.count == 0:
+            if op == "sum":
+                return 0
+            if op == "product":
+                return 1
+            if op == "average":
+                return 0
+            if op in ("min", "max"):
+                raise ValueError(f"{op}() of an empty result set")
+            return empty
+        if op == "average":
+            return self.value / self.count
+        if op in REDUCE_OPERATIONS:
+            return self.value
+        return self.last
+
+
+class ResultAccumulator:
+    """Агрегатор результатов одной задачи.
+
+    Режимы:
+      concat — склейка списков map-задач в порядке индексов job'ов;
+      reduce — свёртка всех элементов (в т.ч. из списков) функцией reduce;
+      range  — свёртка скалярных результатов range_reduce (average по count);
+      tiles  — сборка матрицы из частичных блоков;
+      first  — первый успешный результат.
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        operation: Optional[str] = None,
+        flatten_scalars: bool = True,
+        shape: Optional[Tuple[int, int]] = None,
+        expected_tiles: int = 0,
+        keep_arrays: bool = False,
+    ):
+        self.mode = mode
+        self.operation = operation
+        self.flatten_scalars = flatten_scalars
+        self.reducer = RunningReduce(operation)
+        self._chunks: List[Tuple[int, int, List[Any]]] = []
+        self._meta_count = 0
+        self._seen = 0
+        self._first: Any = None
+        self._has_first = False
+        self._fallback: Any = None
+        self._has_fallback = False
+        self._shape = shape
+        self._expected_tiles = expected_tiles
+        self._keep_arrays = keep_arrays
+        self._tiles_seen: set = set()
+        self._matrix: Any = None
+
+    def add(self, job_result: JobResult, index: Optional[int] = None) -> None:
+        """Сворачивает один результат; index задаёт порядок для concat."""
+        seq = self._seen
+        self._seen += 1
+        if not self._has_fallback:
+            self._fallback, self._has_fallback = job_result.output, True
+        if not job_result.success:
+            return
+        output = job_result.output
+
+        if self.mode == "concat":
+            if isinstance(output, list) or _is_array(output):
+                self._chunks.append((seq if index is None else index, seq, output))
+            elif self.flatten_scalars:
+                self._chunks.append((seq if index is None else index, seq, [output]))
+        elif self.mode == "reduce":
+            if is_partial(output):
+                self.reducer.merge(output["partial"], output.get("count", 1))
+            elif isinstance(output, list):
+                self.reducer.add_many(output)
+            else:
+                self.reducer.add(output)
+        elif self.mode == "range":
+            self.reducer.add(output)
+            self._meta_count += job_result.metadata.get("count", 0)
+        elif self.mode == "tiles":
+            self._add_tile(output)
+        elif not self._has_first:
+            self._first, self._has_first = output, True
+
+    def _add_tile(self, output: Any) -> None:
+        if not isinstance(output, dict) or "tile" not in output:
+            return
+        key = tuple(output["tile"])
+        if key in self._tiles_seen:
+            # Реплики дают тот же блок: учитываем его один раз
+            return
+        self._tiles_seen.add(key)
+        i, j, _ = key
+        block = output["block"]
+        if np is not None:
+            block = np.asarray(block)
+            if self._matrix is None:
+                self._matrix = np.zeros(self._shape, dtype=block.dtype)
+            elif np.result_type(self._matrix, block) != self._matrix.dtype:
+                self._matrix = self._matrix.astype(np.result_type(self._matrix, block))
+            self._matrix[i:i + block.shape[0], j:j + block.shape[1]] += block
+            return
+        if self._matrix is None:
+            self._matrix = [[0 for _ in range(self._shape[1])] for _ in range(self._shape[0])]
+        for di, block_row in enumerate(block):
+            for dj, value in enumerate(block_row):
+                self._matrix[i + di][j + dj] += value
+
+    def result(self) -> Any:
+        """Итог агрегации (None, если не пришло ни одного результата)."""
+        if self._seen == 0:
+            return None
+        if self.mode == "concat":
+            chunks = [chunk for _, _, chunk in sorted(self._chunks, key=lambda item: (item[0], item[1]))]
+            if chunks and all(_is_array(chunk) for chunk in chunks):
+                # ndarray-чанки (ndarray на входе map) склеиваются без конвертации в списки
+                return np.concatenate(chunks)
+            aggregated: List[Any] = []
+            for chunk in chunks:
+                aggregated.extend(chunk.tolist() if _is_array(chunk) else chunk)
+            return aggregated
+        if self.mode == "reduce":
+            return self.reducer.result()
+        if self.mode == "range":
+            if self.reducer.count == 0:
+                return None
+            if self.operation == "average":
+                count = self._meta_count or self.reducer.count
+                return self.reducer.value / count if count else 0
+            return self.reducer.result()
+        if self.mode == "tiles":
+            if len(self._tiles_seen) < self._expected_tiles or self._matrix is None:
+                return None
+            if np is not None and not self._keep_arrays:
+                return self._matrix.tolist()
+            return self._matrix
+        if self._has_first:
+            return self._first
+        return self._fallback
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"results_seen": self._seen, "elements_reduced": self.reducer.count}
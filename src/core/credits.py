@@ -8,7 +8,7 @@ import time
 from dataclasses import asdict, dataclass
 from decimal import Decimal, getcontext
 from enum import Enum
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 
 class CreditEventType(Enum):
@@ -53,6 +53,9 @@ class CreditManager:
         # Блокировки для потокобезопасности
         self.lock = threading.RLock()
         
+        # Подписчики на пополнение баланса (вызываются вне блокировки)
+        self._listeners: List[Callable[[str], None]] = []
+        
         # Курсы конвертации ресурсов
         self.resource_rates = {
             'cpu_second': Decimal('0.01'),    # 1 CPU-секунда = 0.01 кредита
@@ -78,12 +81,26 @@ class CreditManager:
             'high': Decimal('1.5'),
         }
     
+    def add_listener(self, callback: Callable[[str], None]) -> None:
+        """Подписка на рост баланса: callback(node_id) после пополнения или входящего перевода"""
+        self._listeners.append(callback)
+    
+    def _notify(self, node_id: str) -> None:
+        for callback in self._listeners:
+            try:
+                callback(node_id)
+            except Exception as e:
+                print(f"⚠️ Ошибка подписчика кредитов для {node_id}: {e}")
+    
     def initialize_node(self, node_id: str, initial_credits: Decimal = Decimal('0')):
         """Инициализирует узел в системе кредитов"""
         with self.lock:
-            if node_id not in self.balances:
-                self.balances[node_id] = initial_credits
-                print(f"🆔 Узел {node_id} инициализирован с {initial_credits} кредитов")
+            if node_id in self.balances:
+                return
+            self.balances[node_id] = initial_credits
+            print(f"🆔 Узел {node_id} инициализирован с {initial_credits} кредитов")
+        if initial_credits > 0:
+            self._notify(node_id)
     
     def get_balance(self, node_id: str) -> Decimal:
         """Получает баланс узла"""
@@ -112,10 +129,13 @@ class CreditManager:
             self.events.append(event)
             
             print(f"💸 Начислено {amount} кредитов узлу {node_id}. Баланс: {self.balances[node_id]}")
-            return True
+        self._notify(node_id)
+        return True
     
     def transfer_credits(self, from_node: str, to_node: str, amount: Decimal, task_id: Optional[str] = None) -> bool:
         """Переводит кредиты между узлами"""
+        # Цена из DynamicPricingEngine приходит float: Decimal -= float — TypeError
+        amount = Decimal(str(amount))
         with self.lock:
             # Проверяем баланс отправителя
             if from_node not in self.balances:
@@ -131,7 +151,7 @@ class CreditManager:
             
             # Выполняем перевод
             self.balances[from_node] -= amount
-            self.balances[to_node] += Decimal(str(amount))
+            self.balances[to_node] += amount
             
             # Записываем событие
             event = CreditEvent(
@@ -147,7 +167,8 @@ class CreditManager:
             self.events.append(event)
             
             print(f"💸 Перевод {amount} кредитов с {from_node} на {to_node}")
-            return True
+        self._notify(to_node)
+        return True
     
     def calculate_task_cost(self, task_type: str, priority: str, resource_usage: Dict, node_capabilities: Dict) -> Decimal:
         """Рассчитывает стоимость задачи на основе использования ресурсов"""
@@ -338,7 +359,9 @@ class CreditManager:
                 self.priority_multipliers = {k: Decimal(str(v)) for k, v in data.get('priority_multipliers', {}).items()}
                 
                 print(f"📥 Импортировано данных для {len(self.balances)} узлов и {len(self.events)} событий")
-                return True
+            for node_id in list(self.balances):
+                self._notify(node_id)
+            return True
                 
         except Exception as e:
             print(f"❌ Ошибка импорта данных кредитов: {e}")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Кадрирование сообщений поверх потоковых соединений.
+
+Кадр — это заголовок с длиной тела (uint32, big-endian) и само тело. Границы
+сообщений явные: несколько кадров в одном read() и кадр, разрезанный на
+произвольные куски, разбираются одинаково. Размер кадра ограничен, чтобы пир
+не мог заставить узел выделить произвольный буфер.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import struct
+from typing import Any, List, Optional
+
+from core.protocol import JSON_CODEC
+
+FRAME_HEADER = struct.Struct("!I")
+DEFAULT_MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+
+class FrameTooLarge(ValueError):
+    """Объявленная или фактическая длина кадра превышает лимит."""
+
+
+def encode_frame(body: bytes, max_frame_size: int = DEFAULT_MAX_FRAME_SIZE) -> bytes:
+    if len(body) > max_frame_size:
+        raise FrameTooLarge(f"Frame of {len(body)} bytes exceeds limit of {max_frame_size}")
+    return FRAME_HEADER.pack(len(body)) + body
+
+
+def encode_json_frame(message: Any, max_frame_size: int = DEFAULT_MAX_FRAME_SIZE) -> bytes:
+    return encode_frame(JSON_CODEC.encode(message), max_frame_size)
+
+
+def decode_json(body: bytes) -> Any:
+    return JSON_CODEC.decode(body)
+
+
+class FrameDecoder:
+    """Инкрементальный разбор кадров из произвольных кусков потока.
+
+    Тело кадра пишется в буфер, выделенный один раз по длине из заголовка;
+    уже принятые байты не склеиваются и не копируются повторно, как было бы
+    при накоплении всего потока и поиске границ в нём.
+    """
+
+    def __init__(self, max_frame_size: int = DEFAULT_MAX_FRAME_SIZE):
+        self.max_frame_size = max_frame_size
+        self._header = bytearray()
+        self._body: Optional[bytearray] = None
+        self._filled = 0
+
+    @property
+    def pending(self) -> int:
+        """Сколько байт незавершённого кадра уже принято."""
+        return len(self._header) + self._filled
+
+    def feed(self, data: bytes) -> List[bytearray]:
+        """Принимает очередной кусок потока, возвращает тела завершённых кадров."""
+        frames: List[bytearray] = []
+        view = memoryview(data)
+        while view:
+            if self._body is None:
+                missing = FRAME_HEADER.size - len(self._header)
+                self._header += view[:missing]
+                view = view[missing:]
+                if len(self._header) < FRAME_HEADER.size:
+                    break
+                (length,) = FRAME_HEADER.unpack(self._header)
+                self._header.clear()
+                if length > self.max_frame_size:
+                    raise FrameTooLarge(f"Frame of {length} bytes exceeds limit of {self.max_frame_size}")
+                self._body = bytearray(length)
+                self._filled = 0
+            take = min(len(self._body) - self._filled, len(view))
+            self._body[self._filled:self._filled + take] = view[:take]
+            self._filled += take
+            view = view[take:]
+            if self._filled == len(self._body):
+                frames.append(self._body)
+                self._body = None
+                self._filled = 0
+        return frames
+
+
+async def read_frame(reader: asyncio.StreamReader, max_frame_size: int = DEFAULT_MAX_FRAME_SIZE) -> Optional[bytes]:
+    """Читает один кадр; None — соединение закрыто на границе кадров.
+
+    Обрыв посреди кадра поднимает asyncio.IncompleteReadError.
+    """
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+    except asyncio.IncompleteReadError as exc:
+        if not exc.partial:
+            return None
+        raise
+    (length,) = FRAME_HEADER.unpack(header)
+    if length > max_frame_size:
+        raise FrameTooLarge(f"Frame of {length} bytes exceeds limit of {max_frame_size}")
+    return await reader.readexactly(length)
@@ -8,9 +8,14 @@ from __future__ import annotations
 
 import logging
 import os
+from collections.abc import Sequence
 from typing import Any, Dict
 
+from core import kernels
+from core.chunking import materialize
+from core.combiner import REDUCE_OPERATIONS, RunningReduce, partial_result
 from core.task import (
+    MapReduceTask,
     MapTask,
     MatrixOpsTask,
     MLInferenceTask,
@@ -23,10 +28,38 @@ from sandbox.execution import CodeBundle, SandboxLimits, SandboxResult
 logger = logging.getLogger(__name__)
 
 
+async def _combine_chunk(executor, map_task: MapTask, reduce_fn: str) -> Dict[str, Any]:
+    """Map + локальный reduce чанка: по сети уходит частичный результат и число элементов."""
+    if map_task.function in kernels.MAP_FUNCTIONS and reduce_fn in ("sum", "product", "count", "average"):
+        # Эти map-функции сохраняют длину чанка, а map_reduce идёт через NumPy-ядро без промежуточного списка
+        mr_task = MapReduceTask(
+            data=map_task.data,
+            map_function=map_task.function,
+            reduce_function='sum' if reduce_fn == 'average' else reduce_fn,
+            params=map_task.params,
+        )
+        value = await executor._run_builtin('map_reduce', mr_task)
+        return partial_result(value, len(map_task.data))
+    mapped = await executor._run_builtin('map', map_task)
+    reducer = RunningReduce(reduce_fn)
+    reducer.add_many(mapped)
+    value = reducer.count if reduce_fn == 'count' else reducer.value
+    return partial_result(value, reducer.count)
+
+
+def _map_items(data: Any) -> Any:
+    """Элементы map-чанка: последовательность и ndarray — как есть, скаляр — список из одного."""
+    if getattr(data, "ndim", 0) > 0:
+        return data
+    if isinstance(data, Sequence) and not isinstance(data, (str, bytes)):
+        return list(data) if isinstance(data, tuple) else data
+    return [data]
+
+
 async def execute_generic(task: Task, job, executor) -> Dict[str, Any]:
     """Исполнение generic-задачи на основе code_ref."""
     code_ref = task.code_ref or job.input_payload.get('code_ref', {})
-    input_data = job.input_payload.get('input_data', task.input_data)
+    input_data = materialize(job.input_payload.get('input_data', task.input_data))
     handler_type = code_ref.get('type')
     handler = code_ref.get('handler')
 
@@ -36,26 +69,32 @@ async def execute_generic(task: Task, job, executor) -> Dict[str, Any]:
             end = input_data.get('end', 0)
             operation = code_ref.get('operation', 'sum')
             rr_task = RangeReduceTask(start=start, end=end, operation=operation, chunk_size=input_data.get('chunk_size', 1))
-            output = executor._execute_range_reduce(rr_task)
+            output = await executor._run_builtin('range_reduce', rr_task)
             return {"success": True, "output": output}
 
         if handler in ("map_expression", "map_reduce"):
+            typed = task.map or task.map_reduce
             map_task = MapTask(
-                data=input_data if isinstance(input_data, list) else [input_data],
+                data=_map_items(input_data),
                 function=code_ref.get('function', code_ref.get('map_function', 'square')),
-                params=code_ref
+                params={**code_ref, **((typed.params if typed else None) or {})}
             )
-            mapped = executor._execute_map(map_task)
-            # Для map_reduce reduce будет применён на этапе combine_job_results
+            reduce_fn = code_ref.get('reduce_function')
+            if handler == "map_reduce" and job.input_payload.get('combiner') and reduce_fn in REDUCE_OPERATIONS:
+                output = await _combine_chunk(executor, map_task, reduce_fn)
+                return {"success": True, "output": output}
+            mapped = await executor._run_builtin('map', map_task)
+            # Без combiner reduce будет применён на этапе combine_job_results
             return {"success": True, "output": mapped}
 
         if handler == "matrix_ops":
             mx_task = MatrixOpsTask(
                 operation=code_ref.get('operation') or (input_data or {}).get('operation', ''),
                 matrix_a=(input_data or {}).get('matrix_a', []),
-                matrix_b=(input_data or {}).get('matrix_b')
+                matrix_b=(input_data or {}).get('matrix_b'),
+                params=(input_data or {}).get('params') or code_ref.get('params', {})
             )
-            output = executor._execute_matrix_ops(mx_task)
+            output = await executor._run_builtin('matrix_ops', mx_task)
             return {"success": True, "output": output}
 
     if handler_type == "ml_framework":
@@ -103,9 +142,12 @@ async def execute_generic(task: Task, job, executor) -> Dict[str, Any]:
             memory_bytes=int(task.requirements.ram_gb * 1024 * 1024 * 1024),
         )
         result: SandboxResult = await executor.sandbox_executor.execute(job=None, code_bundle=bundle, limits=limits)
+        if result.value_error:
+            return {"success": False, "output": None, "error": result.value_error}
+        # Значение из канала результата (sandbox.result_channel.emit) вместо разбора stdout
         return {
             "success": result.success,
-            "output": result.stdout,
+            "output": result.value if result.has_value else result.stdout,
             "error": result.stderr if not result.success else None,
         }
 
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Журнал состояния координатора: append-only WAL и периодический снапшот.
+
+Владелец состояния (TaskSchedulerState, ComputeNetwork) пишет в журнал свои
+переходы короткими JSON-записями, по одной на строку. Когда в WAL накопилось
+`compact_every` записей, журнал запрашивает у владельца текущее состояние,
+пишет его снапшотом и начинает WAL заново. Восстановление — снапшот, затем
+хвост WAL, так что время старта пропорционально числу живых записей, а не
+всей истории.
+
+Снапшот и WAL помечены поколением: если узел упал между заменой снапшота и
+очисткой WAL, старый WAL со старым поколением при replay пропускается.
+Оборванная при падении последняя строка WAL отбрасывается и отрезается.
+
+Формат — обычные файлы, без aiosqlite: запись — одна строка в буферизованный
+файл, чтение — потоковый json.loads без выборок из БД.
+
+Журнал пишут из event loop координатора, поэтому файловый ввод-вывод вынесен
+в фоновый поток-писатель: `append` только ставит запись в очередь, а поток
+кодирует её, пишет и делает flush/fsync. Компакция на loop лишь снимает
+записи состояния в список (значения в записях неизменяемые, так что снимок
+согласован с моментом компакции); кодирование, запись снапшота, fsync и
+переход WAL на новое поколение выполняет тот же поток, в порядке очереди.
+`flush()` ждёт, пока поток допишет всё поставленное.
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import logging
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from core.protocol import json_default
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMPACT_EVERY = 100_000
+
+_SNAPSHOT_HEADER = "snapshot"
+_WAL_HEADER = "wal"
+# Записи снапшота пишутся пачками в строку: один вызов энкодера/json.loads на
+# пачку вместо вызова на запись
+_SNAPSHOT_BATCH = 4096
+
+
+# Один энкодер на модуль: json.dumps создаёт новый JSONEncoder на каждый вызов
+_ENCODER = json.JSONEncoder(separators=(",", ":"), default=json_default)
+
+# Маркер остановки в очереди писателя
+_STOP = object()
+
+
+def _encode(record: List[Any]) -> bytes:
+    return _ENCODER.encode(record).encode("utf-8") + b"\n"
+
+
+@contextmanager
+def gc_paused():
+    """Отключает циклический GC на время массовой загрузки или выгрузки записей.
+
+    Миллион новых объектов запускает полные проходы GC, которые на старте
+    занимали больше половины времени replay; циклов такие записи не образуют.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class StateJournal:
+    """Снапшот `<name>.snapshot` и WAL `<name>.wal` в каталоге `directory`."""
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        name: str,
+        compact_every: int = DEFAULT_COMPACT_EVERY,
+        fsync: bool = False,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.wal_path = self.directory / f"{name}.wal"
+        self.snapshot_path = self.directory / f"{name}.snapshot"
+        self.compact_every = compact_every
+        # fsync на каждую запись переживает падение ОС, но стоит миллисекунды;
+        # без него запись доходит до ядра (flush) и переживает падение процесса
+        self.fsync = fsync
+        self.generation = 0
+        self.appended = 0
+        self.snapshot_size = 0
+        self.stats: Dict[str, int] = {"appended": 0, "replayed": 0, "snapshots": 0, "torn_bytes": 0}
+        self._file = None
+        self._snapshot_source: Optional[Callable[[], Iterable[List[Any]]]] = None
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+
+    def replay(self) -> Iterator[List[Any]]:
+        """Записи снапшота, затем записи WAL текущего поколения."""
+        self.generation = 0
+        self.snapshot_size = 0
+        if self.snapshot_path.exists():
+            with open(self.snapshot_path, "rb") as f:
+                header = json.loads(f.readline())
+                self.generation = header[1]
+                for line in f:
+                    batch = json.loads(line)
+                    self.snapshot_size += len(batch)
+                    yield from batch
+                self.stats["replayed"] += self.snapshot_size
+        self.appended = 0
+        if not self.wal_path.exists():
+            return
+        good = 0
+        with open(self.wal_path, "rb") as f:
+            for index, line in enumerate(f):
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                good += len(line)
+                if index == 0:
+                    if record[:1] != [_WAL_HEADER] or record[1] != self.generation:
+                        # WAL предыдущего поколения: всё из него уже в снапшоте
+                        logger.info("Skipping stale WAL %s", self.wal_path)
+                        good = 0
+                        break
+                    continue
+                self.appended += 1
+                self.stats["replayed"] += 1
+                yield record
+        torn = self.wal_path.stat().st_size - good
+        if torn:
+            self.stats["torn_bytes"] += torn
+            logger.warning("Truncating %d bytes of torn WAL tail in %s", torn, self.wal_path)
+            os.truncate(self.wal_path, good)
+
+    def open(self, snapshot_source: Callable[[], Iterable[List[Any]]]) -> None:
+        """Начинает запись; `snapshot_source` отдаёт записи текущего состояния для компакции."""
+        self._snapshot_source = snapshot_source
+        fresh = not self.wal_path.exists() or self.wal_path.stat().st_size == 0
+        self._file = open(self.wal_path, "ab")
+        if fresh:
+            self._write_wal_header(self.generation)
+        self._writer = threading.Thread(
+            target=self._write_loop, name=f"journal-{self.wal_path.stem}", daemon=True
+        )
+        self._writer.start()
+
+    def append(self, record: List[Any]) -> None:
+        """Ставит запись в очередь писателя; запись — свежий список, владелец её больше не меняет."""
+        self._raise_writer_error()
+        self._queue.put(record)
+        self.appended += 1
+        self.stats["appended"] += 1
+        # Порог не меньше размера снапшота: компакция амортизированно O(1) на запись,
+        # а WAL при replay не длиннее снапшота
+        if self.appended >= self.compact_every and self.appended >= self.snapshot_size:
+            self.compact()
+
+    def compact(self) -> None:
+        """Снимает текущее состояние и ставит в очередь снапшот нового поколения."""
+        self._raise_writer_error()
+        with gc_paused():
+            records = list(self._snapshot_source())
+        self.generation += 1
+        self.snapshot_size = len(records)
+        self.appended = 0
+        self.stats["snapshots"] += 1
+        self._queue.put(_Snapshot(self.generation, records))
+
+    def flush(self) -> None:
+        """Ждёт, пока писатель допишет всё, что поставлено в очередь до вызова."""
+        if self._writer is None:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+        self._raise_writer_error()
+
+    def close(self) -> None:
+        """Дописывает очередь и закрывает WAL."""
+        if self._writer is not None:
+            self._queue.put(_STOP)
+            self._writer.join()
+            self._writer = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._raise_writer_error()
+
+    def _raise_writer_error(self) -> None:
+        if self._error is not None:
+            raise RuntimeError(f"Journal writer failed for {self.wal_path}") from self._error
+
+    def _write_loop(self) -> None:
+        """Поток-писатель: записи WAL и снапшоты в порядке постановки в очередь."""
+        dirty = False
+        while True:
+            item = self._queue.get()
+            try:
+                if isinstance(item, list):
+                    if self._error is None:
+                        self._file.write(_encode(item))
+                        dirty = True
+                elif isinstance(item, _Snapshot):
+                    if self._error is None:
+                        self._write_snapshot(item)
+                        dirty = False
+                # Записи, накопленные пока поток писал, уходят одним flush/fsync
+                if dirty and (item is _STOP or isinstance(item, threading.Event) or self._queue.empty()):
+                    self._sync_wal()
+                    dirty = False
+            except Exception as exc:  # noqa: BLE001 - поднимается у владельца при следующем вызове
+                logger.exception("Journal writer failed for %s", self.wal_path)
+                # После сбоя дальше не пишем: WAL без пропусков важнее хвоста
+                self._error = exc
+                dirty = False
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is _STOP:
+                return
+
+    def _write_snapshot(self, snapshot: "_Snapshot") -> None:
+        tmp_path = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+        records = snapshot.records
+        with gc_paused(), open(tmp_path, "wb") as f:
+            f.write(_encode([_SNAPSHOT_HEADER, snapshot.generation]))
+            for start in range(0, len(records), _SNAPSHOT_BATCH):
+                f.write(_encode(records[start:start + _SNAPSHOT_BATCH]))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        # Записи старого поколения уже в WAL до снапшота и вошли в него
+        self._file.flush()
+        self._file.seek(0)
+        self._file.truncate()
+        self._write_wal_header(snapshot.generation)
+
+    def _sync_wal(self) -> None:
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def _write_wal_header(self, generation: int) -> None:
+        self._file.write(_encode([_WAL_HEADER, generation]))
+        self._sync_wal()
+
+
+@dataclass
+class _Snapshot:
+    """Снапшот в очереди писателя: поколение и снятые на loop записи."""
+
+    generation: int
+    records: List[Any]
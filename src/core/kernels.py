@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Векторизованные NumPy-ядра для builtin map/map_reduce.
+
+Ядро срабатывает только для однородных числовых чанков (все int или все float)
+и только когда результат совпадает с чисто питоновским путём: для int — точно
+(с проверкой переполнения int64), для float — с точностью попарного суммирования
+NumPy. Во всех остальных случаях функции возвращают None, и TaskExecutor
+выполняет обычные list comprehension.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy опционален
+    np = None
+
+# Для коротких чанков конвертация в ndarray дороже самого вычисления
+VECTORIZE_MIN_SIZE = 256
+
+_INT64_MAX = 2 ** 63 - 1
+_SQUARE_SAFE = math.isqrt(_INT64_MAX)
+
+MAP_FUNCTIONS = ("square", "increment", "x")
+REDUCE_FUNCTIONS = ("sum", "product", "count")
+
+
+def as_numeric_array(data: Any, min_size: int = VECTORIZE_MIN_SIZE):
+    """Возвращает ndarray для однородного числового чанка или None."""
+    if np is None:
+        return None
+    if isinstance(data, np.ndarray):
+        return data if data.dtype.kind in "if" else None
+    if not isinstance(data, (list, tuple)) or len(data) < min_size:
+        return None
+    kinds = set(map(type, data))
+    try:
+        if kinds == {int}:
+            arr = np.array(data, dtype=np.int64)
+            # abs(-2**63) не представим в int64 и сломал бы проверки переполнения
+            return arr if not arr.size or arr.min() > -_INT64_MAX - 1 else None
+        if kinds == {float}:
+            return np.array(data, dtype=np.float64)
+    except OverflowError:
+        # Python int не помещается в int64
+        return None
+    return None
+
+
+def _map_array(function: str, arr, params: Optional[Dict[str, Any]]):
+    if function == "x":
+        return arr
+    if function == "square":
+        if arr.dtype.kind == "i" and arr.size and int(np.abs(arr).max()) > _SQUARE_SAFE:
+            return None
+        return np.square(arr)
+    if function == "increment":
+        increment = (params or {}).get("increment", 1)
+        if type(increment) not in (int, float):
+            return None
+        if arr.dtype.kind == "i" and type(increment) is int:
+            if arr.size and (int(arr.max()) + increment > _INT64_MAX or int(arr.min()) + increment < -_INT64_MAX):
+                return None
+        return arr + increment
+    return None
+
+
+def _reduce_array(reduce_function: str, arr):
+    if reduce_function == "count":
+        return int(arr.size)
+    if reduce_function == "sum":
+        if arr.dtype.kind == "i" and arr.size and int(np.abs(arr).max()) * arr.size > _INT64_MAX:
+            return None
+        return arr.sum().item()
+    if reduce_function == "product":
+        if arr.dtype.kind == "i":
+            if not arr.size:
+                return 1
+            if not arr.all():
+                return 0
+            # Переполнение int64 проверяем по сумме логарифмов
+            if float(np.log2(np.abs(arr).astype(np.float64)).sum()) >= 62:
+                return None
+        return arr.prod().item()
+    return None
+
+
+def vector_map(function: str, data: Any, params: Optional[Dict[str, Any]] = None, min_size: int = VECTORIZE_MIN_SIZE):
+    """Map через ufunc. Возвращает список (или ndarray для ndarray-входа) либо None."""
+    if function not in MAP_FUNCTIONS:
+        return None
+    arr = as_numeric_array(data, min_size)
+    if arr is None:
+        return None
+    mapped = _map_array(function, arr, params)
+    if mapped is None:
+        return None
+    return mapped if isinstance(data, np.ndarray) else mapped.tolist()
+
+
+def vector_map_reduce(
+    map_function: str,
+    reduce_function: str,
+    data: Any,
+    params: Optional[Dict[str, Any]] = None,
+    min_size: int = VECTORIZE_MIN_SIZE,
+):
+    """Map и reduce без промежуточного списка. Возвращает скаляр или None."""
+    if map_function not in MAP_FUNCTIONS or reduce_function not in REDUCE_FUNCTIONS:
+        return None
+    arr = as_numeric_array(data, min_size)
+    if arr is None:
+        return None
+    mapped = _map_array(map_function, arr, params)
+    if mapped is None:
+        return None
+    return _reduce_array(reduce_function, mapped)
+
+
+def vector_reduce(reduce_function: str, values: Any, min_size: int = VECTORIZE_MIN_SIZE):
+    """Reduce уже посчитанных значений. Возвращает скаляр или None."""
+    if reduce_function not in REDUCE_FUNCTIONS:
+        return None
+    arr = as_numeric_array(values, min_size)
+    if arr is None:
+        return None
+    return _reduce_array(reduce_function, arr)
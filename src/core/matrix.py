@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+NumPy/BLAS-движок для MATRIX_OPS.
+
+Принимает как вложенные списки, так и ndarray. Если хотя бы один из входов —
+ndarray, результат тоже остаётся ndarray (без конвертации туда-обратно);
+для списков результат возвращается списками, как и раньше.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy опционален
+    np = None
+
+_INT64_MAX = 2 ** 63 - 1
+
+DECOMPOSITIONS = ("lu", "qr", "svd", "cholesky")
+
+
+def available() -> bool:
+    return np is not None
+
+
+def _as_array(matrix: Any):
+    arr = np.asarray(matrix)
+    if arr.ndim != 2:
+        raise ValueError(f"Expected a 2D matrix, got shape {arr.shape}")
+    if arr.dtype.kind not in "iuf":
+        arr = arr.astype(np.float64)
+    return arr
+
+
+def _safe_int_matmul(a, b):
+    """int64 matmul, если произведение гарантированно не переполнится, иначе точный object."""
+    if a.dtype.kind in "iu" and b.dtype.kind in "iu" and a.size and b.size:
+        bound = int(np.abs(a).max()) * int(np.abs(b).max()) * a.shape[1]
+        if bound > _INT64_MAX:
+            return a.astype(object) @ b.astype(object)
+    return a @ b
+
+
+def lu_decompose(a):
+    """LU-разложение с частичным выбором ведущего элемента: A = P @ L @ U."""
+    n, m = a.shape
+    if n != m:
+        raise ValueError("LU decomposition requires a square matrix")
+    u = a.astype(np.float64, copy=True)
+    lower = np.eye(n)
+    perm = np.arange(n)
+    for k in range(n - 1):
+        pivot = k + int(np.argmax(np.abs(u[k:, k])))
+        if pivot != k:
+            u[[k, pivot], :] = u[[pivot, k], :]
+            lower[[k, pivot], :k] = lower[[pivot, k], :k]
+            perm[[k, pivot]] = perm[[pivot, k]]
+        if u[k, k] == 0:
+            continue
+        factors = u[k + 1:, k] / u[k, k]
+        lower[k + 1:, k] = factors
+        u[k + 1:, k:] -= np.outer(factors, u[k, k:])
+    permutation = np.eye(n)[perm].T
+    return {"p": permutation, "l": lower, "u": u}
+
+
+def decompose(a, method: str) -> Dict[str, Any]:
+    if method == "lu":
+        return lu_decompose(a)
+    if method == "qr":
+        q, r = np.linalg.qr(a)
+        return {"q": q, "r": r}
+    if method == "svd":
+        u, s, vt = np.linalg.svd(a, full_matrices=False)
+        return {"u": u, "s": s, "vt": vt}
+    if method == "cholesky":
+        try:
+            return {"l": np.linalg.cholesky(a)}
+        except np.linalg.LinAlgError as exc:
+            raise ValueError(f"Cholesky decomposition failed: {exc}") from exc
+    raise ValueError(f"Unknown decomposition method: {method}")
+
+
+def execute(operation: str, matrix_a: Any, matrix_b: Any = None, params: Optional[Dict[str, Any]] = None) -> Any:
+    """Выполняет операцию над матрицами через NumPy."""
+    params = params or {}
+    keep_arrays = isinstance(matrix_a, np.ndarray) or isinstance(matrix_b, np.ndarray)
+    a = _as_array(matrix_a)
+
+    if operation == "transpose":
+        result = a.T
+    elif operation in ("add", "multiply"):
+        if matrix_b is None:
+            action = "addition" if operation == "add" else "multiplication"
+            raise ValueError(f"Matrix B is required for {action}")
+        b = _as_array(matrix_b)
+        if operation == "add":
+            if a.shape != b.shape:
+                raise ValueError(f"Shape mismatch for addition: {a.shape} vs {b.shape}")
+            result = a + b
+        else:
+            if a.shape[1] != b.shape[0]:
+                raise ValueError(f"Shape mismatch for multiplication: {a.shape} vs {b.shape}")
+            result = _safe_int_matmul(a, b)
+    elif operation == "inverse":
+        if a.shape[0] != a.shape[1]:
+            raise ValueError("Inverse requires a square matrix")
+        try:
+            result = np.linalg.inv(a)
+        except np.linalg.LinAlgError as exc:
+            raise ValueError(f"Matrix is singular: {exc}") from exc
+    elif operation == "decompose":
+        factors = decompose(a, params.get("method", "lu"))
+        if keep_arrays:
+            return factors
+        return {name: value.tolist() for name, value in factors.items()}
+    else:
+        raise ValueError(f"Unknown matrix operation: {operation}")
+
+    return result if keep_arrays else result.tolist()
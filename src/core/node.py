@@ -10,23 +10,28 @@ import logging
 import time
 import uuid
 from concurrent.futures import ThreadPoolExecutor
-from dataclasses import asdict, dataclass
-from typing import Any, Dict, List, Optional
+from dataclasses import asdict, dataclass, replace
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import psutil
 
+from core.backends import ExecutionBackend
+from core.chunking import handler_key, job_items, materialize_payload
+from core.framing import FrameDecoder, FrameTooLarge, decode_json, encode_json_frame
 from core.job import Job
-from core.job_state import JobStatus
 from core.protocol import (
     JobAckPayload,
     JobAssignPayload,
+    JobCancelPayload,
     JobFailPayload,
     JobResultPayload,
     MessageEnvelope,
     MessageType,
 )
 from core.scheduler_state import TaskSchedulerState
+from core.speculation import RuntimeDistribution, SpeculationPolicy
 from core.task import Task, TaskExecutor, TaskType
+from core.task_cache import TASK_DESCRIPTOR_MISSING, LRUCache, TaskDescriptorRegistry
 from core.transport import Transport
 
 try:
@@ -117,7 +122,13 @@ class NodeCapability:
 class ComputeNode:
     """Основной класс узла для вычислительной сети"""
     
-    def __init__(self, host: str = '0.0.0.0', port: int = 5555, transport: Optional[Transport] = None):
+    def __init__(
+        self,
+        host: str = '0.0.0.0',
+        port: int = 5555,
+        transport: Optional[Transport] = None,
+        job_backend: Optional[ExecutionBackend] = None,
+    ):
         self.host = host
         self.port = port
         self.node_id = self.generate_node_id()
@@ -142,17 +153,48 @@ class ComputeNode:
         
         # Пул для выполнения задач
         self.task_executor = ThreadPoolExecutor(max_workers=self.capabilities.max_parallel_tasks)
-        self.job_executor = TaskExecutor()
+        # job_backend (например ProcessPoolBackend) выносит тяжёлые builtin-job'ы из event loop
+        self.job_executor = TaskExecutor(
+            max_concurrent_jobs=self.capabilities.max_parallel_tasks,
+            backend=job_backend,
+        )
         self.scheduler_state = TaskSchedulerState()
+        # Координатор: snapshot задачи уходит воркеру один раз, дальше — только хэш
+        self.task_descriptors = TaskDescriptorRegistry()
+        # Воркер: декодированные Task по хэшу дескриптора
+        self.task_cache: LRUCache[Task] = LRUCache()
         self._job_result_futures: Dict[str, asyncio.Future] = {}
+        # Координатор: runtime job'ов по задачам — основа порога спекулятивного исполнения
+        self.task_runtimes: LRUCache[RuntimeDistribution] = LRUCache()
+        self.speculation_stats = {"launched": 0, "won": 0}
+        # job_id -> {(worker_id, attempt): гонка завершена} для копий спекулятивных job'ов
+        self._racing_copies: LRUCache[Dict[Tuple[str, int], bool]] = LRUCache(1024)
+        # job_id -> (JOB_ASSIGN, задача) гонки: копию без дескриптора переотправляем со snapshot
+        self._racing_assigns: LRUCache[Tuple[JobAssignPayload, Task]] = LRUCache(1024)
+        self._backup_cursor = 0
+        # Воркер: исполняющиеся job'ы, которые координатор может отменить JOB_CANCEL
+        self._running_jobs: Dict[str, asyncio.Task] = {}
         if self.transport:
             self.transport.register_handler(self.node_id, self._on_transport_message)
         self.simulate_fail_once: set = set()
         self._job_latencies: List[float] = []
+        # Подписчики на изменения состояния узла (планировщик координатора)
+        self._listeners: List[Callable[[str], None]] = []
         
         # Регистрируем обработчики сообщений
         self.register_message_handlers()
     
+    def add_listener(self, callback: Callable[[str], None]) -> None:
+        """Подписка на события узла: "peers_changed", "job_result"."""
+        self._listeners.append(callback)
+
+    def _notify(self, event: str) -> None:
+        for callback in self._listeners:
+            try:
+                callback(event)
+            except Exception as exc:
+                logger.debug("Node listener failed on %s: %s", event, exc)
+
     def generate_node_id(self) -> str:
         """Генерирует уникальный ID узла"""
         unique_string = f"{self.host}:{self.port}:{uuid.uuid4()}"
@@ -182,6 +224,8 @@ class ComputeNode:
                 await self._handle_job_result(envelope)
             elif envelope.msg_type == MessageType.JOB_FAIL:
                 await self._handle_job_fail(envelope)
+            elif envelope.msg_type == MessageType.JOB_CANCEL:
+                await self._handle_job_cancel(envelope)
             else:
                 logger.debug("Node %s received unsupported message %s", self.node_id, envelope.msg_type)
         except Exception as exc:
@@ -210,18 +254,26 @@ class ComputeNode:
         
         print(f"🔗 Подключен новый пир: {peer_address}")
         
+        # Сообщения приходят кадрами: куски read() не совпадают с границами сообщений
+        decoder = FrameDecoder()
         try:
             while True:
-                data = await reader.read(4096)
+                data = await reader.read(65536)
                 if not data:
                     break
                 
-                try:
-                    message = json.loads(data.decode('utf-8'))
+                for body in decoder.feed(data):
+                    try:
+                        message = decode_json(body)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        print(f"⚠️ Некорректное сообщение от {peer_address}")
+                        continue
                     await self.process_message(message, peer_address)
-                except json.JSONDecodeError:
-                    print(f"⚠️ Некорректное сообщение от {peer_address}")
+            if decoder.pending:
+                print(f"⚠️ Обрыв сообщения от {peer_address}: {decoder.pending} байт")
                     
+        except FrameTooLarge as e:
+            print(f"❌ Слишком большой кадр от {peer_address}: {e}")
         except Exception as e:
             print(f"❌ Ошибка обработки клиента {peer_address}: {e}")
         finally:
@@ -249,6 +301,7 @@ class ComputeNode:
         if capabilities_data:
             self.peers[peer_address] = capabilities_data
             print(f"📦 Получены возможности от {peer_address}: CPU={capabilities_data.get('cpu_score', 0)}")
+            self._notify("peers_changed")
             
             # Отправляем свои возможности в ответ
             response = {
@@ -470,9 +523,7 @@ class ComputeNode:
             # Добавляем подпись к сообщению
             message['timestamp'] = time.time()
             message['from_node_id'] = self.node_id
-            message_json = json.dumps(message)
-            
-            writer.write(message_json.encode('utf-8'))
+            writer.write(encode_json_frame(message))
             await writer.drain()
             
             writer.close()
@@ -503,6 +554,7 @@ class ComputeNode:
         if peer_address in self.peers:
             del self.peers[peer_address]
             print(f"🔌 Отключен узел: {peer_address}")
+            self._notify("peers_changed")
     
     async def periodic_update(self):  # pragma: no cover - legacy socket path
         """Периодическое обновление состояния узла"""
@@ -543,26 +595,50 @@ class ComputeNode:
         self.task_executor.shutdown(wait=True)
         print("🛑 Вычислительный узел остановлен")
 
-    async def assign_single_job_to_worker(self, worker_id: str, job: Job, task: Task, sandbox_type: str = "process_isolation"):
-        """Отправляет один job воркеру через транспорт (минимальный сценарий)"""
+    async def close(self) -> None:
+        """Останавливает узел и освобождает бэкенд исполнения job'ов (пул процессов job_backend)."""
+        self.stop()
+        await self.job_executor.close()
+
+    async def assign_single_job_to_worker(
+        self,
+        worker_id: str,
+        job: Job,
+        task: Task,
+        sandbox_type: str = "process_isolation",
+        speculation: Optional[SpeculationPolicy] = None,
+        backup_workers: Sequence[str] = (),
+    ):
+        """Отправляет один job воркеру через транспорт (минимальный сценарий)
+
+        С `speculation` job, задержавшийся дольше порога политики, дублируется
+        на одного из `backup_workers`; засчитывается первый успешный результат,
+        неудача — только когда неудачей закончились все копии.
+        """
         if not self.transport:
             raise RuntimeError("Transport is not configured for node")
         self.scheduler_state.register_jobs_for_task(task, [job])
         max_attempts = job.max_attempts
         timeout = task.requirements.timeout_seconds or 30
+        task_hash, task_snapshot = self.task_descriptors.describe(task)
 
         for attempt in range(1, max_attempts + 1):
+            input_payload = {
+                "task_hash": task_hash,
+                "job_payload": materialize_payload(job.input_payload),
+                "task_type": job.task_type,
+            }
+            send_snapshot = not self.task_descriptors.worker_has(worker_id, task_hash)
+            if send_snapshot:
+                input_payload["task_snapshot"] = task_snapshot
+                self.task_descriptors.mark_sent(worker_id, task_hash)
             payload = JobAssignPayload(
                 task_id=task.task_id,
                 job_id=job.job_id,
                 attempt=attempt,
                 code_ref={"language": "python", "entry": "builtin"},
                 sandbox_type=sandbox_type,
-                input_payload={
-                    "task_snapshot": task.to_dict(),
-                    "job_payload": job.input_payload,
-                    "task_type": job.task_type,
-                },
+                input_payload=input_payload,
                 requirements={
                     "cpu_percent": task.requirements.cpu_percent,
                     "ram_gb": task.requirements.ram_gb,
@@ -572,8 +648,14 @@ class ComputeNode:
                 privacy=task.privacy,
             )
             send_time = time.time()
-            self.scheduler_state.mark_assigned(job.job_id, worker_id, send_time)
-            result_payload = await self._send_and_wait(worker_id, payload, timeout)
+            self.scheduler_state.mark_assigned(job.job_id, worker_id, send_time, deadline_ts=payload.deadline_ts)
+            result_payload = await self._send_and_wait(worker_id, payload, timeout, task, speculation, backup_workers)
+            if result_payload and result_payload.error == TASK_DESCRIPTOR_MISSING and not send_snapshot:
+                # Воркер вытеснил дескриптор: повторяем с snapshot, попытка не тратится
+                input_payload["task_snapshot"] = task_snapshot
+                result_payload = await self._send_and_wait(
+                    worker_id, payload, timeout, task, speculation, backup_workers,
+                )
             if result_payload and result_payload.success:
                 self.scheduler_state.mark_result(job.job_id, True, time.time())
                 self.reputation["successful_tasks"] += 1
@@ -588,31 +670,245 @@ class ComputeNode:
                         f"{getattr(result_payload, 'error', 'timeout')}"
                     )
 
-    async def _send_and_wait(self, worker_id: str, payload: JobAssignPayload, timeout: float) -> Optional[JobResultPayload]:
-        envelope = MessageEnvelope.create(
-            MessageType.JOB_ASSIGN,
-            src_node=self.node_id,
-            dst_node=worker_id,
-            payload=payload.to_dict(),
-        )
+    async def assign_jobs(
+        self,
+        jobs: Iterable[Job],
+        task: Task,
+        workers: Sequence[str],
+        sandbox_type: str = "process_isolation",
+        window: Optional[int] = None,
+        speculation: Optional[SpeculationPolicy] = None,
+    ) -> AsyncIterator[JobResultPayload]:
+        """Раздаёт job'ы пулу воркеров конвейером и отдаёт результаты по мере прихода.
+
+        На каждого воркера держится окно из `window` job'ов в полёте (по умолчанию
+        его max_parallel_tasks); освободившийся слот сразу берёт следующий job.
+        `jobs` читается лениво, так что подходит и генератор iter_task_jobs.
+        Job, исчерпавший попытки, отдаётся как JobResultPayload с success=False.
+        С `speculation` медленные job'ы дублируются на другого воркера из пула.
+        """
+        if not self.transport:
+            raise RuntimeError("Transport is not configured for node")
+        if not workers:
+            raise ValueError("No workers to assign jobs to")
+        pending_jobs = iter(jobs)
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def slot(worker_id: str):
+            try:
+                # Итератор общий для всех слотов: next() синхронный, гонок нет
+                for job in pending_jobs:
+                    try:
+                        result = await self.assign_single_job_to_worker(
+                            worker_id, job, task, sandbox_type, speculation, workers,
+                        )
+                    except RuntimeError as exc:
+                        result = JobResultPayload(
+                            task_id=task.task_id,
+                            job_id=job.job_id,
+                            success=False,
+                            output=None,
+                            error=str(exc),
+                            runtime_ms=0.0,
+                            worker_id=worker_id,
+                            attempt=job.max_attempts,
+                        )
+                    await results.put(result)
+            finally:
+                await results.put(None)
+
+        slots = [
+            asyncio.ensure_future(slot(worker_id))
+            for worker_id in workers
+            for _ in range(self._worker_window(worker_id, window))
+        ]
+        try:
+            finished = 0
+            while finished < len(slots):
+                result = await results.get()
+                if result is None:
+                    finished += 1
+                else:
+                    yield result
+            # Пробрасываем неожиданные ошибки слотов
+            await asyncio.gather(*slots)
+        finally:
+            for pending in slots:
+                pending.cancel()
+
+    def _worker_window(self, worker_id: str, window: Optional[int]) -> int:
+        if window is not None:
+            return max(1, window)
+        peer = self.peers.get(worker_id) or {}
+        return max(1, peer.get("max_parallel_tasks") or self.capabilities.max_parallel_tasks)
+
+    async def _send_and_wait(
+        self,
+        worker_id: str,
+        payload: JobAssignPayload,
+        timeout: float,
+        task: Optional[Task] = None,
+        speculation: Optional[SpeculationPolicy] = None,
+        backup_workers: Sequence[str] = (),
+    ) -> Optional[JobResultPayload]:
         future = asyncio.get_running_loop().create_future()
         self._job_result_futures[payload.job_id] = future
-        await self.transport.send(worker_id, envelope)
+        threshold = None
+        if speculation is not None and task is not None and any(w != worker_id for w in backup_workers):
+            threshold = speculation.threshold_s(self.task_runtimes.get(task.task_id))
+        if threshold is not None and threshold < timeout:
+            return await self._send_speculative(worker_id, payload, timeout, threshold, task, backup_workers, future)
+        await self.transport.send(worker_id, self._job_assign_envelope(worker_id, payload))
         try:
             return await asyncio.wait_for(future, timeout=timeout)
         except asyncio.TimeoutError:
-            logger.warning("Job %s timed out awaiting result", payload.job_id)
-            future = self._job_result_futures.get(payload.job_id)
-            if future and not future.done():
-                future.cancel()
-            if payload.job_id in self.scheduler_state.jobs_by_id:
-                self.scheduler_state.mark_result(payload.job_id, False, time.time())
-                self.reputation["failed_tasks"] += 1
-                self.reputation["penalties"] += 1
-            return None
+            return self._on_job_timeout(payload)
+
+    async def _send_speculative(
+        self,
+        worker_id: str,
+        payload: JobAssignPayload,
+        timeout: float,
+        threshold: float,
+        task: Task,
+        backup_workers: Sequence[str],
+        future: asyncio.Future,
+    ) -> Optional[JobResultPayload]:
+        """Ждёт результат `threshold` секунд, затем запускает копию job'а на другом воркере.
+
+        Отправки идут фоном: транспорт в памяти исполняет job внутри send(), а
+        копия должна стартовать, пока первая ещё работает.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        copies = {(worker_id, payload.attempt): False}
+        self._racing_copies.put(payload.job_id, copies)
+        self._racing_assigns.put(payload.job_id, (payload, task))
+        duplicated = False
+        self._send_in_background(worker_id, payload, future)
+        try:
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), timeout=threshold)
+            except asyncio.TimeoutError:
+                pass
+            backup_id = self._pick_backup(backup_workers, worker_id)
+            backup_payload = self._payload_for_worker(payload, backup_id, task)
+            copies[(backup_id, payload.attempt)] = False
+            self._send_in_background(backup_id, backup_payload, future)
+            duplicated = True
+            self.speculation_stats["launched"] += 1
+            self.event_log.append({
+                "event": "job_speculated",
+                "job_id": payload.job_id,
+                "task_id": payload.task_id,
+                "worker_id": worker_id,
+                "backup_id": backup_id,
+                "ts": time.time(),
+            })
+            logger.info("Job %s exceeded %.3fs on %s, duplicated to %s", payload.job_id, threshold, worker_id, backup_id)
+            try:
+                result = await asyncio.wait_for(asyncio.shield(future), timeout=max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                return self._on_job_timeout(payload)
+            if result.worker_id == backup_id:
+                self.speculation_stats["won"] += 1
+            return result
+        finally:
+            # Всё, что не выиграло гонку, отменяем; поздние результаты копий отбрасываются
+            losers = [copy for copy, settled in copies.items() if not settled]
+            for copy in losers:
+                copies[copy] = True
+            if duplicated:
+                for loser_id, _ in losers:
+                    await self._cancel_job_copy(loser_id, payload)
+
+    def _send_in_background(self, worker_id: str, payload: JobAssignPayload, future: asyncio.Future):
+        sending = asyncio.ensure_future(self.transport.send(worker_id, self._job_assign_envelope(worker_id, payload)))
+
+        def _sent(task: asyncio.Task):
+            if task.cancelled() or task.exception() is None:
+                return
+            logger.warning("Failed to send job %s to %s: %s", payload.job_id, worker_id, task.exception())
+            # Неотправленная копия проиграла; гонку это решает, только если других копий нет
+            copies = self._racing_copies.get(payload.job_id)
+            copy = (worker_id, payload.attempt)
+            if future.done() or copies is None or copies.get(copy, True):
+                return
+            if self._defer_copy_failure(copies, copy):
+                return
+            del copies[copy]
+            future.set_exception(task.exception())
+
+        sending.add_done_callback(_sent)
+
+    async def _cancel_job_copy(self, worker_id: str, payload: JobAssignPayload):
+        cancel = JobCancelPayload(task_id=payload.task_id, job_id=payload.job_id, reason="speculative_loser")
+        try:
+            await self.transport.send(
+                worker_id,
+                MessageEnvelope.create(MessageType.JOB_CANCEL, self.node_id, worker_id, cancel.to_dict()),
+            )
+        except Exception as exc:
+            logger.debug("Failed to cancel job %s on %s: %s", payload.job_id, worker_id, exc)
+
+    def _pick_backup(self, backup_workers: Sequence[str], exclude: str) -> str:
+        candidates = [worker_id for worker_id in backup_workers if worker_id != exclude]
+        self._backup_cursor += 1
+        return candidates[self._backup_cursor % len(candidates)]
+
+    def _payload_for_worker(
+        self, payload: JobAssignPayload, worker_id: str, task: Task, force_snapshot: bool = False,
+    ) -> JobAssignPayload:
+        """Копия JOB_ASSIGN для другого воркера: snapshot задачи, если он его ещё не получал."""
+        task_hash, task_snapshot = self.task_descriptors.describe(task)
+        input_payload = dict(payload.input_payload)
+        if not force_snapshot and self.task_descriptors.worker_has(worker_id, task_hash):
+            input_payload.pop("task_snapshot", None)
+        else:
+            input_payload["task_snapshot"] = task_snapshot
+            self.task_descriptors.mark_sent(worker_id, task_hash)
+        return replace(payload, input_payload=input_payload)
+
+    def _job_assign_envelope(self, worker_id: str, payload: JobAssignPayload) -> MessageEnvelope:
+        return MessageEnvelope.create(
+            MessageType.JOB_ASSIGN,
+            src_node=self.node_id,
+            dst_node=worker_id,
+            payload=payload.to_dict(),
+        )
+
+    def _on_job_timeout(self, payload: JobAssignPayload) -> None:
+        logger.warning("Job %s timed out awaiting result", payload.job_id)
+        future = self._job_result_futures.get(payload.job_id)
+        if future and not future.done():
+            future.cancel()
+        if payload.job_id in self.scheduler_state.jobs_by_id:
+            self.scheduler_state.mark_result(payload.job_id, False, time.time())
+            self.reputation["failed_tasks"] += 1
+            self.reputation["penalties"] += 1
+        return None
 
     async def _handle_job_assign(self, envelope: MessageEnvelope):
         payload = JobAssignPayload.from_dict(envelope.payload)
+        # Дескриптор задачи кладём в кэш до первого await: следующие job'ы с тем же хэшем
+        # могут обрабатываться параллельно с этим
+        task = self._resolve_task_descriptor(payload.input_payload)
+        if task is None and payload.input_payload.get("task_hash"):
+            missing = JobResultPayload(
+                task_id=payload.task_id,
+                job_id=payload.job_id,
+                success=False,
+                output=None,
+                error=TASK_DESCRIPTOR_MISSING,
+                runtime_ms=0.0,
+                worker_id=self.node_id,
+                attempt=payload.attempt,
+            )
+            await self.transport.send(
+                envelope.src_node,
+                MessageEnvelope.create(MessageType.JOB_RESULT, self.node_id, envelope.src_node, missing.to_dict()),
+            )
+            return
         ack = JobAckPayload(task_id=payload.task_id, job_id=payload.job_id, status="accepted")
         await self.transport.send(
             envelope.src_node,
@@ -658,10 +954,7 @@ class ComputeNode:
         )
         job.attempts = payload.attempt
         job.canonical_id = payload.job_id
-        task_snapshot = payload.input_payload.get("task_snapshot")
-        if task_snapshot:
-            task = Task.from_dict(task_snapshot)
-        else:
+        if task is None:
             task = Task.create_map(
                 owner_id=envelope.src_node,
                 data=job_payload.get("data", []),
@@ -669,9 +962,19 @@ class ComputeNode:
             )
         start = time.time()
         if payload.job_id in self.scheduler_state.jobs_by_id:
-            record = self.scheduler_state.jobs_by_id[payload.job_id]
-            record.status = JobStatus.RUNNING
-        job_result = await self.job_executor.execute_single_job(task, job)
+            self.scheduler_state.mark_running(payload.job_id, start)
+        running = asyncio.ensure_future(self.job_executor.execute_single_job(task, job))
+        self._running_jobs[payload.job_id] = running
+        try:
+            job_result = await running
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                raise
+            # JOB_CANCEL: результат координатору не нужен
+            logger.info("Node %s cancelled job %s", self.node_id, payload.job_id)
+            return
+        finally:
+            self._running_jobs.pop(payload.job_id, None)
         runtime_ms = (time.time() - start) * 1000
         result_payload = JobResultPayload(
             task_id=payload.task_id,
@@ -688,6 +991,16 @@ class ComputeNode:
             MessageEnvelope.create(MessageType.JOB_RESULT, self.node_id, envelope.src_node, result_payload.to_dict()),
         )
 
+    def _resolve_task_descriptor(self, input_payload: Dict[str, Any]) -> Optional[Task]:
+        """Task из кэша по хэшу или из приложенного snapshot'а (с сохранением в кэш)."""
+        task_hash = input_payload.get("task_hash")
+        task = self.task_cache.get(task_hash) if task_hash else None
+        if task is None and input_payload.get("task_snapshot"):
+            task = Task.from_dict(input_payload["task_snapshot"])
+            if task_hash:
+                self.task_cache.put(task_hash, task)
+        return task
+
     async def _handle_job_ack(self, envelope: MessageEnvelope):
         payload = JobAckPayload.from_dict(envelope.payload)
         logger.info("Node %s received JOB_ACK %s status=%s", self.node_id, payload.job_id, payload.status)
@@ -698,13 +1011,35 @@ class ComputeNode:
         payload = JobResultPayload.from_dict(envelope.payload)
         logger.info("Node %s received JOB_RESULT %s success=%s", self.node_id, payload.job_id, payload.success)
         future = self._job_result_futures.get(payload.job_id)
+        if payload.error == TASK_DESCRIPTOR_MISSING and self._resend_racing_copy(payload, future):
+            return
+        if self._is_losing_copy(payload, future):
+            logger.debug("Dropping late result of job %s from %s", payload.job_id, payload.worker_id)
+            return
         if future and not future.done():
             future.set_result(payload)
+        if payload.error == TASK_DESCRIPTOR_MISSING:
+            # Не ошибка воркера: координатор переотправит job вместе с snapshot
+            return
         # Обновляем статус и собираем метрики
         now = time.time()
         if payload.job_id in self.scheduler_state.jobs_by_id:
             self.scheduler_state.mark_result(payload.job_id, payload.success, now)
             self._job_latencies.append(payload.runtime_ms / 1000.0 if payload.runtime_ms else 0.0)
+            if payload.success and payload.runtime_ms:
+                runtimes = self.task_runtimes.get(payload.task_id)
+                if runtimes is None:
+                    runtimes = RuntimeDistribution()
+                    self.task_runtimes.put(payload.task_id, runtimes)
+                runtimes.observe(payload.runtime_ms)
+            if payload.success:
+                # runtime воркера кормит адаптивный chunk_size следующих задач
+                job = self.scheduler_state.jobs_by_id[payload.job_id].job
+                self.job_executor.chunker.observe(
+                    handler_key(job.input_payload, job.task_type),
+                    job_items(job.input_payload),
+                    payload.runtime_ms,
+                )
         # Репутация
         if payload.success:
             self.reputation["successful_tasks"] += 1
@@ -736,6 +1071,54 @@ class ComputeNode:
             "ts": now,
             "worker_id": payload.worker_id,
         })
+        self._notify("job_result")
+
+    def _is_losing_copy(self, payload: JobResultPayload, future: Optional[asyncio.Future]) -> bool:
+        """Результат копии спекулятивного job'а, пришедший после победителя."""
+        if payload.job_id not in self._racing_copies:
+            return False
+        copies = self._racing_copies.get(payload.job_id)
+        copy = (payload.worker_id, payload.attempt)
+        if copy not in copies:
+            return False
+        if copies[copy] or future is None or future.done():
+            return True
+        if not payload.success and self._defer_copy_failure(copies, copy):
+            return True
+        # Первый успешный (или последний) результат гонки: копия больше не проигравшая
+        del copies[copy]
+        return False
+
+    def _resend_racing_copy(self, payload: JobResultPayload, future: Optional[asyncio.Future]) -> bool:
+        """Копия гонки без дескриптора переотправляется со snapshot и остаётся в гонке."""
+        if payload.job_id not in self._racing_copies or future is None or future.done():
+            return False
+        copies = self._racing_copies.get(payload.job_id)
+        racing = self._racing_assigns.get(payload.job_id)
+        copy = (payload.worker_id, payload.attempt)
+        if racing is None or copies.get(copy, True):
+            return False
+        assign, task = racing
+        self._send_in_background(
+            payload.worker_id, self._payload_for_worker(assign, payload.worker_id, task, force_snapshot=True), future,
+        )
+        return True
+
+    @staticmethod
+    def _defer_copy_failure(copies: Dict[Tuple[str, int], bool], copy: Tuple[str, int]) -> bool:
+        """Неудача копии не решает гонку, пока другие копии ещё могут прислать успех."""
+        if any(not settled for other, settled in copies.items() if other != copy):
+            # Копия уже закончилась: отменять её в конце гонки не нужно
+            copies[copy] = True
+            return True
+        return False
+
+    async def _handle_job_cancel(self, envelope: MessageEnvelope):
+        payload = JobCancelPayload.from_dict(envelope.payload)
+        running = self._running_jobs.get(payload.job_id)
+        if running is not None and not running.done():
+            logger.info("Node %s cancelling job %s: %s", self.node_id, payload.job_id, payload.reason)
+            running.cancel()
 
     async def _handle_job_fail(self, envelope: MessageEnvelope):
         payload = JobFailPayload.from_dict(envelope.payload)
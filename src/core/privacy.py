@@ -21,6 +21,9 @@ logger = logging.getLogger(__name__)
 class BasePrivacyEngine:
     """Базовый privacy-движок, не меняющий поведение."""
 
+    # Итог можно собирать инкрементально, без finalize_task_result над всем списком
+    streams_results = True
+
     def __init__(self, executor: Any):
         self.executor = executor
 
@@ -48,6 +51,9 @@ class ShardPrivacyEngine(BasePrivacyEngine):
 class MaskPrivacyEngine(BasePrivacyEngine):
     """Простая маскировка входных данных (поддержка только для map-задач)."""
 
+    # Перестановку можно снять только с полного результата
+    streams_results = False
+
     async def prepare_task(self, task: Task) -> Task:
         if task.task_type != TaskType.MAP or not task.map or not task.map.data:
             logger.warning(
@@ -58,6 +64,9 @@ class MaskPrivacyEngine(BasePrivacyEngine):
         permutation = list(range(len(task.map.data)))
         random.shuffle(permutation)
         shuffled = [task.map.data[idx] for idx in permutation]
+        # split_task_to_jobs шардирует input_data, поэтому маскируем и его
+        if task.input_data is task.map.data:
+            task.input_data = shuffled
         task.map.data = shuffled
         task.metadata["mask_permutation"] = permutation
         logger.debug(
@@ -1,15 +1,32 @@
 #!/usr/bin/env python3
 """
 Сетевые сообщения уровня job'ов и их полезная нагрузка.
+
+Сериализация тел сообщений — через подключаемые кодеки (Codec): JSON для
+совместимости и компактный бинарный формат, в котором числовые ndarray идут
+сырым буфером. Тело самоописывающее (бинарное начинается с маркера и версии),
+поэтому получатель декодирует любой известный ему кодек, а отправитель
+выбирает кодек через negotiate_codec по спискам, которыми обменялись узлы.
 """
 
 from __future__ import annotations
 
+import json
+import math
+import struct
+import sys
 import time
 import uuid
+from abc import ABC, abstractmethod
+from array import array
 from dataclasses import asdict, dataclass
 from enum import Enum
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy опционален
+    np = None
 
 
 class MessageType(str, Enum):
@@ -17,6 +34,7 @@ class MessageType(str, Enum):
     JOB_ACK = "JOB_ACK"
     JOB_RESULT = "JOB_RESULT"
     JOB_FAIL = "JOB_FAIL"
+    JOB_CANCEL = "JOB_CANCEL"
     WORKER_HEARTBEAT = "WORKER_HEARTBEAT"
     TASK_STATUS_UPDATE = "TASK_STATUS_UPDATE"
 
@@ -131,3 +149,368 @@ class JobFailPayload:
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "JobFailPayload":
         return cls(**data)
+
+
+@dataclass
+class JobCancelPayload:
+    task_id: str
+    job_id: str
+    reason: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "JobCancelPayload":
+        return cls(**data)
+
+
+# --- Кодеки ---------------------------------------------------------------
+
+
+def json_default(value: Any) -> Any:
+    """Типы, которые встречаются в payload'ах job'ов, но не поддерживаются json."""
+    if isinstance(value, Enum):
+        return value.value
+    if hasattr(value, "tolist"):
+        # ndarray и скаляры numpy
+        return value.tolist()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+@dataclass
+class CodecStats:
+    """Счётчики кодека: время и объём на сообщение."""
+
+    encoded: int = 0
+    decoded: int = 0
+    encode_seconds: float = 0.0
+    decode_seconds: float = 0.0
+    bytes_out: int = 0
+    bytes_in: int = 0
+
+    def record_encode(self, seconds: float, size: int) -> None:
+        self.encoded += 1
+        self.encode_seconds += seconds
+        self.bytes_out += size
+
+    def record_decode(self, seconds: float, size: int) -> None:
+        self.decoded += 1
+        self.decode_seconds += seconds
+        self.bytes_in += size
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "encoded": self.encoded,
+            "decoded": self.decoded,
+            "encode_us_per_msg": self.encode_seconds * 1e6 / self.encoded if self.encoded else 0.0,
+            "decode_us_per_msg": self.decode_seconds * 1e6 / self.decoded if self.decoded else 0.0,
+            "bytes_per_msg_out": self.bytes_out / self.encoded if self.encoded else 0.0,
+            "bytes_per_msg_in": self.bytes_in / self.decoded if self.decoded else 0.0,
+        }
+
+
+class Codec(ABC):
+    """Сериализация значения (dict конверта, payload) в тело кадра и обратно."""
+
+    name: str
+
+    @abstractmethod
+    def encode(self, value: Any) -> bytes:
+        ...
+
+    @abstractmethod
+    def decode(self, body: bytes) -> Any:
+        ...
+
+
+class JsonCodec(Codec):
+    name = "json/1"
+
+    def encode(self, value: Any) -> bytes:
+        return json.dumps(value, default=json_default).encode("utf-8")
+
+    def decode(self, body: bytes) -> Any:
+        return json.loads(body)
+
+
+_BINARY_MAGIC = 0xB7
+_BINARY_VERSION = 1
+_FLOAT64 = struct.Struct("<d")
+_INT64_MIN, _INT64_MAX = -(2 ** 63), 2 ** 63 - 1
+_BIG_ENDIAN = sys.byteorder == "big"
+# Короче этого однородный список кодируется поэлементно: проверка типов дороже выигрыша
+_TYPED_LIST_MIN = 16
+# typecode array и граница модуля значений: b/h/i/q — 1/2/4/8 байт
+_INT_WIDTHS = (("b", 2 ** 7), ("h", 2 ** 15), ("i", 2 ** 31), ("q", 2 ** 63))
+_INT_TYPECODES = {code for code, _ in _INT_WIDTHS}
+
+# Коды typecode array для сырых буферов, когда numpy у получателя нет
+_ARRAY_TYPECODES = {"f8": "d", "f4": "f", "i8": "q", "i4": "i", "i2": "h", "i1": "b", "u8": "Q", "u4": "I", "u2": "H", "u1": "B"}
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(view: memoryview, offset: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = view[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def _nest(flat: Sequence[Any], shape: Tuple[int, ...]) -> Any:
+    if not shape:
+        return flat[0]
+    if len(shape) == 1:
+        return list(flat)
+    step = len(flat) // shape[0] if shape[0] else 0
+    return [_nest(flat[row * step:(row + 1) * step], shape[1:]) for row in range(shape[0])]
+
+
+class BinaryCodec(Codec):
+    """Тегированный бинарный формат: маркер, версия, затем значение.
+
+    Теги: N/T/F — None/True/False, i — int64 (zigzag varint), I — длинное
+    целое, d — float64, s — строка, b — bytes, l — список, m — словарь,
+    a — числовой массив (dtype, shape, сырой буфер в little-endian без
+    поэлементного разбора), n/D — однородный список целых (в самой узкой
+    знаковой ширине) или float64 тоже сырым буфером. Длины и размерности — varint.
+    """
+
+    name = "binary/1"
+
+    def encode(self, value: Any) -> bytes:
+        out = bytearray((_BINARY_MAGIC, _BINARY_VERSION))
+        self._encode(value, out)
+        return bytes(out)
+
+    def _encode(self, value: Any, out: bytearray) -> None:
+        if value is None:
+            out += b"N"
+        elif value is True:
+            out += b"T"
+        elif value is False:
+            out += b"F"
+        elif isinstance(value, Enum):
+            self._encode(value.value, out)
+        elif isinstance(value, int):
+            if _INT64_MIN <= value <= _INT64_MAX:
+                out += b"i"
+                _write_varint(out, (value << 1) ^ (value >> 63))
+            else:
+                raw = value.to_bytes((value.bit_length() + 8) // 8, "little", signed=True)
+                out += b"I"
+                _write_varint(out, len(raw))
+                out += raw
+        elif isinstance(value, float):
+            out += b"d"
+            out += _FLOAT64.pack(value)
+        elif isinstance(value, str):
+            raw = value.encode("utf-8")
+            out += b"s"
+            _write_varint(out, len(raw))
+            out += raw
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            out += b"b"
+            _write_varint(out, len(value))
+            out += value
+        elif isinstance(value, dict):
+            out += b"m"
+            _write_varint(out, len(value))
+            for key, item in value.items():
+                self._encode(key, out)
+                self._encode(item, out)
+        elif isinstance(value, (list, tuple, set)):
+            if len(value) >= _TYPED_LIST_MIN and self._encode_typed_list(value, out):
+                return
+            out += b"l"
+            _write_varint(out, len(value))
+            for item in value:
+                self._encode(item, out)
+        elif np is not None and isinstance(value, np.ndarray) and value.dtype.kind in "biuf":
+            self._encode_array(value, out)
+        elif np is not None and isinstance(value, np.generic):
+            self._encode(value.item(), out)
+        elif hasattr(value, "tolist"):
+            self._encode(value.tolist(), out)
+        else:
+            raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+    @staticmethod
+    def _encode_typed_list(value: Any, out: bytearray) -> bool:
+        kinds = set(map(type, value))
+        if kinds == {int}:
+            low, high = min(value), max(value)
+            if low < _INT64_MIN or high > _INT64_MAX:
+                return False
+            typecode = next(code for code, bound in _INT_WIDTHS if -bound <= low and high < bound)
+            header = b"n" + typecode.encode("ascii")
+        elif kinds == {float}:
+            typecode, header = "d", b"D"
+        else:
+            return False
+        packed = array(typecode, value)
+        if _BIG_ENDIAN:
+            packed.byteswap()
+        out += header
+        _write_varint(out, len(packed))
+        out += memoryview(packed).cast("B")
+        return True
+
+    @staticmethod
+    def _encode_array(value: Any, out: bytearray) -> None:
+        dtype = value.dtype.newbyteorder("<") if value.dtype.byteorder == ">" else value.dtype
+        raw = np.ascontiguousarray(value, dtype=dtype).reshape(value.shape)
+        code = dtype.str.lstrip("<|=").encode("ascii")
+        out += b"a"
+        out.append(len(code))
+        out += code
+        out.append(raw.ndim)
+        for dim in raw.shape:
+            _write_varint(out, dim)
+        out += memoryview(raw.reshape(-1).view(np.uint8))
+
+    def decode(self, body: bytes) -> Any:
+        view = memoryview(body)
+        if len(view) < 2 or view[0] != _BINARY_MAGIC:
+            raise ValueError("Not a binary codec body")
+        if view[1] != _BINARY_VERSION:
+            raise ValueError(f"Unsupported binary codec version {view[1]}")
+        try:
+            value, offset = self._decode(view, 2)
+        except (struct.error, IndexError) as exc:
+            raise ValueError(f"Truncated binary message: {exc}") from exc
+        if offset != len(view):
+            raise ValueError("Trailing bytes after binary message")
+        return value
+
+    def _decode(self, view: memoryview, offset: int) -> Tuple[Any, int]:
+        tag = view[offset]
+        offset += 1
+        if tag == 0x4E:  # N
+            return None, offset
+        if tag == 0x54:  # T
+            return True, offset
+        if tag == 0x46:  # F
+            return False, offset
+        if tag == 0x69:  # i
+            zigzag, offset = _read_varint(view, offset)
+            return (zigzag >> 1) ^ -(zigzag & 1), offset
+        if tag == 0x64:  # d
+            return _FLOAT64.unpack_from(view, offset)[0], offset + 8
+        if tag in (0x73, 0x62, 0x49):  # s, b, I
+            length, offset = _read_varint(view, offset)
+            raw = view[offset:offset + length]
+            if len(raw) != length:
+                raise ValueError("Truncated binary message")
+            offset += length
+            if tag == 0x73:
+                return str(raw, "utf-8"), offset
+            if tag == 0x62:
+                return bytes(raw), offset
+            return int.from_bytes(raw, "little", signed=True), offset
+        if tag == 0x6C:  # l
+            count, offset = _read_varint(view, offset)
+            items: List[Any] = []
+            for _ in range(count):
+                item, offset = self._decode(view, offset)
+                items.append(item)
+            return items, offset
+        if tag == 0x6D:  # m
+            count, offset = _read_varint(view, offset)
+            mapping: Dict[Any, Any] = {}
+            for _ in range(count):
+                key, offset = self._decode(view, offset)
+                mapping[key], offset = self._decode(view, offset)
+            return mapping, offset
+        if tag == 0x61:  # a
+            return self._decode_array(view, offset)
+        if tag in (0x6E, 0x44):  # n, D
+            if tag == 0x6E:
+                typecode = chr(view[offset])
+                offset += 1
+                if typecode not in _INT_TYPECODES:
+                    raise ValueError(f"Unknown integer width {typecode!r}")
+            else:
+                typecode = "d"
+            count, offset = _read_varint(view, offset)
+            packed = array(typecode)
+            size = packed.itemsize * count
+            raw = view[offset:offset + size]
+            if len(raw) != size:
+                raise ValueError("Truncated binary list")
+            packed.frombytes(raw)
+            if _BIG_ENDIAN:
+                packed.byteswap()
+            return packed.tolist(), offset + size
+        raise ValueError(f"Unknown binary tag {tag:#x}")
+
+    @staticmethod
+    def _decode_array(view: memoryview, offset: int) -> Tuple[Any, int]:
+        code_len = view[offset]
+        code = str(view[offset + 1:offset + 1 + code_len], "ascii")
+        offset += 1 + code_len
+        ndim = view[offset]
+        offset += 1
+        dims: List[int] = []
+        for _ in range(ndim):
+            dim, offset = _read_varint(view, offset)
+            dims.append(dim)
+        shape = tuple(dims)
+        itemsize = int(code[1:])
+        nbytes = itemsize * math.prod(shape)
+        raw = view[offset:offset + nbytes]
+        if len(raw) != nbytes:
+            raise ValueError("Truncated binary array")
+        offset += nbytes
+        if np is not None:
+            # Копия отвязывает массив от буфера кадра и делает его изменяемым
+            return np.frombuffer(raw, dtype=np.dtype("<" + code)).reshape(shape).copy(), offset
+        if code == "b1":
+            return _nest([bool(byte) for byte in raw], shape), offset
+        typecode = _ARRAY_TYPECODES.get(code)
+        if typecode is None:
+            raise ValueError(f"Cannot decode array of dtype {code} without numpy")
+        flat = array(typecode)
+        flat.frombytes(raw)
+        return _nest(flat.tolist(), shape), offset
+
+
+JSON_CODEC = JsonCodec()
+BINARY_CODEC = BinaryCodec()
+CODECS: Dict[str, Codec] = {codec.name: codec for codec in (BINARY_CODEC, JSON_CODEC)}
+# Порядок предпочтения: первый общий с пиром кодек побеждает
+DEFAULT_CODECS: Tuple[str, ...] = (BINARY_CODEC.name, JSON_CODEC.name)
+
+
+def get_codec(name: str) -> Codec:
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"Unknown codec {name}") from None
+
+
+def negotiate_codec(local: Sequence[str], remote: Sequence[str]) -> str:
+    """Первый кодек из списка local, который поддерживает пир; иначе JSON."""
+    for name in local:
+        if name in remote and name in CODECS:
+            return name
+    return JSON_CODEC.name
+
+
+def codec_for_body(body: bytes) -> Codec:
+    """Определяет кодек по первому байту тела."""
+    if body[:1] == bytes((_BINARY_MAGIC,)):
+        return BINARY_CODEC
+    return JSON_CODEC
@@ -1,21 +1,61 @@
 #!/usr/bin/env python3
 """
 Структуры данных координатора для очереди job'ов.
+
+Кроме словаря записей состояние держит индексы, чтобы планировщику не
+приходилось перебирать все job'ы:
+
+- множества job_id по статусам — подсчёт по статусу за O(1);
+- куча готовых к назначению job'ов по (приоритет, дедлайн, next_retry_ts) —
+  выбор следующего job'а за O(log n);
+- куча отложенных ретраев по next_retry_ts — созревшие ретраи переносятся
+  в очередь готовых по мере наступления времени;
+- куча дедлайнов job'ов в полёте — поиск просроченных за O(log n) на job.
+
+Из куч записи не удаляются при смене статуса: каждая смена увеличивает
+`JobRecord.version`, и устаревшие элементы отбрасываются при чтении.
+
+С подключённым журналом (`attach_journal`) каждый переход пишется в WAL, и
+после рестарта координатора состояние восстанавливается из снапшота и WAL.
+`input_payload` job'ов не журналируется: он восстанавливается разбиением задачи.
 """
 
 from __future__ import annotations
 
+import heapq
+import itertools
 import logging
+import math
 import time
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from core.job import Job
 from core.job_state import JobStatus
-from core.task import Task
+from core.journal import StateJournal, gc_paused
+from core.task import Task, TaskPriority
 
 logger = logging.getLogger(__name__)
 
+PRIORITY_RANK = {TaskPriority.LOW: 0, TaskPriority.NORMAL: 1, TaskPriority.HIGH: 2}
+IN_FLIGHT_STATUSES = frozenset({JobStatus.ASSIGNED, JobStatus.ACKED, JobStatus.RUNNING})
+RETRYABLE_STATUSES = frozenset({JobStatus.FAILED, JobStatus.EXPIRED})
+_STATUS_BY_VALUE = {status.value: status for status in JobStatus}
+
+# Кучу перестраиваем, когда устаревших элементов заметно больше живых записей
+_COMPACT_MIN_SIZE = 64
+_COMPACT_RATIO = 4
+
+
+def priority_rank(priority) -> int:
+    """Числовой ранг приоритета задачи: чем больше, тем раньше назначается."""
+    if not isinstance(priority, TaskPriority):
+        try:
+            priority = TaskPriority(getattr(priority, "value", priority))
+        except ValueError:
+            priority = TaskPriority.NORMAL
+    return PRIORITY_RANK[priority]
+
 
 @dataclass
 class JobRecord:
@@ -25,48 +65,79 @@ class JobRecord:
     attempts: int
     last_attempt_ts: float
     next_retry_ts: float
+    priority: int = PRIORITY_RANK[TaskPriority.NORMAL]
+    deadline_ts: float = math.inf
+    version: int = 0
+
+    def order_key(self) -> Tuple[int, float, float]:
+        """Порядок назначения: выше приоритет, раньше дедлайн, раньше ретрай."""
+        return (-self.priority, self.deadline_ts, self.next_retry_ts)
 
 
 class TaskSchedulerState:
     def __init__(self):
         self.jobs_by_id: Dict[str, JobRecord] = {}
         self.jobs_by_task: Dict[str, List[str]] = {}
+        # dict вместо set: сохраняет порядок регистрации
+        self._by_status: Dict[JobStatus, Dict[str, None]] = {status: {} for status in JobStatus}
+        self._ready: List[tuple] = []
+        self._retry: List[tuple] = []
+        self._deadlines: List[tuple] = []
+        self._due_retry: Dict[str, None] = {}
+        self._seq = itertools.count()
+        self.journal: Optional[StateJournal] = None
+        # Во время replay кучи не ведутся: строятся один раз в конце
+        self._bulk = False
 
-    def register_jobs_for_task(self, task: Task, jobs: List[Job]):
+    def register_jobs_for_task(self, task: Task, jobs: List[Job], deadline_ts: Optional[float] = None):
         now = time.time()
+        rank = priority_rank(task.config.priority)
+        deadline = math.inf if deadline_ts is None else deadline_ts
         self.jobs_by_task.setdefault(task.task_id, [])
         for job in jobs:
-            record = JobRecord(
-                job=job,
-                status=JobStatus.PENDING,
-                assigned_to=None,
-                attempts=0,
-                last_attempt_ts=0.0,
-                next_retry_ts=now,
-            )
-            self.jobs_by_id[job.job_id] = record
-            self.jobs_by_task[task.task_id].append(job.job_id)
+            self._register_job(job, task.task_id, rank, deadline, now)
+            if self.journal:
+                self.journal.append([
+                    "r", job.job_id, task.task_id, job.index, job.task_type,
+                    job.max_attempts, rank, deadline, now,
+                ])
             logger.debug("Job %s registered for task %s", job.job_id, task.task_id)
 
-    def mark_assigned(self, job_id: str, worker_id: str, now: float):
+    def mark_assigned(self, job_id: str, worker_id: str, now: float, deadline_ts: Optional[float] = None):
         record = self.jobs_by_id[job_id]
-        record.status = JobStatus.ASSIGNED
         record.assigned_to = worker_id
         record.attempts += 1
         record.last_attempt_ts = now
+        if deadline_ts is not None:
+            record.deadline_ts = deadline_ts
+        self._set_status(record, JobStatus.ASSIGNED)
+        if self.journal:
+            self.journal.append(["a", job_id, worker_id, now, deadline_ts])
         logger.debug("Job %s assigned to %s (attempt %d)", job_id, worker_id, record.attempts)
 
     def mark_ack(self, job_id: str, now: float):
         record = self.jobs_by_id[job_id]
-        record.status = JobStatus.ACKED
         record.last_attempt_ts = now
+        self._set_status(record, JobStatus.ACKED)
+        if self.journal:
+            self.journal.append(["k", job_id, now])
         logger.debug("Job %s acked by worker %s", job_id, record.assigned_to)
 
+    def mark_running(self, job_id: str, now: float):
+        record = self.jobs_by_id[job_id]
+        record.last_attempt_ts = now
+        self._set_status(record, JobStatus.RUNNING)
+        if self.journal:
+            self.journal.append(["u", job_id, now])
+        logger.debug("Job %s running on %s", job_id, record.assigned_to)
+
     def mark_result(self, job_id: str, success: bool, now: float):
         record = self.jobs_by_id[job_id]
-        record.status = JobStatus.COMPLETED if success else JobStatus.FAILED
         record.last_attempt_ts = now
         record.next_retry_ts = now if success else now + 1.0
+        self._set_status(record, JobStatus.COMPLETED if success else JobStatus.FAILED)
+        if self.journal:
+            self.journal.append(["x", job_id, success, now])
         logger.debug("Job %s result status=%s", job_id, "success" if success else "failed")
 
     def to_event_list(self) -> List[Dict]:
@@ -83,14 +154,205 @@ class TaskSchedulerState:
         return events
 
     def status_counters(self) -> Dict[JobStatus, int]:
-        counters: Dict[JobStatus, int] = dict.fromkeys(JobStatus, 0)
-        for record in self.jobs_by_id.values():
-            counters[record.status] = counters.get(record.status, 0) + 1
-        return counters
+        return {status: len(job_ids) for status, job_ids in self._by_status.items()}
+
+    def jobs_with_status(self, status: JobStatus) -> List[JobRecord]:
+        return [self.jobs_by_id[job_id] for job_id in self._by_status[status]]
 
     def jobs_due_for_retry(self, now: float) -> List[JobRecord]:
-        due = []
+        self._promote_due_retries(now)
+        due = [self.jobs_by_id[job_id] for job_id in self._due_retry]
+        return sorted(
+            (record for record in due if record.next_retry_ts <= now),
+            key=JobRecord.order_key,
+        )
+
+    def next_job(self, now: float) -> Optional[JobRecord]:
+        """Самый срочный job, который можно назначить сейчас (PENDING или созревший ретрай).
+
+        Запись остаётся в очереди, пока у неё не сменится статус (mark_assigned),
+        так что повторный вызов без назначения вернёт тот же job.
+        """
+        self._promote_due_retries(now)
+        while self._ready:
+            record = self._live(self._ready[0])
+            if record is not None:
+                return record
+            heapq.heappop(self._ready)
+        return None
+
+    def expire_overdue(self, now: float) -> List[JobRecord]:
+        """Переводит job'ы в полёте с истёкшим дедлайном в EXPIRED и возвращает их.
+
+        Просроченные job'ы сразу доступны для ретрая (next_retry_ts = now).
+        """
+        expired = []
+        while self._deadlines and self._deadlines[0][0] <= now:
+            record = self._live(heapq.heappop(self._deadlines))
+            if record is None:
+                continue
+            self._expire(record, now)
+            logger.debug("Job %s expired on %s", record.job.job_id, record.assigned_to)
+            expired.append(record)
+        return expired
+
+    def attach_journal(self, journal: StateJournal, now: Optional[float] = None) -> int:
+        """Восстанавливает состояние из журнала и дальше пишет в него переходы.
+
+        Job'ы, бывшие в полёте на момент остановки, переводятся в EXPIRED: их
+        результаты ждал прежний процесс, так что они сразу доступны для ретрая.
+        Возвращает число восстановленных job'ов.
+        """
+        now = time.time() if now is None else now
+        with gc_paused():
+            self._bulk = True
+            try:
+                for record in journal.replay():
+                    try:
+                        self._apply(record)
+                    except KeyError:
+                        logger.warning("Journal record for unknown job: %s", record[:2])
+            finally:
+                self._bulk = False
+            self._rebuild_indexes()
+        self.journal = journal
+        journal.open(self._snapshot_records)
+        # Переход в EXPIRED пишется в журнал как обычный; WAL не длиннее снапшота,
+        # так что отдельная компакция на старте не нужна
+        in_flight = [job_id for status in IN_FLIGHT_STATUSES for job_id in self._by_status[status]]
+        for job_id in in_flight:
+            self._expire(self.jobs_by_id[job_id], now)
+        logger.info("Recovered %d jobs from %s", len(self.jobs_by_id), journal.wal_path)
+        return len(self.jobs_by_id)
+
+    def _register_job(self, job: Job, task_id: str, rank: int, deadline: float, now: float) -> JobRecord:
+        previous = self.jobs_by_id.get(job.job_id)
+        if previous is not None:
+            self._by_status[previous.status].pop(job.job_id, None)
+            self._due_retry.pop(job.job_id, None)
+        record = JobRecord(
+            job=job,
+            status=JobStatus.PENDING,
+            assigned_to=None,
+            attempts=0,
+            last_attempt_ts=0.0,
+            next_retry_ts=now,
+            priority=rank,
+            deadline_ts=deadline,
+            version=previous.version + 1 if previous is not None else 0,
+        )
+        self.jobs_by_id[job.job_id] = record
+        self.jobs_by_task.setdefault(task_id, []).append(job.job_id)
+        self._index(record)
+        return record
+
+    def _expire(self, record: JobRecord, now: float):
+        record.next_retry_ts = now
+        self._set_status(record, JobStatus.EXPIRED)
+        if self.journal:
+            self.journal.append(["e", record.job.job_id, now])
+
+    def _apply(self, entry: List[Any]):
+        """Применяет запись журнала без повторной записи в журнал."""
+        kind = entry[0]
+        if kind == "s":
+            (_, job_id, task_id, index, task_type, max_attempts, status, assigned_to,
+             attempts, last_attempt_ts, next_retry_ts, rank, deadline) = entry
+            # Самая частая запись при старте: собираем JobRecord напрямую, в снапшоте
+            # job_id уникальны
+            record = JobRecord(
+                job=Job(job_id, task_id, index, task_type, {}, max_attempts=max_attempts),
+                status=_STATUS_BY_VALUE[status],
+                assigned_to=assigned_to,
+                attempts=attempts,
+                last_attempt_ts=last_attempt_ts,
+                next_retry_ts=next_retry_ts,
+                priority=rank,
+                deadline_ts=deadline,
+            )
+            self.jobs_by_id[job_id] = record
+            self.jobs_by_task.setdefault(task_id, []).append(job_id)
+            self._by_status[record.status][job_id] = None
+        elif kind == "r":
+            _, job_id, task_id, index, task_type, max_attempts, rank, deadline, now = entry
+            job = Job(job_id=job_id, task_id=task_id, index=index, task_type=task_type,
+                      input_payload={}, max_attempts=max_attempts)
+            self._register_job(job, task_id, rank, deadline, now)
+        elif kind == "a":
+            self.mark_assigned(entry[1], entry[2], entry[3], entry[4])
+        elif kind == "k":
+            self.mark_ack(entry[1], entry[2])
+        elif kind == "u":
+            self.mark_running(entry[1], entry[2])
+        elif kind == "x":
+            self.mark_result(entry[1], entry[2], entry[3])
+        elif kind == "e":
+            self._expire(self.jobs_by_id[entry[1]], entry[2])
+        else:
+            logger.warning("Unknown journal record %r", kind)
+
+    def _snapshot_records(self) -> Iterator[List[Any]]:
+        for record in self.jobs_by_id.values():
+            job = record.job
+            yield [
+                "s", job.job_id, job.task_id, job.index, job.task_type, job.max_attempts,
+                record.status.value, record.assigned_to, record.attempts,
+                record.last_attempt_ts, record.next_retry_ts, record.priority, record.deadline_ts,
+            ]
+
+    def _rebuild_indexes(self):
+        """Строит кучи по текущим записям за O(n) через heapify."""
+        self._ready, self._retry, self._deadlines = [], [], []
+        self._due_retry.clear()
         for record in self.jobs_by_id.values():
-            if record.status in {JobStatus.FAILED, JobStatus.EXPIRED} and record.next_retry_ts <= now:
-                due.append(record)
-        return due
+            entry_tail = (next(self._seq), record.job.job_id, record.version)
+            if record.status == JobStatus.PENDING:
+                self._ready.append((*record.order_key(), *entry_tail))
+            elif record.status in RETRYABLE_STATUSES:
+                self._retry.append((record.next_retry_ts, *entry_tail))
+            elif record.status in IN_FLIGHT_STATUSES and record.deadline_ts != math.inf:
+                self._deadlines.append((record.deadline_ts, *entry_tail))
+        for heap in (self._ready, self._retry, self._deadlines):
+            heapq.heapify(heap)
+
+    def _set_status(self, record: JobRecord, status: JobStatus):
+        job_id = record.job.job_id
+        self._by_status[record.status].pop(job_id, None)
+        self._due_retry.pop(job_id, None)
+        record.status = status
+        record.version += 1
+        self._index(record)
+
+    def _index(self, record: JobRecord):
+        job_id = record.job.job_id
+        self._by_status[record.status][job_id] = None
+        if self._bulk:
+            return
+        if record.status == JobStatus.PENDING:
+            self._push(self._ready, record.order_key(), record)
+        elif record.status in RETRYABLE_STATUSES:
+            self._push(self._retry, (record.next_retry_ts,), record)
+        elif record.status in IN_FLIGHT_STATUSES and record.deadline_ts != math.inf:
+            self._push(self._deadlines, (record.deadline_ts,), record)
+
+    def _promote_due_retries(self, now: float):
+        while self._retry and self._retry[0][0] <= now:
+            record = self._live(heapq.heappop(self._retry))
+            if record is None:
+                continue
+            self._due_retry[record.job.job_id] = None
+            self._push(self._ready, record.order_key(), record)
+
+    def _push(self, heap: List[tuple], key: tuple, record: JobRecord):
+        heapq.heappush(heap, (*key, next(self._seq), record.job.job_id, record.version))
+        if len(heap) > _COMPACT_MIN_SIZE and len(heap) > _COMPACT_RATIO * len(self.jobs_by_id):
+            heap[:] = [entry for entry in heap if self._live(entry) is not None]
+            heapq.heapify(heap)
+
+    def _live(self, entry: tuple) -> Optional[JobRecord]:
+        """Запись элемента кучи, если он не устарел."""
+        job_id, version = entry[-2], entry[-1]
+        record = self.jobs_by_id.get(job_id)
+        if record is None or record.version != version:
+            return None
+        return record
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Спекулятивное исполнение медленных job'ов.
+
+Координатор копит распределение runtime_ms job'ов каждой задачи. Если job
+в полёте дольше порога (перцентиль распределения, умноженный на запас),
+его копия отправляется другому воркеру; берётся первый пришедший результат,
+проигравшей копии уходит JOB_CANCEL. Так хвост задачи с большим fan-out
+ограничен порогом, а не полным timeout_seconds медленного воркера.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional
+
+DEFAULT_WINDOW = 256
+
+
+class RuntimeDistribution:
+    """Скользящее окно runtime job'ов одной задачи и перцентили по нему."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._sorted: Optional[List[float]] = None
+
+    def observe(self, runtime_ms: float) -> None:
+        self._samples.append(runtime_ms)
+        self._sorted = None
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, fraction: float) -> float:
+        """Значение перцентиля `fraction` (0..1) методом ближайшего ранга."""
+        if not self._samples:
+            raise ValueError("No runtime samples")
+        if self._sorted is None:
+            self._sorted = sorted(self._samples)
+        rank = max(1, math.ceil(fraction * len(self._sorted)))
+        return self._sorted[rank - 1]
+
+
+@dataclass
+class SpeculationPolicy:
+    """Когда запускать копию job'а.
+
+    percentile — какой перцентиль runtime задачи считать нормой;
+    multiplier — во сколько раз job должен его превысить;
+    min_samples — сколько результатов задачи нужно, прежде чем доверять распределению;
+    min_delay_s — нижняя граница порога, чтобы не дублировать job'ы по миллисекундным шумам.
+    """
+
+    percentile: float = 0.95
+    multiplier: float = 1.5
+    min_samples: int = 5
+    min_delay_s: float = 0.05
+
+    def threshold_s(self, runtimes: Optional[RuntimeDistribution]) -> Optional[float]:
+        """Через сколько секунд после отправки запускать копию; None — рано судить."""
+        if runtimes is None or len(runtimes) < self.min_samples:
+            return None
+        return max(self.min_delay_s, runtimes.percentile(self.percentile) * self.multiplier / 1000.0)
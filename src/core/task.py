@@ -3,6 +3,7 @@
 Описание задач и их декларативного представления
 """
 
+import asyncio
 import logging
 import os
 import time
@@ -10,10 +11,23 @@ import uuid
 from collections import deque
 from dataclasses import asdict, dataclass, field
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
 
+from core import kernels, matrix
+from core.chunking import (
+    AdaptiveChunker,
+    as_chunk_source,
+    handler_key,
+    iter_chunks,
+    job_items,
+    materialize,
+)
+from core.combiner import ResultAccumulator
 from core.job import Job, JobResult, JobStatus, TaskStatus
 
+if TYPE_CHECKING:  # pragma: no cover
+    from core.backends import ExecutionBackend
+
 
 def _default_privacy_config() -> Dict[str, Any]:
     """Возвращает настройки приватности по умолчанию"""
@@ -84,9 +98,9 @@ class MapReduceTask:
 class MatrixOpsTask:
     """Задача операций с матрицами"""
     operation: str  # "multiply", "add", "transpose", "inverse", "decompose"
-    matrix_a: List[List[float]]
-    matrix_b: Optional[List[List[float]]] = None
-    params: Dict[str, Any] = None
+    matrix_a: Any  # вложенные списки или numpy.ndarray
+    matrix_b: Optional[Any] = None
+    params: Dict[str, Any] = None  # decompose: {"method": "lu" | "qr" | "svd" | "cholesky"}
 
 @dataclass
 class MLInferenceTask:
@@ -145,6 +159,8 @@ class Task:
         result['task_type'] = self.task_type.value
         result['requirements'] = asdict(self.requirements)
         result['config'] = asdict(self.config)
+        # Snapshot уходит по сети как JSON: enum приоритета сериализуем значением
+        result['config']['priority'] = getattr(self.config.priority, 'value', self.config.priority)
         result['privacy'] = self.privacy or _default_privacy_config()
         result['code_ref'] = self.code_ref or {}
         result['input_data'] = self.input_data
@@ -161,6 +177,9 @@ class Task:
     @classmethod
     def from_dict(cls, data: Dict) -> 'Task':
         """Создает задачу из словаря"""
+        # Не мутируем исходный словарь: snapshot может переиспользоваться при ретраях
+        data = dict(data)
+        data['config'] = dict(data['config'])
         # Преобразуем enum значения
         data['task_type'] = TaskType(data['task_type'])
         data['config']['priority'] = TaskPriority(data['config']['priority'])
@@ -318,7 +337,12 @@ class Task:
             "matrix_b": matrix_b,
             "operation": operation,
         }
-        parallel = {"mode": "map"}  # базовый вариант; можно совершенствовать шардинг по блокам
+        tile_size = kwargs.get('task_params', {}).get('tile_size')
+        if operation == 'multiply' and tile_size:
+            # Блочное умножение: один job на каждую тройку блоков (i, j, k)
+            parallel = {"mode": "tiled", "tile_size": tile_size}
+        else:
+            parallel = {"mode": "map"}
         task = cls.create_generic(
             owner_id=owner_id,
             code_ref=code_ref,
@@ -469,7 +493,7 @@ class Task:
         elif self.task_type == TaskType.MATRIX_OPS:
             if not self.matrix_ops:
                 errors.append("matrix_ops data is required")
-            elif not self.matrix_ops.matrix_a:
+            elif self.matrix_ops.matrix_a is None or len(self.matrix_ops.matrix_a) == 0:
                 errors.append("matrix_a cannot be empty")
         
         elif self.task_type == TaskType.ML_INFERENCE:
@@ -542,10 +566,37 @@ class Task:
         
         return base_price * multiplier * load_multiplier
 
+def _matrix_block(matrix_data: Any, row: int, col: int, size: int) -> Any:
+    """Блок size x size, начинающийся в (row, col): view для ndarray, срез для списков."""
+    if hasattr(matrix_data, 'ndim'):
+        return matrix_data[row:row + size, col:col + size]
+    return [line[col:col + size] for line in matrix_data[row:row + size]]
+
+
+# Ниже этого размера перемножение в цикле быстрее рекурсии
+_PRODUCT_LEAF_SIZE = 64
+
+
+def _range_product(lo: int, hi: int) -> int:
+    """Произведение lo * (lo + 1) * ... * (hi - 1) деревом произведений."""
+    if hi - lo <= _PRODUCT_LEAF_SIZE:
+        result = 1
+        for num in range(lo, hi):
+            result *= num
+        return result
+    mid = (lo + hi) // 2
+    return _range_product(lo, mid) * _range_product(mid, hi)
+
+
 class TaskExecutor:
     """Исполнитель задач"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        max_concurrent_jobs: Optional[int] = None,
+        backend: Optional['ExecutionBackend'] = None,
+        chunker: Optional[AdaptiveChunker] = None,
+    ):
         self.supported_functions = {
             'sum': self._sum_range,
             'product': self._product_range,
@@ -567,6 +618,13 @@ class TaskExecutor:
         self.logger = logging.getLogger(__name__)
         # Опционально назначаемый sandbox_executor для внешних code_ref
         self.sandbox_executor = None
+        # Сколько job'ов одной задачи исполняется одновременно.
+        # По умолчанию совпадает с NodeCapability.max_parallel_tasks (половина ядер).
+        self.max_concurrent_jobs = max(1, max_concurrent_jobs or (os.cpu_count() or 1) // 2)
+        # Бэкенд для CPU-bound builtin-обработчиков (None -> исполнение в event loop)
+        self.backend = backend
+        # История runtime по обработчикам для chunk_size="auto"
+        self.chunker = chunker or AdaptiveChunker()
 
     async def execute(self, task: Task) -> Dict:
         """Полный pipeline исполнения задачи с поддержкой privacy/verification."""
@@ -585,44 +643,32 @@ class TaskExecutor:
         for job in jobs:
             job.canonical_id = job.job_id
 
-        raw_results: List[JobResult] = []
-        job_queue = deque(jobs)
-
-        while job_queue:
-            job = job_queue.popleft()
-            if job.status == JobStatus.COMPLETED:
-                continue
+        concurrency = self._resolve_concurrency(prepared_task)
+        # Если ни privacy, ни verification не нужен полный список результатов,
+        # job'ы сворачиваются в аккумулятор по мере завершения
+        accumulator = None
+        if privacy_engine.streams_results and not verification_engine.needs_all_results:
+            accumulator = self.create_accumulator(prepared_task)
+        raw_results = await self._dispatch_jobs(prepared_task, jobs, privacy_engine, concurrency, accumulator)
 
-            job.status = JobStatus.ASSIGNED
-            job.attempts += 1
-            job.status = JobStatus.RUNNING
-
-            filtered_job = await privacy_engine.before_job_assign(prepared_task, job)
-            job_result = await self._safe_execute_job(prepared_task, filtered_job)
-            job_result = await privacy_engine.after_job_result(prepared_task, job_result)
-            raw_results.append(job_result)
+        replica_jobs = await verification_engine.select_jobs_for_replication(jobs, prepared_task)
+        replica_slots = asyncio.Semaphore(concurrency)
 
-            if job_result.success:
-                job.status = JobStatus.COMPLETED
-                job.assigned_worker = job_result.worker_id
-            else:
-                job.status = JobStatus.FAILED
-                if job.attempts < job.max_attempts:
-                    job_queue.append(job)
-                else:
-                    self.logger.warning("Job %s exhausted retries", job.job_id)
+        async def run_replica(replica: Job) -> JobResult:
+            async with replica_slots:
+                replica.status = JobStatus.RUNNING
+                filtered_replica = await privacy_engine.before_job_assign(prepared_task, replica)
+                replica_result = await self._safe_execute_job(prepared_task, filtered_replica)
+                replica_result.metadata.setdefault('replica', True)
+                return await privacy_engine.after_job_result(prepared_task, replica_result)
 
-        replica_jobs = await verification_engine.select_jobs_for_replication(jobs, prepared_task)
-        for replica in replica_jobs:
-            replica.status = JobStatus.RUNNING
-            filtered_replica = await privacy_engine.before_job_assign(prepared_task, replica)
-            replica_result = await self._safe_execute_job(prepared_task, filtered_replica)
-            replica_result.metadata.setdefault('replica', True)
-            replica_result = await privacy_engine.after_job_result(prepared_task, replica_result)
-            raw_results.append(replica_result)
+        raw_results.extend(await asyncio.gather(*(run_replica(replica) for replica in replica_jobs)))
 
         verification = await verification_engine.verify_job_results(prepared_task, raw_results)
-        final_result = await privacy_engine.finalize_task_result(prepared_task, verification.valid_results)
+        if accumulator is not None:
+            final_result = accumulator.result()
+        else:
+            final_result = await privacy_engine.finalize_task_result(prepared_task, verification.valid_results)
 
         if all(job.status == JobStatus.COMPLETED for job in jobs) and not verification.invalid_results:
             prepared_task.status = TaskStatus.COMPLETED
@@ -642,9 +688,84 @@ class TaskExecutor:
             response['invalid_results'] = [res.job_id for res in verification.invalid_results]
         return response
 
+    def _resolve_concurrency(self, task: Task) -> int:
+        """Лимит одновременно исполняемых job'ов: parallel.max_in_flight или настройка executor'а."""
+        override = (task.parallel or {}).get('max_in_flight')
+        if override:
+            return max(1, int(override))
+        return self.max_concurrent_jobs
+
+    async def _dispatch_jobs(
+        self,
+        task: Task,
+        jobs: List[Job],
+        privacy_engine,
+        concurrency: int,
+        accumulator: Optional[ResultAccumulator] = None,
+    ) -> List[JobResult]:
+        """Исполняет job'ы с ограниченной параллельностью, сохраняя ретраи и privacy-хуки.
+
+        Результаты возвращаются в порядке индексов job'ов, чтобы агрегация map-задач
+        не зависела от порядка завершения. С accumulator результаты сворачиваются
+        сразу по приходу и в возвращаемый список не попадают.
+        """
+        raw_results: List[JobResult] = []
+        job_queue = deque(jobs)
+        in_flight: Dict[asyncio.Future, Job] = {}
+
+        async def run_job(job: Job) -> JobResult:
+            filtered_job = await privacy_engine.before_job_assign(task, job)
+            job_result = await self._safe_execute_job(task, filtered_job)
+            return await privacy_engine.after_job_result(task, job_result)
+
+        try:
+            while job_queue or in_flight:
+                while job_queue and len(in_flight) < concurrency:
+                    job = job_queue.popleft()
+                    if job.status == JobStatus.COMPLETED:
+                        continue
+                    job.status = JobStatus.ASSIGNED
+                    job.attempts += 1
+                    job.status = JobStatus.RUNNING
+                    in_flight[asyncio.ensure_future(run_job(job))] = job
+                if not in_flight:
+                    break
+
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    job = in_flight.pop(future)
+                    job_result = future.result()
+                    if accumulator is not None:
+                        accumulator.add(job_result, index=job.index)
+                    else:
+                        raw_results.append(job_result)
+                    if job_result.success:
+                        job.status = JobStatus.COMPLETED
+                        job.assigned_worker = job_result.worker_id
+                    else:
+                        job.status = JobStatus.FAILED
+                        if job.attempts < job.max_attempts:
+                            job_queue.append(job)
+                        else:
+                            self.logger.warning("Job %s exhausted retries", job.job_id)
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+        order = {job.job_id: job.index for job in jobs}
+        raw_results.sort(key=lambda res: order.get(res.job_id, 0))
+        return raw_results
+
     def split_task_to_jobs(self, task: Task) -> List[Job]:
         """Разбивает задачу на подзадачи."""
-        jobs: List[Job] = []
+        return list(self.iter_task_jobs(task))
+
+    def iter_task_jobs(self, task: Task) -> Iterator[Job]:
+        """Лениво выдаёт job'ы задачи.
+
+        Чанки map-задач — это ChunkView над общим буфером задачи: данные не
+        копируются до исполнения job'а или отправки его по сети.
+        """
         parallel = task.parallel or {}
         parallel_mode = parallel.get('mode')
 
@@ -663,15 +784,14 @@ class TaskExecutor:
                     }
                 )
                 job.canonical_id = job.job_id
-                jobs.append(job)
-                return jobs
+                yield job
+                return
 
             if mode in ("map", "map_reduce"):
-                data = task.input_data or []
-                chunk_size = parallel.get('chunk_size') or len(data) or 1
+                source = as_chunk_source([] if task.input_data is None else task.input_data)
+                chunk_size = self._chunk_sizer(task, {'code_ref': task.code_ref}, task.task_type.value, parallel.get('chunk_size'), len(source))
                 index = 0
-                for offset in range(0, len(data), chunk_size):
-                    chunk = data[offset:offset + chunk_size]
+                for chunk in iter_chunks(source, chunk_size):
                     job = Job(
                         job_id=f"{task.task_id}:{index}",
                         task_id=task.task_id,
@@ -683,12 +803,15 @@ class TaskExecutor:
                             'parallel_mode': mode
                         }
                     )
+                    if mode == "map_reduce":
+                        # Воркер сворачивает свой чанк сам и отдаёт один скаляр
+                        job.input_payload['combiner'] = parallel.get('combiner', True)
                     job.canonical_id = job.job_id
-                    jobs.append(job)
+                    yield job
                     index += 1
-                if not jobs:
-                    jobs.append(self._create_single_job(task))
-                return jobs
+                if not index:
+                    yield self._create_single_job(task)
+                return
         if task.task_type == TaskType.RANGE_REDUCE and task.range_reduce:
             chunk_size = max(1, task.range_reduce.chunk_size)
             index = 0
@@ -708,19 +831,39 @@ class TaskExecutor:
                     }
                 )
                 job.canonical_id = job.job_id
-                jobs.append(job)
+                yield job
                 index += 1
                 current = end
-            if not jobs:
-                jobs.append(self._create_single_job(task))
-            return jobs
+            if not index:
+                yield self._create_single_job(task)
+            return
 
-        if task.task_type == TaskType.MAP and task.map and task.map.data:
-            data = list(task.map.data)
-            chunk_size = max(1, (task.map.params or {}).get('chunk_size', len(data)))
-            index = 0
-            for offset in range(0, len(data), chunk_size):
-                chunk = data[offset:offset + chunk_size]
+        if task.task_type == TaskType.MATRIX_OPS and task.matrix_ops:
+            if parallel_mode == "tiled" and task.matrix_ops.operation == 'multiply':
+                yield from self._iter_matrix_tiles(task, int(parallel.get('tile_size') or 0))
+                return
+            # Матрицы передаются в payload как есть (ndarray не конвертируется в списки)
+            job = Job(
+                job_id=f"{task.task_id}:0",
+                task_id=task.task_id,
+                index=0,
+                task_type=TaskType.MATRIX_OPS.value,
+                input_payload={
+                    'operation': task.matrix_ops.operation,
+                    'matrix_a': task.matrix_ops.matrix_a,
+                    'matrix_b': task.matrix_ops.matrix_b,
+                    'params': task.matrix_ops.params or {},
+                }
+            )
+            job.canonical_id = job.job_id
+            yield job
+            return
+
+        if task.task_type == TaskType.MAP and task.map and task.map.data is not None:
+            source = as_chunk_source(task.map.data)
+            explicit = (task.map.params or {}).get('chunk_size')
+            chunk_size = self._chunk_sizer(task, {'function': task.map.function}, TaskType.MAP.value, explicit, len(source))
+            for index, chunk in enumerate(iter_chunks(source, chunk_size)):
                 job = Job(
                     job_id=f"{task.task_id}:{index}",
                     task_id=task.task_id,
@@ -733,12 +876,57 @@ class TaskExecutor:
                     }
                 )
                 job.canonical_id = job.job_id
-                jobs.append(job)
-                index += 1
-            return jobs
+                yield job
+            if len(source):
+                return
+
+        yield self._create_single_job(task)
 
-        jobs.append(self._create_single_job(task))
-        return jobs
+    def _chunk_sizer(self, task: Task, payload: Dict[str, Any], task_type: str, explicit: Any, total: int) -> Any:
+        """Фиксированный chunk_size либо адаптивный (chunk_size="auto" или только target_job_ms).
+
+        В адаптивном режиме размер считается заново для каждого чанка, поэтому при
+        ленивом iter_task_jobs он учитывает runtime уже завершившихся job'ов.
+        """
+        target_job_ms = (task.parallel or {}).get('target_job_ms')
+        if explicit != "auto" and (explicit or not target_job_ms):
+            return max(1, int(explicit or total or 1))
+        key = handler_key(payload, task_type)
+        min_jobs = self._resolve_concurrency(task)
+        return lambda remaining: self.chunker.chunk_size(key, remaining, total, target_job_ms=target_job_ms, min_jobs=min_jobs)
+
+    def _iter_matrix_tiles(self, task: Task, tile_size: int) -> Iterator[Job]:
+        """Режет A (n x k) и B (k x m) на блоки: job (i, j, k) считает A[i, k] @ B[k, j].
+
+        Для ndarray блоки — это view без копирования. Частичные произведения
+        с одинаковыми (i, j) суммируются в combine_job_results.
+        """
+        mx = task.matrix_ops
+        if mx.matrix_b is None:
+            raise ValueError("Matrix B is required for multiplication")
+        rows, inner, cols = len(mx.matrix_a), len(mx.matrix_b), len(mx.matrix_b[0])
+        tile = max(1, tile_size or max(rows, inner, cols))
+        index = 0
+        for i in range(0, rows, tile):
+            for j in range(0, cols, tile):
+                for k in range(0, inner, tile):
+                    job = Job(
+                        job_id=f"{task.task_id}:{index}",
+                        task_id=task.task_id,
+                        index=index,
+                        task_type=TaskType.MATRIX_OPS.value,
+                        input_payload={
+                            'operation': 'multiply',
+                            'matrix_a': _matrix_block(mx.matrix_a, i, k, tile),
+                            'matrix_b': _matrix_block(mx.matrix_b, k, j, tile),
+                            'params': mx.params or {},
+                            'tile': [i, j, k],
+                        },
+                        metadata={'tile': [i, j, k]}
+                    )
+                    job.canonical_id = job.job_id
+                    yield job
+                    index += 1
 
     def _create_single_job(self, task: Task) -> Job:
         """Создает единичный job для задач без шардинга."""
@@ -754,7 +942,15 @@ class TaskExecutor:
 
     async def _safe_execute_job(self, task: Task, job: Job) -> JobResult:
         try:
-            return await self._execute_job(task, job)
+            started = time.perf_counter()
+            job_result = await self._execute_job(task, job)
+            if job_result.success:
+                self.chunker.observe(
+                    handler_key(job.input_payload, job.task_type),
+                    job_items(job.input_payload),
+                    (time.perf_counter() - started) * 1000,
+                )
+            return job_result
         except Exception as exc:
             self.logger.error("Job %s failed with exception: %s", job.job_id, exc)
             return JobResult(
@@ -774,8 +970,8 @@ class TaskExecutor:
         if job.metadata.get('replica'):
             worker_id = f"{worker_id}-replica-{job.metadata.get('replica_index', 0)}"
 
-        # Универсальный generic путь по code_ref
-        if task.task_type == TaskType.GENERIC:
+        # Универсальный generic путь по code_ref (в т.ч. чанки типизированных задач после split)
+        if task.task_type == TaskType.GENERIC or 'code_ref' in payload:
             from core.generic_handlers import execute_generic
             result = await execute_generic(task, job, self)
             return JobResult(
@@ -791,37 +987,51 @@ class TaskExecutor:
         if job.task_type == TaskType.RANGE_REDUCE.value:
             start_val = payload.get('start', task.range_reduce.start if task.range_reduce else 0)
             end_val = payload.get('end', task.range_reduce.end if task.range_reduce else 0)
+            operation = payload.get('operation', 'sum')
             range_task = RangeReduceTask(
                 start=start_val,
                 end=end_val,
-                operation=payload.get('operation', 'sum'),
+                # Для average job отдаёт частичную сумму: combine делит её на общий count
+                operation='sum' if operation == 'average' else operation,
                 chunk_size=payload.get('step', task.range_reduce.chunk_size if task.range_reduce else 1)
             )
-            result = self._execute_range_reduce(range_task)
+            result = await self._run_builtin('range_reduce', range_task)
             metadata = {'count': max(0, end_val - start_val)}
         elif job.task_type == TaskType.MAP.value:
-            data_payload = payload.get('data')
-            if not data_payload and task.map:
+            data_payload = materialize(payload.get('data'))
+            if (data_payload is None or len(data_payload) == 0) and task.map:
                 data_payload = task.map.data
             map_task = MapTask(
-                data=data_payload or [],
+                data=data_payload if data_payload is not None else [],
                 function=payload.get('function', 'increment'),
                 params=payload.get('params', {})
             )
-            result = self._execute_map(map_task)
+            result = await self._run_builtin('map', map_task)
             metadata = {'chunk_size': len(map_task.data)}
         elif job.task_type == TaskType.MAP_REDUCE.value:
-            data_payload = payload.get('data')
-            if not data_payload and task.map_reduce:
+            data_payload = materialize(payload.get('data'))
+            if (data_payload is None or len(data_payload) == 0) and task.map_reduce:
                 data_payload = task.map_reduce.data
             mr_task = MapReduceTask(
-                data=data_payload or [],
+                data=data_payload if data_payload is not None else [],
                 map_function=payload.get('map_function', 'x'),
                 reduce_function=payload.get('reduce_function', 'sum'),
                 params=payload.get('params', {})
             )
-            result = self._execute_map_reduce(mr_task)
+            result = await self._run_builtin('map_reduce', mr_task)
             metadata = {'chunk_size': len(mr_task.data)}
+        elif job.task_type == TaskType.MATRIX_OPS.value and 'matrix_a' in payload:
+            mx_task = MatrixOpsTask(
+                operation=payload.get('operation', ''),
+                matrix_a=payload['matrix_a'],
+                matrix_b=payload.get('matrix_b'),
+                params=payload.get('params', {})
+            )
+            result = await self._run_builtin('matrix_ops', mx_task)
+            metadata = {}
+            if 'tile' in payload:
+                # Координаты блока едут вместе с результатом: JobResultPayload не несёт metadata
+                result = {'tile': payload['tile'], 'block': result}
         else:
             snapshot = payload['task_snapshot']
             cloned_task = Task.from_dict(snapshot)
@@ -846,103 +1056,42 @@ class TaskExecutor:
             metadata=metadata
         )
 
-    def combine_job_results(self, task: Task, job_results: List[JobResult]) -> Any:
-        """Агрегирует результаты job'ов в итоговый ответ."""
-        if not job_results:
-            return None
-
-        # Generic parallel aggregation
-        parallel_mode = (task.parallel or {}).get('mode')
-        if task.task_type == TaskType.GENERIC and parallel_mode:
-            if parallel_mode == "map":
-                aggregated: List[Any] = []
-                for result in job_results:
-                    if result.success and isinstance(result.output, list):
-                        aggregated.extend(result.output)
-                    elif result.success:
-                        aggregated.append(result.output)
-                return aggregated
-            if parallel_mode == "map_reduce":
-                values = [res.output for res in job_results if res.success]
-                # Если результаты — списки, разворачиваем
-                if values and all(isinstance(v, list) for v in values):
-                    flat = []
-                    for v in values:
-                        flat.extend(v)
-                    values = flat
-                reduce_fn = (task.code_ref or {}).get('reduce_function') or (task.map_reduce.reduce_function if task.map_reduce else None)
-                if reduce_fn in ('sum', 'average', 'min', 'max', 'product'):
-                    if reduce_fn == 'sum':
-                        return sum(values)
-                    if reduce_fn == 'product':
-                        val = 1
-                        for v in values:
-                            val *= v
-                        return val
-                    if reduce_fn == 'min':
-                        return min(values)
-                    if reduce_fn == 'max':
-                        return max(values)
-                    if reduce_fn == 'average':
-                        return sum(values) / len(values) if values else 0
-                return values[-1] if values else None
-
+    def create_accumulator(self, task: Task) -> ResultAccumulator:
+        """Подбирает режим инкрементальной агрегации под тип задачи."""
+        parallel = task.parallel or {}
+        parallel_mode = parallel.get('mode')
+        if task.task_type == TaskType.GENERIC and parallel_mode == "map":
+            return ResultAccumulator("concat")
+        if task.task_type == TaskType.GENERIC and parallel_mode == "map_reduce":
+            reduce_fn = (task.code_ref or {}).get('reduce_function') or (task.map_reduce.reduce_function if task.map_reduce else None)
+            return ResultAccumulator("reduce", reduce_fn)
+        if task.task_type == TaskType.MATRIX_OPS and parallel_mode == "tiled" and task.matrix_ops:
+            mx = task.matrix_ops
+            rows, inner, cols = len(mx.matrix_a), len(mx.matrix_b), len(mx.matrix_b[0])
+            tile = max(1, int(parallel.get('tile_size') or max(rows, inner, cols)))
+            expected = -(-rows // tile) * -(-cols // tile) * -(-inner // tile)
+            keep_arrays = hasattr(mx.matrix_a, 'ndim') or hasattr(mx.matrix_b, 'ndim')
+            return ResultAccumulator("tiles", shape=(rows, cols), expected_tiles=expected, keep_arrays=keep_arrays)
         if task.task_type == TaskType.RANGE_REDUCE:
-            operation = task.range_reduce.operation if task.range_reduce else 'sum'
-            values = [res.output for res in job_results if res.success]
-            if not values:
-                return None
-            if operation == 'sum':
-                return sum(values)
-            if operation == 'product':
-                result = 1
-                for value in values:
-                    result *= value
-                return result
-            if operation == 'min':
-                return min(values)
-            if operation == 'max':
-                return max(values)
-            if operation == 'average':
-                total = sum(values)
-                count = sum(res.metadata.get('count', 0) for res in job_results)
-                if not count:
-                    count = len(values)
-                return total / count if count else 0
-            return values[-1]
-
+            return ResultAccumulator("range", task.range_reduce.operation if task.range_reduce else 'sum')
         if task.task_type == TaskType.MAP:
-            aggregated: List[Any] = []
-            for result in job_results:
-                if result.success and isinstance(result.output, list):
-                    aggregated.extend(result.output)
-            return aggregated
-
+            return ResultAccumulator("concat", flatten_scalars=False)
         if task.task_type == TaskType.MAP_REDUCE:
-            values = []
-            for res in job_results:
-                if res.success:
-                    if isinstance(res.output, list):
-                        values.extend(res.output)
-                    else:
-                        values.append(res.output)
-            reduce_fn = task.map_reduce.reduce_function if task.map_reduce else None
-            if reduce_fn == 'sum':
-                return sum(values)
-            if reduce_fn == 'product':
-                result = 1
-                for v in values:
-                    result *= v
-                return result
-            if reduce_fn == 'count':
-                return len(values)
-            return values[-1] if values else None
-
+            return ResultAccumulator("reduce", task.map_reduce.reduce_function if task.map_reduce else None)
         # По умолчанию используем первый успешный результат
-        for result in job_results:
-            if result.success:
-                return result.output
-        return job_results[0].output
+        return ResultAccumulator("first")
+
+    def combine_job_results(self, task: Task, job_results: List[JobResult]) -> Any:
+        """Агрегирует результаты job'ов в итоговый ответ."""
+        if not job_results:
+            return None
+        accumulator = self.create_accumulator(task)
+        for job_result in job_results:
+            accumulator.add(job_result)
+        result = accumulator.result()
+        if result is None and accumulator.mode == "tiles":
+            self.logger.warning("Task %s: not all matrix tiles are available", task.task_id)
+        return result
 
     async def _execute_generic(self, task: Task, job: Job) -> Dict:
         """Совместимость: делегирует в core.generic_handlers.execute_generic"""
@@ -996,30 +1145,56 @@ class TaskExecutor:
     async def execute_single_job(self, task: Task, job: Job) -> JobResult:
         """Публичный метод для исполнения одного job'а вне основного пайплайна."""
         return await self._execute_job(task, job)
+
+    async def _run_builtin(self, handler: str, payload: Any) -> Any:
+        """Исполняет `_execute_<handler>` через бэкенд, если он готов принять job."""
+        if self.backend is not None and self.backend.accepts(handler, payload):
+            return await self.backend.run(handler, payload)
+        return getattr(self, f"_execute_{handler}")(payload)
+
+    async def close(self) -> None:
+        """Освобождает ресурсы бэкенда исполнения."""
+        if self.backend is not None:
+            await self.backend.close()
     
     def _execute_range_reduce(self, task: RangeReduceTask) -> Any:
-        """Выполняет range_reduce задачу"""
-        numbers = range(task.start, task.end)  # используем шаг 1 для корректной суммы/редукции
-        
+        """Выполняет range_reduce задачу без материализации диапазона.
+
+        sum/average/min/max считаются по формулам арифметической прогрессии за O(1),
+        product — деревом произведений (сбалансированное перемножение больших чисел).
+        """
+        start, end = task.start, task.end
+        count = max(0, end - start)
+
         if task.operation == 'sum':
-            return sum(numbers)
+            # Сумма Гаусса: n * (first + last) / 2 всегда целая
+            return (start + end - 1) * count // 2
         elif task.operation == 'product':
-            result = 1
-            for num in numbers:
-                result *= num
-            return result
+            if not count:
+                return 1
+            if start <= 0 < end:
+                return 0
+            magnitude = _range_product(min(abs(start), abs(end - 1)), max(abs(start), abs(end - 1)) + 1)
+            # Знак минус только у диапазонов целиком из отрицательных чисел нечётной длины
+            return -magnitude if end <= 0 and count % 2 else magnitude
         elif task.operation == 'average':
-            numbers_list = list(numbers)
-            return sum(numbers_list) / len(numbers_list) if numbers_list else 0
+            return (start + end - 1) / 2 if count else 0
         elif task.operation == 'min':
-            return min(numbers)
+            if not count:
+                raise ValueError("min() arg is an empty range")
+            return start
         elif task.operation == 'max':
-            return max(numbers)
+            if not count:
+                raise ValueError("max() arg is an empty range")
+            return end - 1
         else:
             raise ValueError(f"Unknown range_reduce operation: {task.operation}")
     
     def _execute_map(self, task: MapTask) -> List[Any]:
         """Выполняет map задачу"""
+        vectorized = kernels.vector_map(task.function, task.data, task.params)
+        if vectorized is not None:
+            return vectorized
         if task.function == 'square':
             return [x ** 2 for x in task.data]
         if task.function == 'x':
@@ -1038,6 +1213,9 @@ class TaskExecutor:
     
     def _execute_map_reduce(self, task: MapReduceTask) -> Any:
         """Выполняет map_reduce задачу"""
+        vectorized = kernels.vector_map_reduce(task.map_function, task.reduce_function, task.data, task.params)
+        if vectorized is not None:
+            return vectorized
         # Сначала применяем map
         mapped_data = self._execute_map(MapTask(
             data=task.data,
@@ -1058,16 +1236,18 @@ class TaskExecutor:
         else:
             raise ValueError(f"Unknown reduce function: {task.reduce_function}")
     
-    def _execute_matrix_ops(self, task: MatrixOpsTask) -> List[List[float]]:
-        """Выполняет операции с матрицами"""
+    def _execute_matrix_ops(self, task: MatrixOpsTask) -> Any:
+        """Выполняет операции с матрицами (NumPy/BLAS, без numpy — чистый Python)"""
+        if matrix.available():
+            return matrix.execute(task.operation, task.matrix_a, task.matrix_b, task.params)
         if task.operation == 'transpose':
             return [[task.matrix_a[j][i] for j in range(len(task.matrix_a))] for i in range(len(task.matrix_a[0]))]
         elif task.operation == 'add':
-            if not task.matrix_b:
+            if task.matrix_b is None:
                 raise ValueError("Matrix B is required for addition")
             return [[task.matrix_a[i][j] + task.matrix_b[i][j] for j in range(len(task.matrix_a[0]))] for i in range(len(task.matrix_a))]
         elif task.operation == 'multiply':
-            if not task.matrix_b:
+            if task.matrix_b is None:
                 raise ValueError("Matrix B is required for multiplication")
             result = [[0 for _ in range(len(task.matrix_b[0]))] for _ in range(len(task.matrix_a))]
             for i in range(len(task.matrix_a)):
@@ -1076,8 +1256,8 @@ class TaskExecutor:
                         result[i][j] += task.matrix_a[i][k] * task.matrix_b[k][j]
             return result
         else:
-            # Для сложных операций (inverse, decompose) нужны внешние библиотеки
-            raise NotImplementedError(f"Matrix operation {task.operation} not implemented")
+            # inverse/decompose требуют numpy
+            raise NotImplementedError(f"Matrix operation {task.operation} requires numpy")
     
     def _execute_ml_inference(self, task: MLInferenceTask) -> Dict:
         """Выполняет ML inference задачу"""
@@ -1150,10 +1330,10 @@ class TaskExecutor:
         return self._execute_matrix_ops(MatrixOpsTask('transpose', matrix))
     
     def _matrix_inverse(self, matrix):
-        raise NotImplementedError("Matrix inverse not implemented")
+        return self._execute_matrix_ops(MatrixOpsTask('inverse', matrix))
     
-    def _matrix_decompose(self, matrix):
-        raise NotImplementedError("Matrix decomposition not implemented")
+    def _matrix_decompose(self, matrix, method: str = 'lu'):
+        return self._execute_matrix_ops(MatrixOpsTask('decompose', matrix, params={'method': method}))
     
     def _pytorch_inference(self, model_path, input_data):
         return self._execute_ml_inference(MLInferenceTask(model_path, input_data, 'pytorch'))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Кэш дескрипторов задач для JOB_ASSIGN.
+
+Определение задачи (snapshot Task.to_dict) отправляется воркеру один раз и
+адресуется хэшем содержимого; следующие job'ы той же задачи несут только хэш.
+Воркер держит LRU уже декодированных Task, координатор — хэши, которые каждый
+воркер уже получил.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Optional, Set, Tuple, TypeVar
+
+from core.protocol import BINARY_CODEC
+
+# Ошибка JOB_RESULT: воркер не знает хэш (вытеснил из LRU или перезапущен)
+TASK_DESCRIPTOR_MISSING = "task_descriptor_missing"
+
+DEFAULT_CAPACITY = 64
+
+V = TypeVar("V")
+
+
+def descriptor_hash(snapshot: Dict[str, Any]) -> str:
+    """Хэш содержимого snapshot'а задачи."""
+    return hashlib.sha256(BINARY_CODEC.encode(snapshot)).hexdigest()
+
+
+class LRUCache(Generic[V]):
+    """Ограниченный по числу записей словарь с вытеснением давно не использованных."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._items: OrderedDict[str, V] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[V]:
+        value = self._items.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: V) -> None:
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.capacity:
+            self._items.popitem(last=False)
+
+    def pop(self, key: str) -> Optional[V]:
+        return self._items.pop(key, None)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class TaskDescriptorRegistry:
+    """Сторона координатора: хэш и snapshot задачи, и какие воркеры его уже знают."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self._descriptors: LRUCache[Tuple[str, Dict[str, Any]]] = LRUCache(capacity)
+        self._known: Dict[str, Set[str]] = {}
+
+    def describe(self, task: Any) -> Tuple[str, Dict[str, Any]]:
+        """(хэш, snapshot) задачи; snapshot и хэш считаются один раз на задачу."""
+        cached = self._descriptors.get(task.task_id)
+        if cached is None:
+            snapshot = task.to_dict()
+            cached = (descriptor_hash(snapshot), snapshot)
+            self._descriptors.put(task.task_id, cached)
+        return cached
+
+    def worker_has(self, worker_id: str, digest: str) -> bool:
+        return digest in self._known.get(worker_id, ())
+
+    def mark_sent(self, worker_id: str, digest: str) -> None:
+        self._known.setdefault(worker_id, set()).add(digest)
+
+    def forget(self, task_id: str) -> None:
+        """Задача завершена или отменена: её snapshot и отметки воркеров больше не нужны."""
+        cached = self._descriptors.pop(task_id)
+        if cached is None:
+            return
+        digest = cached[0]
+        for worker_id in list(self._known):
+            known = self._known[worker_id]
+            known.discard(digest)
+            if not known:
+                del self._known[worker_id]
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._descriptors
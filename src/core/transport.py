@@ -5,15 +5,33 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
 from abc import ABC, abstractmethod
-from typing import Awaitable, Callable, Dict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
 
-from core.protocol import MessageEnvelope
+from core.framing import DEFAULT_MAX_FRAME_SIZE, FrameTooLarge, encode_frame, read_frame
+from core.protocol import (
+    DEFAULT_CODECS,
+    JSON_CODEC,
+    Codec,
+    CodecStats,
+    MessageEnvelope,
+    codec_for_body,
+    get_codec,
+    negotiate_codec,
+)
 
 HandlerCallable = Callable[[MessageEnvelope], Awaitable[None]]
 logger = logging.getLogger(__name__)
 
+# Служебные кадры согласования кодека (всегда в JSON: его понимает любой пир)
+_HELLO = "hello"
+_HELLO_ACK = "hello_ack"
+# Кадр с несколькими конвертами подряд
+_BATCH = "batch"
+
 
 class Transport(ABC):
     @abstractmethod
@@ -40,3 +58,370 @@ class InMemoryTransport(Transport):
             await handler(message)
         else:
             logger.warning("Node %s is unreachable for message %s", dst_node, message.msg_id)
+
+
+def _resolve(futures: List[asyncio.Future]) -> None:
+    for future in futures:
+        if not future.done():
+            future.set_result(None)
+
+
+def _end_tick(conn: "_Connection") -> None:
+    conn.tick_writer = None
+
+
+class _Connection:
+    """Одно TCP-соединение с пиром: запись под локом, чтение в фоновой задаче."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.lock = asyncio.Lock()
+        self.reader_task: Optional[asyncio.Task] = None
+        # До ответа на hello пишем в JSON
+        self.codec: Codec = JSON_CODEC
+        # Конверты, ждущие сброса одним кадром, и future каждого отправителя
+        self.pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self.flush_handle: Optional[asyncio.Handle] = None
+        # Задача, писавшая напрямую в текущей итерации event loop
+        self.tick_writer: Optional[asyncio.Task] = None
+
+    @property
+    def closed(self) -> bool:
+        return self.writer.is_closing()
+
+    def close(self) -> None:
+        if self.reader_task and self.reader_task is not asyncio.current_task():
+            self.reader_task.cancel()
+        if self.flush_handle:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        for _, future in self.pending:
+            if not future.done():
+                future.set_exception(ConnectionError("Connection closed before batch was flushed"))
+        self.pending = []
+        self.writer.close()
+
+
+class TcpTransport(Transport):
+    """Транспорт поверх постоянных TCP-соединений.
+
+    На каждого пира держится одно долгоживущее соединение, по которому в обе
+    стороны идут кадры «длина + тело конверта». Соединение мультиплексируется:
+    адресат определяется по dst_node внутри конверта. Входящие соединения
+    используются для ответов узлам, чей адрес не известен. При обрыве
+    соединение переоткрывается с экспоненциальной задержкой.
+
+    Открывающая сторона первым кадром шлёт hello со списком своих кодеков,
+    принимающая отвечает выбранным; с этого момента обе стороны пишут в нём.
+    Тела самоописывающие, поэтому кадры, отправленные до ответа, тоже читаются.
+
+    Конверты к одному пиру коалесцируются: когда к соединению одновременно
+    пишут несколько задач, send() ставит конверт в очередь, и всё, что
+    накопилось за batch_flush_latency секунд (при 0 — за текущую итерацию
+    event loop) или до batch_max_messages штук, уходит одним кадром. send()
+    возвращается после записи своего кадра, так что обратное давление и ошибки
+    соединения видны отправителю как раньше. batch_max_messages=1 отключает
+    батчинг.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        max_frame_size: int = DEFAULT_MAX_FRAME_SIZE,
+        connect_retries: int = 5,
+        backoff_initial: float = 0.05,
+        backoff_max: float = 2.0,
+        codecs: Sequence[str] = DEFAULT_CODECS,
+        batch_max_messages: int = 64,
+        batch_flush_latency: float = 0.0,
+    ):
+        self.host = host
+        self.port = port
+        self.max_frame_size = max_frame_size
+        self.connect_retries = connect_retries
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.codecs = tuple(get_codec(name).name for name in codecs)
+        self.batch_max_messages = max(1, batch_max_messages)
+        self.batch_flush_latency = batch_flush_latency
+        self._handlers: Dict[str, HandlerCallable] = {}
+        self._addresses: Dict[str, Tuple[str, int]] = {}
+        self._connections: Dict[str, _Connection] = {}
+        self._all_connections: Set[_Connection] = set()
+        self._connect_locks: Dict[Tuple[str, int], asyncio.Lock] = {}
+        self._dispatch_tasks: Set[asyncio.Task] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.stats = {
+            "connections_opened": 0,
+            "reconnects": 0,
+            "messages_sent": 0,
+            "messages_received": 0,
+            "frames_sent": 0,
+            "frames_received": 0,
+        }
+        self.codec_stats: Dict[str, CodecStats] = {}
+
+    def register_handler(self, node_id: str, handler: HandlerCallable) -> None:
+        self._handlers[node_id] = handler
+
+    def add_peer(self, node_id: str, host: str, port: int) -> None:
+        """Адресная книга: куда подключаться для отправки node_id."""
+        self._addresses[node_id] = (host, port)
+
+    def codec_summary(self) -> Dict[str, Dict[str, float]]:
+        """Время кодирования/декодирования и размер на сообщение по кодекам."""
+        return {name: stats.summary() for name, stats in self.codec_stats.items()}
+
+    async def start(self) -> None:
+        """Начинает принимать входящие соединения (port=0 — выбрать свободный)."""
+        self._server = await asyncio.start_server(self._on_inbound, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("TcpTransport listening on %s:%s", self.host, self.port)
+
+    async def close(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for conn in list(self._all_connections):
+            conn.close()
+        for task in list(self._dispatch_tasks):
+            task.cancel()
+        self._all_connections.clear()
+        self._connections.clear()
+
+    async def send(self, dst_node: str, message: MessageEnvelope) -> None:
+        handler = self._handlers.get(dst_node)
+        if handler:
+            # Узел в этом же процессе: без сети
+            await handler(message)
+            return
+        for attempt in range(2):
+            conn = await self._connection_for(dst_node)
+            if conn is None:
+                logger.warning("Node %s is unreachable for message %s", dst_node, message.msg_id)
+                return
+            try:
+                if self._should_batch(conn):
+                    await self._enqueue(conn, message.to_dict())
+                else:
+                    frame = self._encode(conn.codec, message.to_dict())
+                    async with conn.lock:
+                        conn.writer.write(frame)
+                        await conn.writer.drain()
+                    self.stats["frames_sent"] += 1
+                self.stats["messages_sent"] += 1
+                return
+            except (ConnectionError, OSError) as exc:
+                logger.warning("Connection to %s lost while sending %s: %s", dst_node, message.msg_id, exc)
+                self._drop_connection(conn)
+                if attempt:
+                    raise
+                self.stats["reconnects"] += 1
+
+    def _should_batch(self, conn: _Connection) -> bool:
+        """Батчим, только когда в этой итерации loop к пиру уже пишет другая задача.
+
+        Последовательный отправитель (одна задача, await send подряд) пишет
+        напрямую и не платит лишнюю итерацию; конкурентная раздача из многих
+        задач начиная со второго send копится в пачку.
+        """
+        if self.batch_max_messages <= 1:
+            return False
+        if conn.pending or conn.flush_handle is not None:
+            return True
+        task = asyncio.current_task()
+        if conn.tick_writer is None:
+            conn.tick_writer = task
+            asyncio.get_running_loop().call_soon(_end_tick, conn)
+            return False
+        return conn.tick_writer is not task
+
+    async def _enqueue(self, conn: _Connection, value: Dict[str, Any]) -> None:
+        future = asyncio.get_running_loop().create_future()
+        conn.pending.append((value, future))
+        if len(conn.pending) >= self.batch_max_messages:
+            self._flush(conn)
+        elif conn.flush_handle is None:
+            loop = asyncio.get_running_loop()
+            if self.batch_flush_latency > 0:
+                conn.flush_handle = loop.call_later(self.batch_flush_latency, self._flush, conn)
+            else:
+                conn.flush_handle = loop.call_soon(self._flush, conn)
+        await future
+
+    def _flush(self, conn: _Connection) -> None:
+        if conn.flush_handle:
+            conn.flush_handle.cancel()
+            conn.flush_handle = None
+        batch, conn.pending = conn.pending, []
+        if not batch:
+            return
+        # Запись синхронная: кадры пачки не перемежаются с другими и уходят в порядке очереди
+        try:
+            groups = self._encode_batch(conn.codec, batch)
+            for frame, _ in groups:
+                conn.writer.write(frame)
+        except Exception as exc:
+            # flush идёт из колбэка event loop: ошибку получают отправители
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        self.stats["frames_sent"] += len(groups)
+        futures = [future for _, futures in groups for future in futures]
+        transport = conn.writer.transport
+        if transport.get_write_buffer_size() > transport.get_write_buffer_limits()[1]:
+            # Буфер сокета переполнен: отправители ждут drain, как при прямой записи
+            asyncio.ensure_future(self._drain_then_resolve(conn, futures))
+        else:
+            _resolve(futures)
+
+    async def _drain_then_resolve(self, conn: _Connection, futures: List[asyncio.Future]) -> None:
+        try:
+            async with conn.lock:
+                await conn.writer.drain()
+        except (ConnectionError, OSError) as exc:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        _resolve(futures)
+
+    def _encode_batch(
+        self, codec: Codec, batch: List[Tuple[Dict[str, Any], asyncio.Future]]
+    ) -> List[Tuple[bytes, List[asyncio.Future]]]:
+        try:
+            value = batch[0][0] if len(batch) == 1 else {_BATCH: [item for item, _ in batch]}
+            return [(self._encode(codec, value), [future for _, future in batch])]
+        except FrameTooLarge as exc:
+            if len(batch) == 1:
+                # Слишком большой конверт отклоняется, остальные из пачки уходят
+                batch[0][1].set_exception(exc)
+                return []
+            middle = len(batch) // 2
+            return self._encode_batch(codec, batch[:middle]) + self._encode_batch(codec, batch[middle:])
+
+    async def _connection_for(self, dst_node: str) -> Optional[_Connection]:
+        conn = self._connections.get(dst_node)
+        if conn and not conn.closed:
+            return conn
+        address = self._addresses.get(dst_node)
+        if address is None:
+            return None
+        # Один connect на адрес, даже если send'ов много одновременно
+        lock = self._connect_locks.setdefault(address, asyncio.Lock())
+        async with lock:
+            conn = self._connections.get(dst_node)
+            if conn and not conn.closed:
+                return conn
+            for other, other_conn in self._connections.items():
+                if self._addresses.get(other) == address and not other_conn.closed:
+                    self._connections[dst_node] = other_conn
+                    return other_conn
+            conn = await self._open_connection(address)
+            self._connections[dst_node] = conn
+            return conn
+
+    async def _open_connection(self, address: Tuple[str, int]) -> _Connection:
+        delay = self.backoff_initial
+        for attempt in range(self.connect_retries + 1):
+            try:
+                reader, writer = await asyncio.open_connection(*address)
+                break
+            except OSError as exc:
+                if attempt == self.connect_retries:
+                    raise ConnectionError(f"Cannot connect to {address[0]}:{address[1]}: {exc}") from exc
+                logger.debug("Connect to %s failed (%s), retry in %.2fs", address, exc, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.backoff_max)
+        self.stats["connections_opened"] += 1
+        conn = self._attach(reader, writer)
+        conn.writer.write(self._encode(JSON_CODEC, {_HELLO: {"codecs": list(self.codecs)}}))
+        return conn
+
+    def _encode(self, codec: Codec, value: Any) -> bytes:
+        started = time.perf_counter()
+        body = codec.encode(value)
+        frame = encode_frame(body, self.max_frame_size)
+        self.codec_stats.setdefault(codec.name, CodecStats()).record_encode(time.perf_counter() - started, len(body))
+        return frame
+
+    def _decode(self, body: bytes) -> Any:
+        codec = codec_for_body(body)
+        started = time.perf_counter()
+        value = codec.decode(body)
+        self.codec_stats.setdefault(codec.name, CodecStats()).record_decode(time.perf_counter() - started, len(body))
+        return value
+
+    async def _on_control(self, conn: _Connection, value: Dict[str, Any]) -> None:
+        if _HELLO in value:
+            chosen = negotiate_codec(self.codecs, value[_HELLO].get("codecs", []))
+            async with conn.lock:
+                conn.writer.write(self._encode(JSON_CODEC, {_HELLO_ACK: {"codec": chosen}}))
+                await conn.writer.drain()
+            conn.codec = get_codec(chosen)
+        else:
+            chosen = value[_HELLO_ACK].get("codec")
+            # Пир мог выбрать кодек, которого нет в нашем списке: остаёмся на JSON
+            conn.codec = get_codec(chosen) if chosen in self.codecs else JSON_CODEC
+        logger.debug("Connection codec negotiated: %s", conn.codec.name)
+
+    def _attach(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> _Connection:
+        conn = _Connection(reader, writer)
+        self._all_connections.add(conn)
+        conn.reader_task = asyncio.ensure_future(self._read_loop(conn))
+        return conn
+
+    async def _on_inbound(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._attach(reader, writer)
+
+    def _drop_connection(self, conn: _Connection) -> None:
+        conn.close()
+        self._all_connections.discard(conn)
+        for node_id in [node for node, known in self._connections.items() if known is conn]:
+            del self._connections[node_id]
+
+    async def _read_loop(self, conn: _Connection) -> None:
+        try:
+            while True:
+                body = await read_frame(conn.reader, self.max_frame_size)
+                if body is None:
+                    break
+                value = self._decode(body)
+                self.stats["frames_received"] += 1
+                if _HELLO in value or _HELLO_ACK in value:
+                    await self._on_control(conn, value)
+                    continue
+                for item in value[_BATCH] if _BATCH in value else (value,):
+                    self._receive(conn, MessageEnvelope.from_dict(item))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            raise
+        except FrameTooLarge as exc:
+            logger.error("%s, closing connection", exc)
+        except (ValueError, KeyError, TypeError) as exc:
+            logger.error("Malformed frame, closing connection: %s", exc)
+        finally:
+            self._drop_connection(conn)
+
+    def _receive(self, conn: _Connection, envelope: MessageEnvelope) -> None:
+        self.stats["messages_received"] += 1
+        # Ответы отправителю уходят по этому же соединению
+        known = self._connections.get(envelope.src_node)
+        if known is None or known.closed:
+            self._connections[envelope.src_node] = conn
+        self._dispatch(envelope)
+
+    def _dispatch(self, envelope: MessageEnvelope) -> None:
+        handler = self._handlers.get(envelope.dst_node)
+        if handler is None:
+            logger.warning("No local handler for node %s (message %s)", envelope.dst_node, envelope.msg_id)
+            return
+        # Хендлер может долго исполнять job: не блокируем чтение следующих кадров
+        task = asyncio.ensure_future(handler(envelope))
+        self._dispatch_tasks.add(task)
+        task.add_done_callback(self._dispatch_tasks.discard)
@@ -25,6 +25,9 @@ class VerificationResult:
 
 
 class VerificationEngine:
+    # Нужен ли verify_job_results полный список результатов (иначе executor агрегирует потоково)
+    needs_all_results = False
+
     async def select_jobs_for_replication(self, jobs: List[Job], task: Task) -> List[Job]:
         return []
 
@@ -45,6 +48,8 @@ class OffVerificationEngine(VerificationEngine):
 class BasicReplicationVerificationEngine(VerificationEngine):
     """Реплицирует задачи и сравнивает результаты."""
 
+    needs_all_results = True
+
     def __init__(self, replicas: int = 1):
         self.replicas = max(1, replicas)
 
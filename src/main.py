@@ -11,14 +11,16 @@ import signal
 import sys
 import os
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set
 from pathlib import Path
 
 # Импортируем наши модули
 from core.node import ComputeNode
 from core.task import Task, TaskExecutor, TaskType
 from core.job import TaskStatus
+from core.journal import StateJournal
 from core.credits import CreditManager
+from sandbox.bundle_cache import BundleCache
 from sandbox.execution import (
     SandboxExecutor,
     SandboxExecutorFactory,
@@ -40,6 +42,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Активная задача без завершения дольше этого срока считается зависшей
+TASK_STALL_TIMEOUT = 300
+
 class ComputeNetwork:
     """Основной класс вычислительной сети"""
     
@@ -58,12 +63,17 @@ class ComputeNetwork:
         # Координатору нужна ссылка на ReputationManager для записи penalties
         setattr(self.node, "reputation_manager", self.reputation_manager)
         self.pricing_engine = DynamicPricingEngine(self.create_pricing_config())
-        self.task_executor = TaskExecutor()
+        self.task_executor = TaskExecutor(
+            max_concurrent_jobs=self.node.capabilities.max_parallel_tasks,
+            # Общая с узлом история runtime: её пополняют результаты воркеров
+            chunker=self.node.job_executor.chunker,
+        )
         # Подключаем песочницу к executor для внешних code_ref
         self.task_executor.sandbox_executor = None
         self.sandbox_executor = SandboxExecutorFactory.create(
             self.get_sandbox_type(),
             self.get_sandbox_limits(),
+            **self.get_sandbox_process_options(),
         )
         self.task_executor.sandbox_executor = self.sandbox_executor
         
@@ -71,6 +81,21 @@ class ComputeNetwork:
         self.pending_tasks: Dict[str, Dict] = {}
         self.active_tasks: Dict[str, Dict] = {}
         
+        # Планировщик событийный: task_id попадает в очередь при подаче и при
+        # событиях, которые могут сделать назначение возможным
+        self._schedule_queue: asyncio.Queue = asyncio.Queue()
+        # Задачи, которые не удалось назначить: ждут смены пиров или освобождения мощностей
+        self._parked_tasks: Set[str] = set()
+        self._stall_timers: Dict[str, asyncio.TimerHandle] = {}
+        self.node.add_listener(self._on_node_event)
+        self.credit_manager.add_listener(self._on_credits_added)
+        
+        # Журнал задач и job'ов (state.directory в конфиге): переживает рестарт координатора
+        self.task_journal: Optional[StateJournal] = None
+        state_dir = self.config.get('state', {}).get('directory')
+        if state_dir:
+            self._recover_state(state_dir)
+        
         # Сетевое взаимодействие
         self.network_tasks = []
         
@@ -149,8 +174,47 @@ class ComputeNetwork:
             open_files=limits.get('open_files', 256),
             working_dir_quota_bytes=limits.get('temp_dir_size', 200 * 1024 * 1024),
             env=limits.get('env', {}),
+            stdout_max_bytes=limits.get('stdout_max_bytes', 16 * 1024 * 1024),
+            stderr_max_bytes=limits.get('stderr_max_bytes', 4 * 1024 * 1024),
+            spill_dir=sandbox_config.get('spill_dir'),
         )
 
+    def get_sandbox_process_options(self) -> Dict[str, Any]:
+        """Параметры process-песочницы: кэш бандлов (sandbox.bundle_cache) и тёплый режим"""
+        if self.get_sandbox_type() != SandboxType.PROCESS_ISOLATION:
+            return {}
+        options: Dict[str, Any] = {}
+        cache_config = self.config.get('sandbox', {}).get('bundle_cache', {})
+        if cache_config.get('enabled'):
+            options['bundle_cache'] = BundleCache(
+                root=cache_config.get('directory'),
+                quota_bytes=cache_config.get('quota_bytes', 512 * 1024 * 1024),
+            )
+        options.update(self.get_sandbox_pool_options())
+        return options
+
+    def get_sandbox_pool_options(self) -> Dict[str, Any]:
+        """Параметры тёплого режима process-песочницы: sandbox.fork_server или sandbox.pool; пусто — процесс на job"""
+        sandbox_config = self.config.get('sandbox', {})
+        fork_server_config = sandbox_config.get('fork_server', {})
+        if fork_server_config.get('enabled'):
+            return {'fork_server': True, 'preload': fork_server_config.get('preload')}
+        pool_config = sandbox_config.get('pool', {})
+        if not pool_config.get('size'):
+            return {}
+        limits = self.get_sandbox_limits()
+        return {
+            'pool_size': pool_config['size'],
+            'max_jobs_per_worker': pool_config.get('max_jobs_per_worker', 100),
+            'preload': pool_config.get('preload', []),
+            'pool_limits': SandboxLimits(
+                cpu_time_seconds=pool_config.get('cpu_time_seconds', 3600),
+                memory_bytes=pool_config.get('memory_bytes', 4 * 1024 * 1024 * 1024),
+                file_size_bytes=limits.file_size_bytes,
+                open_files=limits.open_files,
+            ),
+        }
+
     async def _run_sandbox_self_test(self):
         """Проверяет работоспособность sandbox на старте"""
         try:
@@ -195,9 +259,20 @@ class ComputeNetwork:
     async def stop(self):
         """Останавливает сеть"""
         self.running = False
+        # Будим планировщик, чтобы он увидел running=False
+        self._schedule_queue.put_nowait(None)
+        for handle in self._stall_timers.values():
+            handle.cancel()
+        self._stall_timers.clear()
         
-        # Останавливаем узел
-        self.node.stop()
+        # Останавливаем узел и пулы исполнения
+        await self.node.close()
+        await self.task_executor.close()
+        
+        if self.task_journal:
+            self.task_journal.close()
+        if self.node.scheduler_state.journal:
+            self.node.scheduler_state.journal.close()
         
         # Очищаем sandbox
         try:
@@ -215,22 +290,148 @@ class ComputeNetwork:
         logger.info("🛑 Сеть остановлена")
     
     async def task_scheduler(self):
-        """Планировщик задач"""
+        """Планировщик задач.
+        
+        Не опрашивает задачи по таймеру: ждёт task_id в очереди. Туда их кладут
+        submit_task, завершение задачи или job'а, смена пиров и пополнение баланса
+        владельца (для отложенных задач). Зависание активной задачи отслеживает отдельный таймер на задачу.
+        """
+        # Задачи, поданные до запуска планировщика, уже лежат в очереди
         while self.running:
+            task_id = await self._schedule_queue.get()
+            if task_id is None or task_id not in self.pending_tasks:
+                continue
             try:
-                # Проверяем pending задачи
-                for task_id, task_info in list(self.pending_tasks.items()):
-                    await self.assign_task(task_id, task_info)
-                
-                # Проверяем активные задачи
-                for task_id, task_info in list(self.active_tasks.items()):
-                    await self.check_task_status(task_id, task_info)
-                
-                await asyncio.sleep(5)  # Проверяем каждые 5 секунд
-                
+                await self.assign_task(task_id, self.pending_tasks[task_id])
             except Exception as e:
                 logger.error(f"Ошибка в планировщике задач: {e}")
-                await asyncio.sleep(10)
+            if task_id in self.active_tasks:
+                self._arm_stall_timer(task_id)
+            elif task_id in self.pending_tasks:
+                self._parked_tasks.add(task_id)
+    
+    def _wake_parked_tasks(self, owner_id: Optional[str] = None):
+        """Возвращает отложенные задачи (только владельца `owner_id`, если задан) в очередь планировщика"""
+        woken = [
+            task_id for task_id in self._parked_tasks
+            if owner_id is None or self._task_owner(task_id) == owner_id
+        ]
+        for task_id in woken:
+            self._schedule_queue.put_nowait(task_id)
+        self._parked_tasks.difference_update(woken)
+    
+    def _task_owner(self, task_id: str) -> Optional[str]:
+        task_info = self.pending_tasks.get(task_id)
+        return task_info['task'].get('owner_id') if task_info else None
+    
+    def _on_node_event(self, event: str):
+        # Новый пир или освободившийся воркер могут сделать отложенные задачи назначаемыми
+        if event in ("peers_changed", "job_result"):
+            self._wake_parked_tasks()
+    
+    def _on_credits_added(self, node_id: str):
+        # Задачи, отложенные из-за нехватки кредитов у владельца, могут стать назначаемыми
+        self._wake_parked_tasks(owner_id=node_id)
+    
+    def _arm_stall_timer(self, task_id: str):
+        loop = asyncio.get_running_loop()
+        self._stall_timers[task_id] = loop.call_later(
+            TASK_STALL_TIMEOUT,
+            lambda: asyncio.ensure_future(self._on_stall_timeout(task_id)),
+        )
+    
+    def _cancel_stall_timer(self, task_id: str):
+        handle = self._stall_timers.pop(task_id, None)
+        if handle:
+            handle.cancel()
+    
+    async def _on_stall_timeout(self, task_id: str):
+        self._stall_timers.pop(task_id, None)
+        task_info = self.active_tasks.get(task_id)
+        if task_info:
+            await self.check_task_status(task_id, task_info)
+    
+    def _recover_state(self, state_dir: str):
+        """Восстанавливает задачи и job'ы из журнала и дальше пишет в него переходы.
+        
+        Результаты задач не журналируются (могут быть большими): после рестарта
+        доступны статус, ошибка и время завершения. Задачи, выполнявшиеся в момент
+        остановки, возвращаются в pending и назначаются заново.
+        """
+        self.node.scheduler_state.attach_journal(StateJournal(state_dir, 'jobs'))
+        journal = StateJournal(state_dir, 'tasks')
+        for record in journal.replay():
+            try:
+                self._apply_task_record(record)
+            except KeyError:
+                logger.warning(f"Запись журнала для неизвестной задачи: {record[:2]}")
+        self.task_journal = journal
+        journal.open(self._task_snapshot_records)
+        interrupted = [
+            task_id for task_id, task_info in self.active_tasks.items()
+            if task_info['status'] in (TaskStatus.SCHEDULED.value, TaskStatus.RUNNING.value)
+        ]
+        for task_id in interrupted:
+            task_info = self.active_tasks[task_id]
+            self._journal_task(['p', task_id, task_info['task'].to_dict(), task_info['submitted_at']])
+        for task_id in self.pending_tasks:
+            self._schedule_queue.put_nowait(task_id)
+        logger.info(
+            f"💾 Восстановлено из журнала: {len(self.pending_tasks)} pending, "
+            f"{len(self.active_tasks)} активных задач, {len(interrupted)} перезапущено"
+        )
+    
+    def _journal_task(self, record: List[Any]):
+        """Применяет переход задачи и пишет его в журнал, если он подключён"""
+        self._apply_task_record(record)
+        if self.task_journal:
+            self.task_journal.append(record)
+    
+    def _apply_task_record(self, record: List[Any]):
+        kind, task_id = record[0], record[1]
+        if kind == 'p':
+            _, _, task_dict, submitted_at = record
+            self.active_tasks.pop(task_id, None)
+            self.pending_tasks[task_id] = {
+                'task': task_dict,
+                'submitted_at': submitted_at,
+                'status': TaskStatus.PENDING.value
+            }
+        elif kind == 'a':
+            _, _, worker_id, assigned_at, pricing = record
+            pending = self.pending_tasks.pop(task_id)
+            task = Task.from_dict(pending['task'])
+            task.status = TaskStatus.SCHEDULED
+            self.active_tasks[task_id] = {
+                'task': task,
+                'worker_id': worker_id,
+                'assigned_at': assigned_at,
+                'submitted_at': pending['submitted_at'],
+                'pricing': pricing,
+                'status': TaskStatus.SCHEDULED.value
+            }
+        elif kind == 's':
+            _, _, status, ts, error = record
+            task_info = self.active_tasks[task_id]
+            task_info['status'] = status
+            if status == TaskStatus.COMPLETED.value:
+                task_info['completed_at'] = ts
+            elif error is not None:
+                task_info['error'] = error
+        elif kind == 'd':
+            self.pending_tasks.pop(task_id, None)
+            self.active_tasks.pop(task_id, None)
+    
+    def _task_snapshot_records(self):
+        for task_id, task_info in self.pending_tasks.items():
+            yield ['p', task_id, task_info['task'], task_info['submitted_at']]
+        for task_id, task_info in self.active_tasks.items():
+            yield ['p', task_id, task_info['task'].to_dict(), task_info.get('submitted_at')]
+            yield ['a', task_id, task_info['worker_id'], task_info['assigned_at'], task_info.get('pricing')]
+            yield [
+                's', task_id, task_info['status'],
+                task_info.get('completed_at') or task_info['assigned_at'], task_info.get('error'),
+            ]
     
     async def assign_task(self, task_id: str, task_info: Dict):
         """Назначает задачу подходящему узлу"""
@@ -271,18 +472,9 @@ class ComputeNetwork:
                         pricing['total_cost'], task_id
                     )
                     
-                    # Назначаем задачу
-                    task.status = TaskStatus.SCHEDULED
-                    self.active_tasks[task_id] = {
-                        'task': task,
-                        'worker_id': optimal_node['node_id'],
-                        'assigned_at': time.time(),
-                        'pricing': pricing,
-                        'status': TaskStatus.SCHEDULED.value
-                    }
-                    
-                    # Удаляем из pending
-                    del self.pending_tasks[task_id]
+                    # Назначаем задачу: переносим из pending в active
+                    self._journal_task(['a', task_id, optimal_node['node_id'], time.time(), pricing])
+                    task = self.active_tasks[task_id]['task']
                     
                     logger.info(f"📝 Задача {task_id} назначена узлу {optimal_node['node_id']}. Стоимость: {pricing['total_cost']}")
                     
@@ -296,24 +488,26 @@ class ComputeNetwork:
     async def _run_local_task(self, task_id: str, task: Task):
         """Запускает выполнение задачи локально с обновлением состояния"""
         try:
-            self.active_tasks[task_id]['status'] = TaskStatus.RUNNING.value
+            self._journal_task(['s', task_id, TaskStatus.RUNNING.value, time.time(), None])
             task.status = TaskStatus.RUNNING
             result = await self.task_executor.execute(task)
             self.active_tasks[task_id]['result'] = result
             final_status = result.get('task_status', TaskStatus.COMPLETED.value)
-            self.active_tasks[task_id]['status'] = final_status
-            if final_status == TaskStatus.COMPLETED.value:
-                self.active_tasks[task_id]['completed_at'] = time.time()
-            else:
-                self.active_tasks[task_id]['error'] = result.get('invalid_results')
+            error = None if final_status == TaskStatus.COMPLETED.value else result.get('invalid_results')
+            self._journal_task(['s', task_id, final_status, time.time(), error])
             # Репутация: учитываем penalties из верификации
             penalties = result.get('penalties', [])
             for worker_id, reason in penalties:
                 await self.reputation_manager.penalize_malicious(worker_id, reason, severity=2.0)
         except Exception as exc:
             logger.error(f"Ошибка выполнения задачи {task_id}: {exc}")
-            self.active_tasks[task_id]['status'] = TaskStatus.FAILED.value
-            self.active_tasks[task_id]['error'] = str(exc)
+            if task_id in self.active_tasks:
+                self._journal_task(['s', task_id, TaskStatus.FAILED.value, time.time(), str(exc)])
+        finally:
+            # Задача завершилась: таймер зависания не нужен, мощности освободились
+            self._cancel_stall_timer(task_id)
+            self.node.task_descriptors.forget(task_id)
+            self._wake_parked_tasks()
     
     async def get_available_nodes(self, task: Task) -> List[Dict]:
         """Получает список доступных узлов для задачи"""
@@ -343,19 +537,19 @@ class ComputeNetwork:
                                  TaskType.MATRIX_OPS, TaskType.ML_INFERENCE, TaskType.ML_TRAIN_STEP]:
             return False
         
-        # Проверяем требования к ресурсам
+        # Проверяем требования к ресурсам; capabilities пира — словарь из capability_exchange
         if task.requirements.cpu_percent > 95:
             return False
         
-        if task.requirements.ram_gb > capabilities.ram_gb:
+        if task.requirements.ram_gb > capabilities.get('ram_gb', 0):
             return False
         
-        if task.requirements.gpu_percent > 0 and capabilities.gpu_score == 0:
+        if task.requirements.gpu_percent > 0 and capabilities.get('gpu_score', 0) == 0:
             return False
         
         # Проверяем загрузку
-        cpu_load = capabilities.cpu_usage
-        gpu_load = capabilities.gpu_usage
+        cpu_load = capabilities.get('cpu_usage', 0)
+        gpu_load = capabilities.get('gpu_usage', 0)
         
         if cpu_load > 90 or gpu_load > 90:
             return False
@@ -372,7 +566,7 @@ class ComputeNetwork:
             # Пока имитируем проверку
             
             # Если задача выполняется более 5 минут, считаем ее зависшей
-            if time.time() - task_info['assigned_at'] > 300:
+            if time.time() - task_info['assigned_at'] >= TASK_STALL_TIMEOUT:
                 logger.warning(f"Задача {task_id} выполняется слишком долго")
                 
                 # Отменяем задачу
@@ -393,6 +587,7 @@ class ComputeNetwork:
     async def cancel_task(self, task_id: str, reason: str):
         """Отменяет задачу"""
         if task_id in self.active_tasks:
+            self._cancel_stall_timer(task_id)
             task_info = self.active_tasks[task_id]
             
             # Возвращаем кредиты владельцу
@@ -415,7 +610,8 @@ class ComputeNetwork:
             )
 
             # Удаляем из активных
-            del self.active_tasks[task_id]
+            self._journal_task(['d', task_id])
+            self.node.task_descriptors.forget(task_id)
             
             logger.info(f"❌ Задача {task_id} отменена: {reason}")
     
@@ -528,15 +724,13 @@ class ComputeNetwork:
             if errors:
                 raise ValueError(f"Ошибка валидации задачи: {errors}")
             
-        # Генерируем ID задачи
-        task_id = task.task_id
-        
-        # Добавляем в pending задачи
-        self.pending_tasks[task_id] = {
-            'task': task.to_dict(),
-            'submitted_at': time.time(),
-            'status': TaskStatus.PENDING.value
-        }
+            # Генерируем ID задачи
+            task_id = task.task_id
+            
+            # Добавляем в pending задачи
+            self._journal_task(['p', task_id, task.to_dict(), time.time()])
+            # Планировщик подхватит задачу сразу, без ожидания очередного цикла
+            self._schedule_queue.put_nowait(task_id)
             
             logger.info(f"📝 Задача {task_id} подана в сеть")
             return task_id
@@ -7,7 +7,7 @@ import asyncio
 import statistics
 import time
 from collections import defaultdict, deque
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, field
 from enum import Enum
 from typing import Dict, List, Optional
 
@@ -28,7 +28,8 @@ class ReputationEvent:
     event_id: str
     event_type: ReputationEventType
     node_id: str
-    timestamp: float
+    # Ни один вызывающий не передаёт время события: по умолчанию — момент создания
+    timestamp: float = field(default_factory=time.time)
     task_id: Optional[str] = None
     description: Optional[str] = None
     severity: float = 1.0  # 0.1 (легкий) до 10.0 (тяжелый)
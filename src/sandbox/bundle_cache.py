@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Кэш материализованных CodeBundle, адресуемый хэшем содержимого.
+
+Тысячи job'ов одной задачи несут один и тот же бандл; вместо записи всех его
+файлов в каждый рабочий каталог бандл пишется в кэш один раз (файлы только
+для чтения), а в рабочий каталог job'а попадают жёсткие ссылки на них — или
+копии, если каталоги на разных файловых системах. Кэш ограничен квотой на
+диск с вытеснением давно не использованных бандлов; бандлы, с которыми
+сейчас работают job'ы, не вытесняются.
+
+Жёсткая ссылка делит inode с кэшем: job, переписавший файл бандла, испортил
+бы его следующим job'ам. Поэтому после job'а файлы бандла сверяются с
+записанными при материализации (режим, размер, mtime), и изменённый бандл
+выбрасывается из кэша.
+"""
+
+from __future__ import annotations
+
+import errno
+import hashlib
+import os
+import shutil
+import stat
+import tempfile
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    from sandbox.execution import CodeBundle
+
+DEFAULT_QUOTA_BYTES = 512 * 1024 * 1024
+
+_READ_ONLY = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+
+
+def bundle_contents(bundle: "CodeBundle") -> Dict[str, bytes]:
+    """Файлы бандла (относительный путь → содержимое); source перекрывает файл entrypoint."""
+    contents = {
+        relative: content.encode("utf-8") if isinstance(content, str) else bytes(content)
+        for relative, content in bundle.files.items()
+    }
+    if bundle.source is not None:
+        contents[bundle.entrypoint] = bundle.source.encode("utf-8")
+    elif bundle.entrypoint not in contents:
+        raise ValueError("CodeBundle must define source or file for entrypoint")
+    return contents
+
+
+def bundle_digest(contents: Dict[str, bytes]) -> str:
+    """Хэш содержимого бандла; args/env/stdin в него не входят — они не меняют файлы."""
+    digest = hashlib.sha256()
+    for relative in sorted(contents):
+        data = contents[relative]
+        name = relative.encode("utf-8")
+        digest.update(len(name).to_bytes(8, "big") + name + len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+@dataclass
+class _Entry:
+    path: str
+    size: int
+    # Относительный путь → (st_mode, st_size, st_mtime_ns) на момент материализации
+    files: Dict[str, Tuple[int, int, int]] = field(default_factory=dict)
+    pins: int = 0
+    tampered: bool = False
+
+
+class BundleCache:
+    """Материализованные бандлы в `root` с LRU-вытеснением по `quota_bytes`."""
+
+    def __init__(self, root: Optional[str] = None, quota_bytes: int = DEFAULT_QUOTA_BYTES):
+        self._owns_root = root is None
+        self.root = root or tempfile.mkdtemp(prefix="sandbox_bundles_")
+        os.makedirs(self.root, exist_ok=True)
+        self.quota_bytes = quota_bytes
+        self.bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "tampered": 0, "copies": 0}
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._hardlinks = True
+
+    def checkout(self, bundle: "CodeBundle", workdir: str) -> Tuple[str, str]:
+        """Раскладывает бандл в `workdir`; возвращает (хэш, путь к entrypoint).
+
+        Бандл закреплён в кэше до `release(хэш)`.
+        """
+        contents = bundle_contents(bundle)
+        digest = bundle_digest(contents)
+        entry = self._entries.get(digest)
+        if entry is None:
+            self.stats["misses"] += 1
+            entry = self._materialize(digest, contents)
+            self._entries[digest] = entry
+            self.bytes += entry.size
+        else:
+            self.stats["hits"] += 1
+            self._entries.move_to_end(digest)
+        entry.pins += 1
+        try:
+            self._link_into(entry, workdir)
+        except BaseException:
+            self.release(digest)
+            raise
+        self._evict()
+        return digest, os.path.join(workdir, bundle.entrypoint)
+
+    def release(self, digest: str) -> None:
+        """Снимает закрепление; бандл, файлы которого job изменил, выбрасывается."""
+        entry = self._entries.get(digest)
+        if entry is None:
+            return
+        entry.pins -= 1
+        if not entry.tampered and not self._intact(entry):
+            entry.tampered = True
+            self.stats["tampered"] += 1
+        if entry.tampered and entry.pins == 0:
+            self._drop(digest)
+        self._evict()
+
+    def close(self) -> None:
+        for digest in list(self._entries):
+            self._drop(digest)
+        if self._owns_root:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _materialize(self, digest: str, contents: Dict[str, bytes]) -> _Entry:
+        # Пишем во временный каталог и переименовываем: недописанный бандл в кэш не попадает
+        staging = tempfile.mkdtemp(prefix=".staging_", dir=self.root)
+        path = os.path.join(self.root, digest)
+        try:
+            entry = _Entry(path=path, size=0)
+            for relative, data in contents.items():
+                target = os.path.join(staging, relative)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, "wb") as fh:
+                    fh.write(data)
+                os.chmod(target, _READ_ONLY)
+                entry.size += len(data)
+            shutil.rmtree(path, ignore_errors=True)
+            os.rename(staging, path)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        for relative in contents:
+            st = os.stat(os.path.join(path, relative))
+            entry.files[relative] = (st.st_mode, st.st_size, st.st_mtime_ns)
+        return entry
+
+    def _link_into(self, entry: _Entry, workdir: str) -> None:
+        for relative in entry.files:
+            source = os.path.join(entry.path, relative)
+            target = os.path.join(workdir, relative)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if self._hardlinks:
+                try:
+                    os.link(source, target)
+                    continue
+                except OSError as exc:
+                    if exc.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                        raise
+                    # Другая файловая система или запрет ссылок: дальше только копии
+                    self._hardlinks = exc.errno == errno.EMLINK
+            shutil.copyfile(source, target)
+            self.stats["copies"] += 1
+
+    def _intact(self, entry: _Entry) -> bool:
+        for relative, recorded in entry.files.items():
+            try:
+                st = os.stat(os.path.join(entry.path, relative))
+            except FileNotFoundError:
+                return False
+            if (st.st_mode, st.st_size, st.st_mtime_ns) != recorded:
+                return False
+        return True
+
+    def _evict(self) -> None:
+        for digest in list(self._entries):
+            if self.bytes <= self.quota_bytes:
+                return
+            if self._entries[digest].pins == 0:
+                self._drop(digest)
+                self.stats["evictions"] += 1
+
+    def _drop(self, digest: str) -> None:
+        entry = self._entries.pop(digest)
+        self.bytes -= entry.size
+        shutil.rmtree(entry.path, ignore_errors=True)
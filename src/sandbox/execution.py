@@ -9,25 +9,50 @@ import asyncio
 import logging
 import os
 import shutil
+import signal
 import sys
 import tempfile
 import time
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field, replace
 from enum import Enum
-from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
 
 try:
     import resource
 except ImportError:  # pragma: no cover - Windows
     resource = None
 
+from sandbox.bundle_cache import BundleCache, bundle_contents
+from sandbox.forkserver import DEFAULT_PRELOAD, ForkServer, ForkServerError
+from sandbox.pool import DEFAULT_MAX_JOBS_PER_WORKER, InterpreterPool, PoolOutcome
+from sandbox.result_channel import RESULT_PATH_ENV, read_result
+from sandbox.streams import (
+    OutputChunk,
+    OutputSink,
+    SandboxStream,
+    StreamCapture,
+    pump,
+    spill_path_for,
+    tail,
+)
+
 if TYPE_CHECKING:  # pragma: no cover
     from core.job import Job
 
 
 logger = logging.getLogger(__name__)
 
+# Корень пакетов проекта: в песочнице импортируется sandbox.result_channel
+_SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# rusage считает CPU по тикам планировщика: убитый по RLIMIT_CPU процесс
+# может показать чуть меньше лимита
+_CPU_ACCOUNTING_SLACK = 0.1
+# Жёсткий CPU процесса пула по умолчанию: копится за всю жизнь процесса, поэтому
+# должен быть много больше бюджета одного job'а, иначе процесс не переиспользуется
+DEFAULT_POOL_CPU_SECONDS = 3600
+
 
 class SandboxType(str, Enum):
     """Типы поддерживаемых песочниц."""
@@ -48,6 +73,11 @@ class SandboxLimits:
     open_files: int = 256
     working_dir_quota_bytes: int = 256 * 1024 * 1024
     env: Dict[str, str] = field(default_factory=dict)
+    # Сколько байт каждого потока держать в SandboxResult; остальное — маркер усечения
+    stdout_max_bytes: int = 16 * 1024 * 1024
+    stderr_max_bytes: int = 4 * 1024 * 1024
+    # Каталог для полного вывода потоков, превысивших лимит; None — хвост отбрасывается
+    spill_dir: Optional[str] = None
 
 
 @dataclass
@@ -63,6 +93,14 @@ class SandboxResult:
     killed: bool = False
     usage: Dict[str, Any] = field(default_factory=dict)
     reason: Optional[str] = None
+    # Поток → сколько байт отброшено сверх лимита
+    truncated: Dict[str, int] = field(default_factory=dict)
+    # Поток → файл с полным выводом (при SandboxLimits.spill_dir)
+    spill_paths: Dict[str, str] = field(default_factory=dict)
+    # Значение, отданное job'ом через sandbox.result_channel.emit (has_value — было ли оно)
+    value: Any = None
+    has_value: bool = False
+    value_error: Optional[str] = None
 
 
 @dataclass
@@ -96,6 +134,27 @@ class SandboxExecutor(ABC):
     ) -> SandboxResult:
         """Выполняет код для конкретного job'а."""
 
+    def stream(
+        self,
+        job: Optional["Job"],
+        code_bundle: CodeBundle,
+        limits: Optional[SandboxLimits] = None,
+    ) -> SandboxStream:
+        """Вывод job'а асинхронным итератором OutputChunk; SandboxResult — в `.result` после итерации.
+
+        Базовая реализация отдаёт вывод целиком после завершения; песочницы,
+        читающие вывод по мере появления, переопределяют её.
+        """
+
+        async def run(sink: OutputSink) -> SandboxResult:
+            result = await self.execute(job, code_bundle, limits)
+            for name, text in (("stdout", result.stdout), ("stderr", result.stderr)):
+                if text:
+                    await sink(OutputChunk(name, text.encode("utf-8")))
+            return result
+
+        return SandboxStream(run)
+
     async def run_self_test(self) -> bool:
         """Проверяет базовую работоспособность песочницы."""
         bundle = CodeBundle(
@@ -133,10 +192,55 @@ class SandboxExecutor(ABC):
 
 
 class ProcessSandboxExecutor(SandboxExecutor):
-    """Запускает код в отдельном процессе и ограничивает ресурсы."""
-
-    def __init__(self, default_limits: Optional[SandboxLimits] = None):
+    """Запускает код в отдельном процессе и ограничивает ресурсы.
+
+    С `pool_size > 0` python-скрипты без своей `command` исполняются в тёплом
+    пуле интерпретаторов (`sandbox/pool.py`): `pool_limits` — жёсткие лимиты
+    процесса пула на всю его жизнь, лимиты job'а ставятся мягкими внутри них
+    (по умолчанию — `default_limits` с CPU `DEFAULT_POOL_CPU_SECONDS`). Процесс,
+    которому до жёсткого CPU не хватает бюджета очередного job'а, пересоздаётся.
+    Job, которому нужно больше памяти или CPU, чем допускает пул, как и прежде
+    получает свой процесс.
+
+    С `fork_server=True` те же job'ы получают собственный процесс fork'ом
+    зиготы с предзагруженными `preload` модулями (`sandbox/forkserver.py`):
+    изоляция и лимиты — как у процесса на job, без старта интерпретатора.
+
+    С `bundle_cache` одинаковые бандлы материализуются один раз
+    (`sandbox/bundle_cache.py`), в рабочий каталог job'а попадают жёсткие
+    ссылки на файлы кэша только для чтения.
+    """
+
+    def __init__(
+        self,
+        default_limits: Optional[SandboxLimits] = None,
+        pool_size: int = 0,
+        max_jobs_per_worker: int = DEFAULT_MAX_JOBS_PER_WORKER,
+        preload: Optional[Sequence[str]] = None,
+        pool_limits: Optional[SandboxLimits] = None,
+        fork_server: bool = False,
+        bundle_cache: Optional[BundleCache] = None,
+    ):
         super().__init__(SandboxType.PROCESS_ISOLATION, default_limits)
+        self.bundle_cache = bundle_cache
+        if pool_size > 0 and fork_server:
+            raise ValueError("pool_size and fork_server are mutually exclusive")
+        self.pool_limits = pool_limits or replace(
+            self.default_limits,
+            cpu_time_seconds=max(self.default_limits.cpu_time_seconds, DEFAULT_POOL_CPU_SECONDS),
+        )
+        self.pool: Optional[InterpreterPool] = None
+        self.fork_server: Optional[ForkServer] = None
+        if fork_server:
+            self.fork_server = ForkServer(DEFAULT_PRELOAD if preload is None else preload)
+        if pool_size > 0:
+            self.pool = InterpreterPool(
+                pool_size,
+                max_jobs_per_worker=max_jobs_per_worker,
+                preload=preload or (),
+                env=self._job_environ({}),
+                preexec_fn=self._make_preexec_fn(self.pool_limits),
+            )
 
     async def execute(
         self,
@@ -144,13 +248,30 @@ class ProcessSandboxExecutor(SandboxExecutor):
         code_bundle: CodeBundle,
         limits: Optional[SandboxLimits] = None,
     ) -> SandboxResult:
+        return await self._execute(code_bundle, limits or self.default_limits, sink=None)
+
+    def stream(
+        self,
+        job: Optional["Job"],
+        code_bundle: CodeBundle,
+        limits: Optional[SandboxLimits] = None,
+    ) -> SandboxStream:
         limits = limits or self.default_limits
+        return SandboxStream(lambda sink: self._execute(code_bundle, limits, sink))
+
+    async def _execute(self, code_bundle: CodeBundle, limits: SandboxLimits, sink: Optional[OutputSink]) -> SandboxResult:
+        if self._fits_pool(code_bundle, limits) or self._fits_fork_server(code_bundle):
+            return await self._execute_warm(code_bundle, limits, sink)
         workdir = tempfile.mkdtemp(prefix="sandbox_proc_")
         start = time.time()
+        cached = None
+        captures = self._make_captures(workdir, limits)
         try:
-            entrypoint_path = self._write_bundle(workdir, code_bundle)
+            cached, entrypoint_path = self._prepare_workdir(workdir, code_bundle)
             command = self._build_command(code_bundle, entrypoint_path)
-            env = {**os.environ, **limits.env, **code_bundle.env}
+            io_dir = tempfile.mkdtemp(prefix=".io_", dir=workdir)
+            result_path = os.path.join(io_dir, "result")
+            env = self._job_environ({**limits.env, **code_bundle.env, RESULT_PATH_ENV: result_path})
             stdin_data = code_bundle.stdin
 
             preexec_fn = self._make_preexec_fn(limits)
@@ -164,35 +285,47 @@ class ProcessSandboxExecutor(SandboxExecutor):
                 preexec_fn=preexec_fn,
             )
 
+            # Пайпы читаются по мере записи: в памяти только головы потоков до лимитов
+            tasks = [
+                asyncio.create_task(pump(proc.stdout, captures[0], sink)),
+                asyncio.create_task(pump(proc.stderr, captures[1], sink)),
+                asyncio.create_task(proc.wait()),
+            ]
+            if stdin_data is not None:
+                tasks.append(asyncio.create_task(self._feed_stdin(proc, stdin_data)))
             try:
-                stdout, stderr = await asyncio.wait_for(
-                    proc.communicate(stdin_data),
-                    timeout=limits.wall_time_seconds,
-                )
-                timed_out = False
-            except asyncio.TimeoutError:
-                proc.kill()
-                try:
-                    await asyncio.wait_for(proc.wait(), timeout=5)
-                except asyncio.TimeoutError:
-                    proc.kill()
-                stdout, stderr = await proc.communicate()
-                timed_out = True
+                _, pending = await asyncio.wait(tasks, timeout=limits.wall_time_seconds)
+                timed_out = bool(pending)
+                if timed_out:
+                    self._kill_group(proc)
+                    # Вывод, записанный до таймаута, дочитывается; зависшие чтения бросаются
+                    _, pending = await asyncio.wait(pending, timeout=5)
+                    for task in pending:
+                        task.cancel()
+            except asyncio.CancelledError:
+                self._kill_group(proc)
+                for task in tasks:
+                    task.cancel()
+                raise
 
             runtime = time.time() - start
             exit_code = proc.returncode if proc.returncode is not None else -1
             success = exit_code == 0 and not timed_out
             usage = self._collect_usage()
-            return SandboxResult(
-                success=success,
-                stdout=stdout.decode("utf-8", errors="replace"),
-                stderr=stderr.decode("utf-8", errors="replace"),
-                exit_code=exit_code,
-                runtime=runtime,
-                timed_out=timed_out,
-                killed=timed_out or exit_code != 0,
-                usage=usage,
-                reason="timeout" if timed_out else None,
+            return self._with_captures(
+                SandboxResult(
+                    success=success,
+                    stdout="",
+                    stderr="",
+                    exit_code=exit_code,
+                    runtime=runtime,
+                    timed_out=timed_out,
+                    killed=timed_out or exit_code != 0,
+                    usage=usage,
+                    reason="timeout" if timed_out else None,
+                ),
+                captures,
+                result_path,
             )
         except FileNotFoundError as exc:
             return SandboxResult(
@@ -205,25 +338,230 @@ class ProcessSandboxExecutor(SandboxExecutor):
                 reason="command_not_found",
             )
         finally:
+            for capture in captures:
+                capture.close()
             shutil.rmtree(workdir, ignore_errors=True)
+            if cached is not None:
+                self.bundle_cache.release(cached)
+
+    async def close(self) -> None:
+        if self.pool is not None:
+            await self.pool.close()
+        if self.fork_server is not None:
+            await self.fork_server.close()
+        if self.bundle_cache is not None:
+            self.bundle_cache.close()
+
+    def _fits_pool(self, bundle: CodeBundle, limits: SandboxLimits) -> bool:
+        return (
+            self.pool is not None
+            and resource is not None
+            and bundle.language == "python"
+            and not bundle.command
+            and limits.memory_bytes <= self.pool_limits.memory_bytes
+            and limits.cpu_time_seconds <= self.pool_limits.cpu_time_seconds
+        )
+
+    def _fits_fork_server(self, bundle: CodeBundle) -> bool:
+        return (
+            self.fork_server is not None
+            and resource is not None
+            and bundle.language == "python"
+            and not bundle.command
+        )
+
+    async def _execute_warm(
+        self,
+        bundle: CodeBundle,
+        limits: SandboxLimits,
+        sink: Optional[OutputSink],
+    ) -> SandboxResult:
+        """Исполняет python-бандл в пуле или fork'е зиготы."""
+        workdir = tempfile.mkdtemp(prefix="sandbox_warm_")
+        start = time.time()
+        cached = None
+        captures = self._make_captures(workdir, limits)
+        finished = asyncio.Event()
+        tails: List[asyncio.Task] = []
+        try:
+            cached, entrypoint_path = self._prepare_workdir(workdir, bundle)
+            # Потоки job'а — файлы рядом с бандлом: их можно дочитать и после убитого процесса
+            io_dir = tempfile.mkdtemp(prefix=".io_", dir=workdir)
+            result_path = os.path.join(io_dir, "result")
+            stdout_path = os.path.join(io_dir, "stdout")
+            stderr_path = os.path.join(io_dir, "stderr")
+            if sink is not None:
+                # Файлы вывода читаются по мере роста, чтобы куски сразу уходили в sink
+                for path in (stdout_path, stderr_path):
+                    open(path, "wb").close()
+                tails = [
+                    asyncio.create_task(tail(path, capture, sink, finished))
+                    for path, capture in zip((stdout_path, stderr_path), captures)
+                ]
+            stdin_path = None
+            if bundle.stdin is not None:
+                stdin_path = os.path.join(io_dir, "stdin")
+                with open(stdin_path, "wb") as fh:
+                    fh.write(bundle.stdin)
+            request = {
+                "workdir": workdir,
+                "entrypoint": entrypoint_path,
+                "args": list(bundle.args),
+                "env": {**limits.env, **bundle.env, RESULT_PATH_ENV: result_path},
+                "cpu_time_seconds": limits.cpu_time_seconds,
+                "memory_bytes": limits.memory_bytes,
+                "file_size_bytes": limits.file_size_bytes,
+                "open_files": limits.open_files,
+                "stdin_path": stdin_path,
+                "stdout_path": stdout_path,
+                "stderr_path": stderr_path,
+            }
+            died_reason = "worker_died"
+            try:
+                if self.fork_server is not None:
+                    # Ребёнок зиготы получает полное окружение и все лимиты, как процесс на job
+                    request["env"] = self._job_environ(request["env"])
+                    request["limits"] = asdict(limits)
+                    died_reason = None
+                    outcome = await self.fork_server.run(request, timeout=limits.wall_time_seconds)
+                else:
+                    outcome = await self.pool.run(request, timeout=limits.wall_time_seconds)
+            except ForkServerError:
+                outcome = PoolOutcome()
+                died_reason = "fork_server_died"
+            finished.set()
+            if tails:
+                await asyncio.gather(*tails)
+            else:
+                for path, capture in zip((stdout_path, stderr_path), captures):
+                    # Файла нет, если процесс умер, не успев начать job
+                    if os.path.exists(path):
+                        await tail(path, capture, None, finished)
+            result = self._pooled_result(outcome, "", "", time.time() - start, limits, died_reason)
+            return self._with_captures(result, captures, result_path)
+        finally:
+            for task in tails:
+                task.cancel()
+            for capture in captures:
+                capture.close()
+            shutil.rmtree(workdir, ignore_errors=True)
+            if cached is not None:
+                self.bundle_cache.release(cached)
+
+    @staticmethod
+    def _pooled_result(
+        outcome: PoolOutcome,
+        stdout: str,
+        stderr: str,
+        runtime: float,
+        limits: SandboxLimits,
+        died_reason: Optional[str] = "worker_died",
+    ) -> SandboxResult:
+        response = outcome.response
+        if response is None:
+            exit_code = outcome.returncode if outcome.returncode is not None else -1
+            cpu_used = outcome.usage.get("user_time", 0.0) + outcome.usage.get("system_time", 0.0)
+            if outcome.timed_out:
+                reason = "timeout"
+            elif exit_code == -signal.SIGXCPU or (
+                exit_code == -signal.SIGKILL and cpu_used >= limits.cpu_time_seconds - _CPU_ACCOUNTING_SLACK
+            ):
+                # Мягкий лимит CPU шлёт SIGXCPU, совпадающий с жёстким — сразу SIGKILL
+                reason = "cpu_time_limit"
+            else:
+                reason = died_reason
+            return SandboxResult(
+                success=False,
+                stdout=stdout,
+                stderr=stderr,
+                exit_code=exit_code,
+                runtime=runtime,
+                timed_out=outcome.timed_out,
+                killed=True,
+                usage=outcome.usage,
+                reason=reason,
+            )
+        exit_code = response["exit_code"]
+        return SandboxResult(
+            success=exit_code == 0,
+            stdout=stdout,
+            stderr=stderr,
+            exit_code=exit_code,
+            runtime=runtime,
+            killed=exit_code != 0,
+            usage=response.get("usage", {}),
+            reason=response.get("breach"),
+        )
+
+    @staticmethod
+    def _make_captures(workdir: str, limits: SandboxLimits) -> Tuple[StreamCapture, StreamCapture]:
+        return (
+            StreamCapture("stdout", limits.stdout_max_bytes, spill_path_for(limits.spill_dir, workdir, "stdout")),
+            StreamCapture("stderr", limits.stderr_max_bytes, spill_path_for(limits.spill_dir, workdir, "stderr")),
+        )
+
+    @staticmethod
+    def _with_captures(
+        result: SandboxResult,
+        captures: Sequence[StreamCapture],
+        result_path: str,
+    ) -> SandboxResult:
+        """Дополняет результат выводом потоков и значением из канала результата."""
+        result.stdout, result.stderr = (capture.text() for capture in captures)
+        for capture in captures:
+            if capture.dropped:
+                result.truncated[capture.name] = capture.dropped
+            if capture.spilled:
+                result.spill_paths[capture.name] = capture.spill_path
+        try:
+            result.has_value, result.value = read_result(result_path)
+        except Exception as exc:  # noqa: BLE001 - байты из песочницы не доверенные
+            result.value_error = f"Undecodable sandbox result: {exc}"
+        return result
+
+    @staticmethod
+    def _job_environ(overrides: Dict[str, str]) -> Dict[str, str]:
+        """Окружение процесса job'а: пакеты проекта в PYTHONPATH для sandbox.result_channel."""
+        env = {**os.environ, **overrides}
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [_SRC_DIR, env.get("PYTHONPATH")]))
+        return env
+
+    @staticmethod
+    async def _feed_stdin(proc: asyncio.subprocess.Process, data: bytes) -> None:
+        try:
+            proc.stdin.write(data)
+            await proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            proc.stdin.close()
+
+    @staticmethod
+    def _kill_group(proc: asyncio.subprocess.Process) -> None:
+        """SIGKILL группе процесса job'а (preexec делает его лидером сессии)."""
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+            return
+        except (AttributeError, ProcessLookupError, PermissionError):
+            pass
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+
+    def _prepare_workdir(self, workdir: str, bundle: CodeBundle) -> Tuple[Optional[str], str]:
+        """(хэш закреплённого в кэше бандла или None, путь к entrypoint)."""
+        if self.bundle_cache is not None:
+            return self.bundle_cache.checkout(bundle, workdir)
+        return None, self._write_bundle(workdir, bundle)
 
     def _write_bundle(self, workdir: str, bundle: CodeBundle) -> str:
-        for relative, content in bundle.files.items():
+        for relative, data in bundle_contents(bundle).items():
             path = os.path.join(workdir, relative)
             os.makedirs(os.path.dirname(path), exist_ok=True)
             with open(path, "wb") as fh:
-                data = content.encode("utf-8") if isinstance(content, str) else content
                 fh.write(data)
-
-        entrypoint_path = os.path.join(workdir, bundle.entrypoint)
-        os.makedirs(os.path.dirname(entrypoint_path), exist_ok=True)
-        if bundle.source is not None:
-            with open(entrypoint_path, "w", encoding="utf-8") as fh:
-                fh.write(bundle.source)
-        elif bundle.entrypoint not in bundle.files:
-            raise ValueError("CodeBundle must define source or file for entrypoint")
-
-        return entrypoint_path
+        return os.path.join(workdir, bundle.entrypoint)
 
     def _build_command(self, bundle: CodeBundle, entrypoint_path: str) -> List[str]:
         if bundle.command:
@@ -421,9 +759,14 @@ class SandboxExecutorFactory:
     """Фабрика для создания песочниц нужного типа."""
 
     @staticmethod
-    def create(sandbox_type: SandboxType, limits: Optional[SandboxLimits] = None) -> SandboxExecutor:
+    def create(
+        sandbox_type: SandboxType,
+        limits: Optional[SandboxLimits] = None,
+        **process_options: Any,
+    ) -> SandboxExecutor:
+        """`process_options` (pool_size, preload, ...) передаются ProcessSandboxExecutor."""
         if sandbox_type == SandboxType.PROCESS_ISOLATION:
-            return ProcessSandboxExecutor(default_limits=limits)
+            return ProcessSandboxExecutor(default_limits=limits, **process_options)
         if sandbox_type == SandboxType.WASM:
             return WasmSandboxExecutor(default_limits=limits)
         if sandbox_type == SandboxType.CONTAINER:
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Fork-server песочницы: зигота с предзагруженными модулями и fork на job.
+
+Зигота (`python -m sandbox.forkserver <модули...>`) один раз импортирует
+numpy, json, builtin-обработчики и ждёт запросы по пайпу. На каждый job она
+делает `os.fork()`: ребёнок применяет лимиты `_make_preexec_fn` (setsid,
+rlimit'ы) и исполняет бандл runpy. Каждый job получает собственный процесс,
+как в режиме процесса на job, но страницы интерпретатора и импортированных
+модулей достаются ему copy-on-write, без старта и импортов. Зигота сама
+собирает завершившихся детей через `os.wait4` и отдаёт код выхода и rusage
+конкретного ребёнка.
+
+`ForkServer` — сторона ProcessSandboxExecutor: запускает зиготу, сопоставляет
+ответы с job'ами и убивает группу процессов job'а по таймауту. Упавшая зигота
+перезапускается при следующем job'е.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import os
+import selectors
+import signal
+import sys
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from sandbox.pool import SPAWN_TIMEOUT, PoolOutcome, receive_message, send_message
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRELOAD = ("json", "numpy", "core.generic_handlers")
+
+_SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ForkServerError(RuntimeError):
+    """Зигота умерла, не вернув результат job'а."""
+
+
+class ForkServer:
+    """Клиент зиготы: один процесс на executor, job'ы исполняются параллельно."""
+
+    def __init__(self, preload: Sequence[str] = DEFAULT_PRELOAD):
+        self.preload = list(preload)
+        self.stats = {"started": 0, "jobs": 0}
+        self._proc: Optional[asyncio.subprocess.Process] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._pending: Dict[int, Tuple[asyncio.Future, asyncio.Future]] = {}
+        self._ids = itertools.count(1)
+        self._starting: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> None:
+        self._bind_loop()
+        async with self._starting:
+            if self._proc is not None and self._proc.returncode is None:
+                return
+            env = dict(os.environ)
+            env["PYTHONPATH"] = os.pathsep.join(filter(None, [_SRC_DIR, env.get("PYTHONPATH")]))
+            proc = await asyncio.create_subprocess_exec(
+                sys.executable,
+                "-m",
+                "sandbox.forkserver",
+                *self.preload,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                env=env,
+            )
+            try:
+                await asyncio.wait_for(receive_message(proc.stdout), timeout=SPAWN_TIMEOUT)
+            except BaseException:
+                proc.kill()
+                await proc.wait()
+                raise
+            self._proc = proc
+            self._reader = asyncio.create_task(self._read_loop(proc))
+            self.stats["started"] += 1
+
+    async def run(self, request: Dict[str, Any], timeout: float) -> PoolOutcome:
+        """Исполняет job в отдельном fork'е зиготы; ForkServerError — зигота умерла."""
+        await self.start()
+        loop = asyncio.get_running_loop()
+        job_id = next(self._ids)
+        started, exited = loop.create_future(), loop.create_future()
+        self._pending[job_id] = (started, exited)
+        pid = None
+        try:
+            try:
+                await send_message(self._proc.stdin, {**request, "id": job_id})
+            except ConnectionError as exc:
+                raise ForkServerError(str(exc)) from exc
+            pid = await started
+            self.stats["jobs"] += 1
+            try:
+                message = await asyncio.wait_for(asyncio.shield(exited), timeout=timeout)
+                timed_out = False
+            except asyncio.TimeoutError:
+                _kill_group(pid)
+                message = await exited
+                timed_out = True
+        except asyncio.CancelledError:
+            if pid is not None and not exited.done():
+                _kill_group(pid)
+            raise
+        finally:
+            self._pending.pop(job_id, None)
+        returncode = message["returncode"]
+        if returncode < 0 or timed_out:
+            return PoolOutcome(timed_out=timed_out, returncode=returncode, usage=message["usage"])
+        return PoolOutcome(response={"exit_code": returncode, "usage": message["usage"], "breach": None})
+
+    async def close(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None or proc.returncode is not None:
+            return
+        # Конец stdin — сигнал зиготе убить оставшиеся job'ы и выйти
+        proc.stdin.close()
+        try:
+            await asyncio.wait_for(proc.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+        if self._reader is not None:
+            await self._reader
+
+    async def _read_loop(self, proc: asyncio.subprocess.Process) -> None:
+        try:
+            while True:
+                message = await receive_message(proc.stdout)
+                futures = self._pending.get(message["id"])
+                if futures is None:
+                    continue
+                started, exited = futures
+                if "returncode" in message:
+                    exited.set_result(message)
+                elif not started.done():
+                    started.set_result(message["pid"])
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        if self._proc is proc:
+            self._proc = None
+        error = ForkServerError("Fork server exited")
+        for started, exited in list(self._pending.values()):
+            # Ждут либо запуска, либо завершения: исключение — в тот future, который ждут
+            if not started.done():
+                started.set_exception(error)
+            elif not exited.done():
+                exited.set_exception(error)
+
+    def _bind_loop(self) -> None:
+        """Пайпы зиготы привязаны к event loop, в котором она запущена."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._proc is not None and self._proc.returncode is None:
+            try:
+                self._proc.kill()
+            except ProcessLookupError:
+                pass
+        self._proc = None
+        self._reader = None
+        self._pending = {}
+        self._starting = asyncio.Lock()
+        self._loop = loop
+
+
+def _kill_group(pid: int) -> None:
+    """Ребёнок зиготы — лидер своей сессии: SIGKILL достаётся и его подпроцессам."""
+    try:
+        os.killpg(pid, signal.SIGKILL)
+        return
+    except (ProcessLookupError, PermissionError):
+        pass
+    # Ребёнок ещё не успел вызвать setsid
+    try:
+        os.kill(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Сторона зиготы
+# ---------------------------------------------------------------------------
+
+
+def _run_child(request: Dict[str, Any], inherited_fds: Sequence[int]) -> None:
+    """Тело fork'нутого ребёнка; никогда не возвращается в цикл зиготы."""
+    import runpy
+    import traceback
+
+    from sandbox.execution import ProcessSandboxExecutor, SandboxLimits
+    from sandbox.pool_worker import exit_code_of
+
+    # Код выхода, если ребёнок упал до запуска job'а (EX_SOFTWARE)
+    code = 70
+    try:
+        signal.set_wakeup_fd(-1)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        for fd in inherited_fds:
+            os.close(fd)
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+        stdio = (
+            os.open(request.get("stdin_path") or os.devnull, os.O_RDONLY),
+            os.open(request["stdout_path"], flags, 0o600),
+            os.open(request["stderr_path"], flags, 0o600),
+        )
+        for target, fd in enumerate(stdio):
+            os.dup2(fd, target)
+            os.close(fd)
+        sys.stdin = open(0, "r", encoding="utf-8", closefd=False)
+        sys.stdout = open(1, "w", encoding="utf-8", closefd=False)
+        sys.stderr = open(2, "w", encoding="utf-8", errors="backslashreplace", closefd=False)
+        ProcessSandboxExecutor()._make_preexec_fn(SandboxLimits(**request["limits"]))()
+        os.chdir(request["workdir"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+        sys.argv = [request["entrypoint"], *request.get("args", [])]
+        sys.path.insert(0, request["workdir"])
+        code = 0
+        try:
+            runpy.run_path(request["entrypoint"], run_name="__main__")
+        except SystemExit as exc:
+            code = exit_code_of(exc)
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except (OSError, ValueError):
+                pass
+    finally:
+        os._exit(code)
+
+
+def _usage(rusage: Any) -> Dict[str, Any]:
+    return {
+        "user_time": rusage.ru_utime,
+        "system_time": rusage.ru_stime,
+        "max_rss": rusage.ru_maxrss,
+        "minor_faults": rusage.ru_minflt,
+        "major_faults": rusage.ru_majflt,
+    }
+
+
+def serve(preload: Sequence[str]) -> None:
+    import importlib
+    import runpy  # noqa: F401 - импорты детей оплачиваются один раз в зиготе
+    import traceback  # noqa: F401
+
+    import sandbox.execution  # noqa: F401
+    from sandbox.pool_worker import read_message, write_message
+
+    # Протокол идёт по копиям исходных stdin/stdout; fd 0/1 детей — свои файлы
+    request_fd = os.dup(0)
+    response_fd = os.dup(1)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+    for module_name in preload:
+        try:
+            importlib.import_module(module_name)
+        except Exception as exc:  # noqa: BLE001 - preload необязателен
+            print(f"preload {module_name} failed: {exc}", file=sys.stderr)
+    # SIGCHLD будит select через wakeup fd; сам обработчик пуст
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_w, False)
+    signal.set_wakeup_fd(wake_w)
+    signal.signal(signal.SIGCHLD, lambda *_: None)
+    selector = selectors.DefaultSelector()
+    selector.register(request_fd, selectors.EVENT_READ)
+    selector.register(wake_r, selectors.EVENT_READ)
+    inherited_fds = (request_fd, response_fd, wake_r, wake_w)
+    running: Dict[int, int] = {}
+    write_message(response_fd, {"ready": os.getpid()})
+    while True:
+        for key, _ in selector.select():
+            if key.fd == wake_r:
+                os.read(wake_r, 4096)
+                while running:
+                    try:
+                        pid, status, rusage = os.wait4(-1, os.WNOHANG)
+                    except ChildProcessError:
+                        break
+                    if pid == 0:
+                        break
+                    job_id = running.pop(pid, None)
+                    if job_id is not None:
+                        write_message(
+                            response_fd,
+                            {
+                                "id": job_id,
+                                "pid": pid,
+                                "returncode": os.waitstatus_to_exitcode(status),
+                                "usage": _usage(rusage),
+                            },
+                        )
+                continue
+            request = read_message(request_fd)
+            if request is None:
+                for pid in running:
+                    _kill_group(pid)
+                return
+            pid = os.fork()
+            if pid == 0:
+                _run_child(request, inherited_fds)
+            running[pid] = request["id"]
+            write_message(response_fd, {"id": request["id"], "pid": pid})
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1:])
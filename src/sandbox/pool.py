@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Тёплый пул интерпретаторов для ProcessSandboxExecutor.
+
+Вместо нового `sys.executable` на каждый python_script job пул держит заранее
+запущенные процессы `pool_worker.py` под rlimit'ами песочницы: старт
+интерпретатора и импорт preload-модулей оплачиваются один раз на процесс.
+Процесс пересоздаётся после `max_jobs_per_worker` job'ов, после нарушения
+лимита, по таймауту и при любом обрыве протокола.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import signal
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from core.framing import FRAME_HEADER, decode_json, encode_json_frame, read_frame
+
+logger = logging.getLogger(__name__)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pool_worker.py")
+DEFAULT_MAX_JOBS_PER_WORKER = 100
+# Запуск интерпретатора с preload (numpy) укладывается с большим запасом
+SPAWN_TIMEOUT = 60.0
+
+# Протокол служебный: запросы и ответы без вывода job'а (он идёт через файлы).
+# pool_worker.py не импортирует пакеты проекта и повторяет это значение у себя
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+
+async def send_message(writer: asyncio.StreamWriter, message: Dict[str, Any]) -> None:
+    """Кадр core.framing с JSON в пайп вспомогательного процесса песочницы."""
+    writer.write(encode_json_frame(message, MAX_MESSAGE_SIZE))
+    await writer.drain()
+
+
+async def receive_message(reader: asyncio.StreamReader) -> Dict[str, Any]:
+    """Следующее сообщение процесса; FrameTooLarge (ValueError) — процесс объявил кадр больше лимита."""
+    body = await read_frame(reader, MAX_MESSAGE_SIZE)
+    if body is None:
+        raise asyncio.IncompleteReadError(b"", FRAME_HEADER.size)
+    return decode_json(body)
+
+
+@dataclass
+class PoolOutcome:
+    """Итог job'а в пуле: ответ процесса или причина, по которой его нет."""
+
+    response: Optional[Dict[str, Any]] = None
+    timed_out: bool = False
+    # Код завершения процесса, умершего посреди job'а (отрицательный — сигнал)
+    returncode: Optional[int] = None
+    usage: Dict[str, Any] = field(default_factory=dict)
+
+
+class _PoolWorker:
+    def __init__(self, proc: asyncio.subprocess.Process):
+        self.proc = proc
+        self.jobs = 0
+        # CPU нарастающим итогом за жизнь процесса и его жёсткий RLIMIT_CPU — из ответов процесса
+        self.cpu_used = 0.0
+        self.cpu_limit: Optional[int] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.returncode is None
+
+    def update_cpu(self, message: Dict[str, Any]) -> None:
+        self.cpu_used = message.get("cpu_used", self.cpu_used)
+        self.cpu_limit = message.get("cpu_limit", self.cpu_limit)
+
+    def cpu_headroom(self) -> float:
+        """Секунды CPU, которые процесс ещё может дать job'у до жёсткого лимита.
+
+        pool_worker ставит мягкий лимит job'а как int(потрачено) + 1 + бюджет.
+        """
+        if self.cpu_limit is None:
+            return float("inf")
+        return self.cpu_limit - int(self.cpu_used) - 1
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        await send_message(self.proc.stdin, message)
+
+    async def receive(self) -> Dict[str, Any]:
+        return await receive_message(self.proc.stdout)
+
+    def signal_group(self) -> None:
+        """SIGKILL группе процесса: job мог запустить свои подпроцессы."""
+        try:
+            os.killpg(self.proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    async def kill(self) -> Optional[int]:
+        if self.alive:
+            self.signal_group()
+        return await self.proc.wait()
+
+
+class InterpreterPool:
+    """Пул процессов `pool_worker.py`; job занимает процесс целиком."""
+
+    def __init__(
+        self,
+        size: int,
+        max_jobs_per_worker: int = DEFAULT_MAX_JOBS_PER_WORKER,
+        preload: Sequence[str] = (),
+        env: Optional[Dict[str, str]] = None,
+        preexec_fn: Optional[Callable[[], None]] = None,
+    ):
+        self.size = size
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.preload = list(preload)
+        self.env = env
+        self.preexec_fn = preexec_fn
+        self.stats = {"spawned": 0, "recycled": 0, "jobs": 0}
+        self._idle: List[_PoolWorker] = []
+        self._spawned = 0
+        self._available: Optional[asyncio.Condition] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> None:
+        """Заранее поднимает все процессы пула."""
+        self._bind_loop()
+        missing = self.size - self._spawned
+        self._spawned += missing
+        workers = await asyncio.gather(*(self._spawn() for _ in range(missing)), return_exceptions=True)
+        for worker in workers:
+            if isinstance(worker, BaseException):
+                self._spawned -= 1
+                logger.warning("Failed to start sandbox pool worker: %s", worker)
+            else:
+                self._idle.append(worker)
+        async with self._available:
+            self._available.notify_all()
+
+    async def run(self, request: Dict[str, Any], timeout: float) -> PoolOutcome:
+        worker = await self._acquire(request.get("cpu_time_seconds", 0))
+        reusable = False
+        try:
+            await worker.send(request)
+            response = await asyncio.wait_for(worker.receive(), timeout=timeout)
+            worker.update_cpu(response)
+            worker.jobs += 1
+            self.stats["jobs"] += 1
+            reusable = response.get("breach") is None and worker.jobs < self.max_jobs_per_worker
+            return PoolOutcome(response=response)
+        except asyncio.TimeoutError:
+            return PoolOutcome(timed_out=True, returncode=await worker.kill())
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            # Процесс умер посреди job'а (SIGXCPU, OOM killer) или испортил протокол
+            return PoolOutcome(returncode=await worker.kill())
+        finally:
+            await self._release(worker, reusable)
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.proc.stdin.close()
+            await worker.kill()
+        self._spawned -= len(idle)
+
+    async def _spawn(self) -> _PoolWorker:
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable,
+            WORKER_SCRIPT,
+            *self.preload,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            env=self.env,
+            preexec_fn=self.preexec_fn,
+        )
+        worker = _PoolWorker(proc)
+        try:
+            worker.update_cpu(await asyncio.wait_for(worker.receive(), timeout=SPAWN_TIMEOUT))
+        except BaseException:
+            await worker.kill()
+            raise
+        self.stats["spawned"] += 1
+        return worker
+
+    async def _acquire(self, cpu_seconds: float) -> _PoolWorker:
+        """Процесс, у которого до жёсткого RLIMIT_CPU хватает места на бюджет job'а.
+
+        Время жизни процесса (старт, preload, прошлые job'ы) копится против
+        жёсткого лимита пула: без этой проверки job в «выработанном» процессе
+        получил бы SIGKILL, сколько бы CPU ни потратил сам.
+        """
+        while True:
+            worker = await self._acquire_any()
+            # Свежий процесс лучше не станет: job получит то, что осталось
+            if worker.jobs == 0 or worker.cpu_headroom() >= cpu_seconds:
+                return worker
+            await self._release(worker, reusable=False)
+
+    async def _acquire_any(self) -> _PoolWorker:
+        self._bind_loop()
+        async with self._available:
+            while not self._idle and self._spawned >= self.size:
+                await self._available.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._spawned += 1
+        try:
+            return await self._spawn()
+        except BaseException:
+            async with self._available:
+                self._spawned -= 1
+                self._available.notify()
+            raise
+
+    async def _release(self, worker: _PoolWorker, reusable: bool) -> None:
+        if reusable and worker.alive:
+            self._idle.append(worker)
+        else:
+            self.stats["recycled"] += 1
+            worker.proc.stdin.close()
+            await worker.kill()
+            self._spawned -= 1
+        async with self._available:
+            self._available.notify()
+
+    def _bind_loop(self) -> None:
+        """Процессы привязаны к event loop, в котором созданы их пайпы."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        for worker in self._idle:
+            worker.signal_group()
+        self._idle = []
+        self._spawned = 0
+        self._available = asyncio.Condition()
+        self._loop = loop
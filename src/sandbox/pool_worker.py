@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Процесс тёплого пула ProcessSandboxExecutor.
+
+Запускается как отдельный скрипт с rlimit'ами песочницы, импортирует модули из
+argv и дальше исполняет job'ы по одному: запрос и ответ — кадры «длина + JSON»
+по исходным stdin/stdout. На время job'а fd 0/1/2 перенаправляются в файлы
+из запроса (их читает сама песочница, в том числе после таймаута),
+cwd, окружение, argv и sys.path подменяются, код исполняется runpy в чистом
+пространстве имён; после job'а всё возвращается, а модули из рабочего каталога
+выгружаются. Состояние интерпретатора, которое job мог испортить иначе,
+ограничено пересозданием процесса после N job'ов.
+
+Модуль не импортирует пакеты проекта: процесс стартует только с stdlib и
+модулями preload. Поэтому формат кадра core.framing и лимит
+`sandbox.pool.MAX_MESSAGE_SIZE` здесь повторены, а не импортированы.
+"""
+
+import importlib
+import json
+import os
+import runpy
+import struct
+import sys
+import time
+import traceback
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+HEADER = struct.Struct("!I")
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+_JOB_LIMITS = (
+    (resource.RLIMIT_CPU, resource.RLIMIT_AS, resource.RLIMIT_DATA, resource.RLIMIT_FSIZE, resource.RLIMIT_NOFILE)
+    if resource is not None
+    else ()
+)
+
+
+def read_message(fd):
+    header = _read_exact(fd, HEADER.size)
+    if header is None:
+        return None
+    (length,) = HEADER.unpack(header)
+    if length > MAX_MESSAGE_SIZE:
+        raise ValueError(f"Message of {length} bytes exceeds limit of {MAX_MESSAGE_SIZE}")
+    return json.loads(_read_exact(fd, length))
+
+
+def write_message(fd, message):
+    body = json.dumps(message).encode("utf-8")
+    if len(body) > MAX_MESSAGE_SIZE:
+        raise ValueError(f"Message of {len(body)} bytes exceeds limit of {MAX_MESSAGE_SIZE}")
+    data = memoryview(HEADER.pack(len(body)) + body)
+    while data:
+        written = os.write(fd, data)
+        data = data[written:]
+
+
+def _read_exact(fd, size):
+    chunks = []
+    while size:
+        chunk = os.read(fd, size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _cpu_used():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def cpu_status():
+    """Потраченный процессом CPU и жёсткий RLIMIT_CPU (None — без лимита) для пула."""
+    if resource is None:  # pragma: no cover
+        return {"cpu_used": 0.0, "cpu_limit": None}
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    return {"cpu_used": _cpu_used(), "cpu_limit": None if hard == resource.RLIM_INFINITY else hard}
+
+
+def _apply_job_limits(request):
+    """Мягкие лимиты на job в пределах жёстких лимитов процесса.
+
+    CPU считается нарастающим итогом за жизнь процесса, поэтому мягкий лимит —
+    уже потраченное время плюс бюджет job'а.
+    """
+    if resource is None:  # pragma: no cover
+        return
+    requested = (
+        (resource.RLIMIT_CPU, int(_cpu_used()) + 1 + int(request["cpu_time_seconds"])),
+        (resource.RLIMIT_AS, request["memory_bytes"]),
+        (resource.RLIMIT_DATA, request["memory_bytes"]),
+        (resource.RLIMIT_FSIZE, request["file_size_bytes"]),
+        (resource.RLIMIT_NOFILE, request["open_files"]),
+    )
+    for limit, soft in requested:
+        _, hard = resource.getrlimit(limit)
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        resource.setrlimit(limit, (soft, hard))
+
+
+def _reset_limits():
+    if resource is None:  # pragma: no cover
+        return
+    for limit in _JOB_LIMITS:
+        _, hard = resource.getrlimit(limit)
+        resource.setrlimit(limit, (hard, hard))
+
+
+def exit_code_of(exc):
+    """Код выхода процесса для SystemExit, как у интерпретатора."""
+    code = exc.code
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def run_job(request):
+    workdir = request["workdir"]
+    entrypoint = request["entrypoint"]
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+    out_fd = os.open(request["stdout_path"], flags, 0o600)
+    err_fd = os.open(request["stderr_path"], flags, 0o600)
+    in_fd = os.open(request.get("stdin_path") or os.devnull, os.O_RDONLY)
+    saved_fds = [os.dup(fd) for fd in (0, 1, 2)]
+    saved = (os.getcwd(), dict(os.environ), list(sys.argv), list(sys.path), set(sys.modules))
+    saved_streams = (sys.stdin, sys.stdout, sys.stderr)
+    breach = None
+    exit_code = 0
+    usage_before = resource.getrusage(resource.RUSAGE_SELF) if resource else None
+    started = time.perf_counter()
+    try:
+        for target, fd in ((0, in_fd), (1, out_fd), (2, err_fd)):
+            os.dup2(fd, target)
+        # Свежие объекты потоков: буфер stdin прошлого job'а не должен протечь
+        sys.stdin = open(0, "r", encoding="utf-8", closefd=False)
+        sys.stdout = open(1, "w", encoding="utf-8", closefd=False)
+        sys.stderr = open(2, "w", encoding="utf-8", errors="backslashreplace", closefd=False)
+        os.chdir(workdir)
+        os.environ.update(request.get("env") or {})
+        sys.argv = [entrypoint, *request.get("args", [])]
+        sys.path.insert(0, workdir)
+        _apply_job_limits(request)
+        try:
+            runpy.run_path(entrypoint, run_name="__main__")
+        except SystemExit as exc:
+            exit_code = exit_code_of(exc)
+        except MemoryError:
+            traceback.print_exc()
+            exit_code = 1
+            breach = "memory_limit"
+        except BaseException:
+            traceback.print_exc()
+            exit_code = 1
+    finally:
+        _reset_limits()
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except (OSError, ValueError):
+                pass
+        sys.stdin, sys.stdout, sys.stderr = saved_streams
+        runtime = time.perf_counter() - started
+        for target, fd in zip((0, 1, 2), saved_fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        for fd in (in_fd, out_fd, err_fd):
+            os.close(fd)
+        cwd, environ, argv, path, modules = saved
+        os.chdir(cwd)
+        os.environ.clear()
+        os.environ.update(environ)
+        sys.argv = argv
+        sys.path[:] = path
+        # Модули из рабочего каталога job'а: следующий job с тем же именем файла
+        # должен импортировать свою версию
+        for name in set(sys.modules) - modules:
+            module_file = getattr(sys.modules[name], "__file__", None) or ""
+            if module_file.startswith(workdir):
+                del sys.modules[name]
+    usage = {}
+    if usage_before is not None:
+        usage_after = resource.getrusage(resource.RUSAGE_SELF)
+        usage = {
+            "user_time": usage_after.ru_utime - usage_before.ru_utime,
+            "system_time": usage_after.ru_stime - usage_before.ru_stime,
+            "max_rss": usage_after.ru_maxrss,
+            "minor_faults": usage_after.ru_minflt - usage_before.ru_minflt,
+            "major_faults": usage_after.ru_majflt - usage_before.ru_majflt,
+        }
+    return {
+        "exit_code": exit_code,
+        "runtime": runtime,
+        "usage": usage,
+        "breach": breach,
+        **cpu_status(),
+    }
+
+
+def main():
+    # sys.path[0] — каталог этого скрипта: модули песочницы не должны перекрывать импорты job'ов
+    del sys.path[0]
+    # Протокол идёт по копиям исходных stdin/stdout; сами fd 0/1 job'ы получают свои
+    request_fd = os.dup(0)
+    response_fd = os.dup(1)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+    for module_name in sys.argv[1:]:
+        try:
+            importlib.import_module(module_name)
+        except ImportError:
+            pass
+    write_message(response_fd, {"ready": os.getpid(), **cpu_status()})
+    while True:
+        request = read_message(request_fd)
+        if request is None:
+            break
+        write_message(response_fd, run_job(request))
+
+
+if __name__ == "__main__":
+    main()
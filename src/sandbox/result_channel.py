@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Канал структурированного результата job'а песочницы.
+
+Вместо печати результата в stdout и разбора текста на стороне узла код в
+песочнице отдаёт значение через `emit(value)`: оно кодируется BinaryCodec
+(числовые массивы и однородные списки — сырым буфером) и записывается в файл,
+путь к которому песочница передаёт в переменной окружения
+`SANDBOX_RESULT_PATH`. Песочница декодирует файл после завершения job'а в
+`SandboxResult.value`. Файл, а не пайп или разделяемая память: канал
+одинаково работает для процесса на job, пула и fork-server, переживает
+убитый процесс и ограничен тем же RLIMIT_FSIZE. Код не на Python может
+записать туда JSON — кодек определяется по первому байту.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Tuple
+
+from core.protocol import BINARY_CODEC, Codec, codec_for_body
+
+RESULT_PATH_ENV = "SANDBOX_RESULT_PATH"
+
+
+def emit(value: Any, codec: Codec = BINARY_CODEC) -> None:
+    """Сторона job'а: записывает результат; повторный вызов заменяет прежний."""
+    path = os.environ.get(RESULT_PATH_ENV)
+    if not path:
+        raise RuntimeError(f"{RESULT_PATH_ENV} is not set: not running in a sandbox")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as fh:
+        fh.write(codec.encode(value))
+    # Переименование атомарно: убитый посреди записи job не оставит половину значения
+    os.replace(tmp_path, path)
+
+
+def read_result(path: str) -> Tuple[bool, Any]:
+    """Сторона песочницы: (был ли результат, значение); ValueError — значение не декодируется."""
+    try:
+        with open(path, "rb") as fh:
+            body = fh.read()
+    except FileNotFoundError:
+        return False, None
+    if not body:
+        raise ValueError("Empty result")
+    return True, codec_for_body(body).decode(body)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Потоковый захват stdout/stderr песочницы.
+
+Вывод job'а читается кусками по мере появления. В память (`SandboxResult.stdout`)
+попадает только голова потока до лимита байт, дальше счётчик отброшенного и
+маркер усечения. При заданном каталоге spill полный поток пишется в файл,
+как только превысит лимит. Каждый кусок может сразу уйти наружу через
+`SandboxStream` — асинхронный итератор для пересылки вывода по мере исполнения.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, List, Optional
+
+CHUNK_SIZE = 64 * 1024
+TRUNCATION_MARKER = "\n[output truncated: {dropped} bytes dropped]\n"
+
+_DONE = object()
+
+
+@dataclass
+class OutputChunk:
+    """Кусок вывода job'а: `stream` — "stdout" или "stderr"."""
+
+    stream: str
+    data: bytes
+
+
+OutputSink = Callable[[OutputChunk], Awaitable[None]]
+
+
+class StreamCapture:
+    """Голова потока в пределах `max_bytes` и, при переполнении, полный поток в spill-файл."""
+
+    def __init__(self, name: str, max_bytes: int, spill_path: Optional[str] = None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.spill_path = spill_path
+        self.total_bytes = 0
+        self._head: List[bytes] = []
+        self._head_bytes = 0
+        self._spill = None
+
+    @property
+    def dropped(self) -> int:
+        return self.total_bytes - self._head_bytes
+
+    @property
+    def spilled(self) -> bool:
+        return self._spill is not None
+
+    def feed(self, data: bytes) -> None:
+        self.total_bytes += len(data)
+        room = self.max_bytes - self._head_bytes
+        if room > 0:
+            self._head.append(data[:room])
+            self._head_bytes += min(room, len(data))
+        if self.dropped and self.spill_path is not None:
+            if self._spill is None:
+                # Голова уже в памяти: в файл уходит она и всё, что дальше
+                self._spill = open(self.spill_path, "wb")
+                self._spill.write(b"".join(self._head))
+                data = data[room:] if room > 0 else data
+            self._spill.write(data)
+
+    def close(self) -> None:
+        if self._spill is not None:
+            self._spill.close()
+
+    def text(self) -> str:
+        text = b"".join(self._head).decode("utf-8", errors="replace")
+        if self.dropped:
+            text += TRUNCATION_MARKER.format(dropped=self.dropped)
+        return text
+
+
+async def pump(reader: asyncio.StreamReader, capture: StreamCapture, sink: Optional[OutputSink]) -> None:
+    """Читает пайп до EOF в `capture`, отдавая куски в `sink`."""
+    while True:
+        chunk = await reader.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        capture.feed(chunk)
+        if sink is not None:
+            await sink(OutputChunk(capture.name, chunk))
+
+
+async def tail(
+    path: str,
+    capture: StreamCapture,
+    sink: Optional[OutputSink],
+    finished: asyncio.Event,
+    interval: float = 0.05,
+) -> None:
+    """Дочитывает растущий файл вывода, пока не выставлен `finished` и файл не кончился."""
+    with open(path, "rb") as fh:
+        while True:
+            # Флаг — до чтения: всё, записанное до завершения job'а, это чтение увидит
+            done = finished.is_set()
+            chunk = fh.read(CHUNK_SIZE)
+            if chunk:
+                capture.feed(chunk)
+                if sink is not None:
+                    await sink(OutputChunk(capture.name, chunk))
+                continue
+            if done:
+                return
+            try:
+                await asyncio.wait_for(finished.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+class SandboxStream:
+    """Вывод job'а асинхронным итератором; итоговый SandboxResult — в `result` после итерации.
+
+    Очередь кусков ограничена: медленный потребитель притормаживает чтение пайпа,
+    а не копит вывод в памяти. `aclose()` (или выход из `async with`) до конца
+    итерации отменяет job.
+    """
+
+    def __init__(self, run: Callable[[OutputSink], Awaitable[Any]], max_pending: int = 64):
+        self._run = run
+        self._queue: asyncio.Queue = asyncio.Queue(max_pending)
+        self._producer: Optional[asyncio.Task] = None
+        self._finished = False
+        self.result: Any = None
+
+    def __aiter__(self) -> "SandboxStream":
+        return self
+
+    async def __anext__(self) -> OutputChunk:
+        if self._finished:
+            raise StopAsyncIteration
+        if self._producer is None:
+            self._producer = asyncio.create_task(self._produce())
+        item = await self._queue.get()
+        if item is _DONE:
+            self._finished = True
+            self.result = await self._producer
+            raise StopAsyncIteration
+        return item
+
+    async def aclose(self) -> None:
+        self._finished = True
+        if self._producer is not None and not self._producer.done():
+            self._producer.cancel()
+            try:
+                await self._producer
+            except asyncio.CancelledError:
+                pass
+
+    async def __aenter__(self) -> "SandboxStream":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def _produce(self) -> Any:
+        try:
+            result = await self._run(self._queue.put)
+        except asyncio.CancelledError:
+            raise
+        except BaseException:
+            await self._queue.put(_DONE)
+            raise
+        await self._queue.put(_DONE)
+        return result
+
+
+def spill_path_for(spill_dir: Optional[str], workdir: str, name: str) -> Optional[str]:
+    """Путь spill-файла потока `name` job'а с рабочим каталогом `workdir`."""
+    if spill_dir is None:
+        return None
+    os.makedirs(spill_dir, exist_ok=True)
+    return os.path.join(spill_dir, f"{os.path.basename(workdir)}.{name}")
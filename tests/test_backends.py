@@ -0,0 +1,46 @@
+import pytest
+
+from core.backends import ProcessPoolBackend
+from core.node import ComputeNode
+from core.task import MapTask, RangeReduceTask, Task, TaskExecutor
+
+
+def test_process_pool_backend_accepts_only_large_picklable_payloads():
+    backend = ProcessPoolBackend(max_workers=1, min_offload_items=100)
+    assert backend.accepts("map", MapTask(data=list(range(100)), function="square"))
+    assert not backend.accepts("map", MapTask(data=[1, 2], function="square"))
+    assert not backend.accepts(
+        "map", MapTask(data=list(range(100)), function="filter", params={"function": lambda x: x > 1})
+    )
+    assert not backend.accepts("ml_inference", RangeReduceTask(start=0, end=1000, operation="sum"))
+
+
+@pytest.mark.asyncio
+async def test_builtin_jobs_run_in_process_pool():
+    backend = ProcessPoolBackend(max_workers=1, min_offload_items=1)
+    executor = TaskExecutor(max_concurrent_jobs=2, backend=backend)
+    try:
+        await backend.start()
+        task = Task.create_generic(
+            owner_id="tester",
+            code_ref={"type": "builtin", "handler": "map_expression", "function": "square"},
+            input_data=list(range(6)),
+            parallel={"mode": "map", "chunk_size": 2},
+        )
+        result = await executor.execute(task)
+        assert result["success"]
+        assert result["result"] == [x ** 2 for x in range(6)]
+        assert backend.stats["offloaded"] == 3
+    finally:
+        await executor.close()
+
+
+@pytest.mark.asyncio
+async def test_node_close_shuts_down_job_backend_pool():
+    backend = ProcessPoolBackend(max_workers=1, min_offload_items=1)
+    node = ComputeNode("127.0.0.1", 0, job_backend=backend)
+    await backend.start()
+    processes = list(backend._pool._processes.values())
+    await node.close()
+    assert backend._pool is None
+    assert all(not process.is_alive() for process in processes)
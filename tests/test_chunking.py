@@ -0,0 +1,148 @@
+import copy
+import pickle
+
+import numpy as np
+import pytest
+
+from core.chunking import AdaptiveChunker, ChunkView, materialize_payload
+from core.job import Job
+from core.node import ComputeNode
+from core.task import Task, TaskExecutor, TaskType
+from core.transport import InMemoryTransport
+
+
+def test_chunk_view_slices_lazily():
+    data = list(range(10))
+    chunk = ChunkView(data, 4, 4)
+    assert len(chunk) == 4
+    assert list(chunk) == [4, 5, 6, 7]
+    assert chunk[-1] == 7
+    assert list(chunk[1:3]) == [5, 6]
+    assert chunk.materialize() == [4, 5, 6, 7]
+    assert len(ChunkView(data, 8, 4)) == 2
+    with pytest.raises(IndexError):
+        chunk[4]
+
+
+def test_chunk_view_copies_share_source_and_pickle_only_the_chunk():
+    data = list(range(100_000))
+    chunk = ChunkView(data, 10, 5)
+    replica = copy.deepcopy({"input_data": chunk})["input_data"]
+    assert replica.source is data
+
+    restored = pickle.loads(pickle.dumps(chunk))
+    assert len(restored.source) == 5
+    assert restored.materialize() == [10, 11, 12, 13, 14]
+
+
+def test_chunk_view_over_ndarray_materializes_a_view():
+    arr = np.arange(20)
+    chunk = ChunkView(arr, 5, 5).materialize()
+    assert isinstance(chunk, np.ndarray)
+    assert np.shares_memory(chunk, arr)
+
+
+def test_split_does_not_copy_input_data():
+    executor = TaskExecutor()
+    data = list(range(1000))
+    task = Task.create_generic(
+        owner_id="o",
+        code_ref={"type": "builtin", "handler": "map_expression", "function": "square"},
+        input_data=data,
+        parallel={"mode": "map", "chunk_size": 300},
+    )
+    jobs = executor.iter_task_jobs(task)
+    first = next(jobs)
+    assert first.input_payload["input_data"].source is data
+    assert [len(job.input_payload["input_data"]) for job in jobs] == [300, 300, 100]
+
+    wire = materialize_payload(first.input_payload)
+    assert wire["input_data"] == list(range(300))
+    assert wire["code_ref"] is first.input_payload["code_ref"]
+
+
+@pytest.mark.asyncio
+async def test_execute_map_over_generator_and_ndarray_inputs():
+    executor = TaskExecutor()
+    task = Task.create_map(owner_id="o", data=(x for x in range(6)), function="square", task_params={"chunk_size": 4})
+    result = await executor.execute(task)
+    assert result["result"] == [x * x for x in range(6)]
+
+    typed = Task.create_map(owner_id="o", data=np.arange(600), function="square", task_params={"chunk_size": 256})
+    result = await executor.execute(typed)
+    assert isinstance(result["result"], np.ndarray)
+    assert result["result"].tolist() == [x * x for x in range(600)]
+
+
+@pytest.mark.asyncio
+async def test_generic_map_and_map_reduce_over_ndarray_input():
+    executor = TaskExecutor()
+    mapped = Task.create_generic(
+        owner_id="o",
+        code_ref={"type": "builtin", "handler": "map_expression", "function": "square"},
+        input_data=np.arange(10),
+        parallel={"mode": "map", "chunk_size": 3},
+    )
+    result = await executor.execute(mapped)
+    assert result["success"], result
+    # Чанк-ndarray — это элементы чанка, а не один элемент
+    assert list(result["result"]) == [x * x for x in range(10)]
+
+    reduced = Task.create_generic(
+        owner_id="o",
+        code_ref={"type": "builtin", "handler": "map_reduce", "map_function": "square", "reduce_function": "sum"},
+        input_data=np.arange(10),
+        parallel={"mode": "map_reduce", "chunk_size": 3},
+    )
+    result = await executor.execute(reduced)
+    assert result["success"], result
+    assert result["result"] == sum(x * x for x in range(10))
+
+
+def test_adaptive_chunker_targets_job_time():
+    chunker = AdaptiveChunker(target_job_ms=100, initial_chunk=64)
+    assert chunker.chunk_size("slow", 10_000) == 64
+    chunker.observe("slow", 10, 50.0)  # 5 мс на элемент
+    chunker.observe("cheap", 10_000, 1.0)
+    assert chunker.chunk_size("slow", 10_000) == 20
+    assert chunker.chunk_size("cheap", 10_000) == 10_000
+    assert chunker.chunk_size("cheap", 10_000, min_jobs=4) == 2_500
+    chunker.observe("slow", 10, 150.0)
+    assert chunker.per_item_ms("slow") == pytest.approx(5 + 0.3 * 10)
+
+
+def test_auto_chunk_size_follows_history_per_chunk():
+    executor = TaskExecutor(max_concurrent_jobs=1, chunker=AdaptiveChunker(target_job_ms=10, initial_chunk=100))
+    task = Task.create_generic(
+        owner_id="o",
+        code_ref={"type": "builtin", "handler": "map_expression", "function": "square"},
+        input_data=list(range(1000)),
+        parallel={"mode": "map", "chunk_size": "auto"},
+    )
+    jobs = executor.iter_task_jobs(task)
+    assert len(next(jobs).input_payload["input_data"]) == 100
+    # job оказался дорогим (1 мс на элемент): следующие чанки сжимаются до целевых 10 мс
+    executor.chunker.observe("map_expression:square", 100, 100.0)
+    assert [len(job.input_payload["input_data"]) for job in jobs][:2] == [10, 10]
+
+    fixed = Task.create_map(owner_id="o", data=list(range(10)), function="square", task_params={"chunk_size": 4})
+    fixed.parallel["target_job_ms"] = 5
+    assert len(executor.split_task_to_jobs(fixed)) == 3
+
+
+@pytest.mark.asyncio
+async def test_worker_runtime_feeds_coordinator_chunker():
+    transport = InMemoryTransport()
+    coordinator = ComputeNode(host="127.0.0.1", port=6100, transport=transport)
+    worker = ComputeNode(host="127.0.0.1", port=6101, transport=transport)
+    task = Task.create_map(owner_id=coordinator.node_id, data=[1, 2, 3], function="increment")
+    job = Job(
+        job_id=f"{task.task_id}:0",
+        task_id=task.task_id,
+        index=0,
+        task_type=TaskType.MAP.value,
+        input_payload={"function": "increment", "data": ChunkView([1, 2, 3], 0, 3), "params": {}},
+    )
+    result = await coordinator.assign_single_job_to_worker(worker.node_id, job, task)
+    assert result.output == [2, 3, 4]
+    assert coordinator.job_executor.chunker.per_item_ms("map:increment") is not None
@@ -0,0 +1,145 @@
+import math
+
+import pytest
+
+from core.combiner import ResultAccumulator, RunningReduce
+from core.job import JobResult
+from core.task import Task, TaskExecutor
+
+
+def _result(index, output, success=True, **metadata):
+    return JobResult(
+        job_id=f"t:{index}",
+        task_id="t",
+        worker_id="w",
+        output=output,
+        success=success,
+        metadata=metadata,
+    )
+
+
+@pytest.mark.parametrize(
+    "operation, expected",
+    [("sum", 21), ("product", 720), ("min", 1), ("max", 6), ("count", 6), ("average", 3.5)],
+)
+def test_running_reduce_matches_batch(operation, expected):
+    reducer = RunningReduce(operation)
+    reducer.add_many([3, 1, 2])
+    reducer.add_many([6, 5, 4])
+    assert reducer.result() == expected
+
+
+def test_running_reduce_empty_input():
+    assert RunningReduce("sum").result() == 0
+    assert RunningReduce("product").result() == 1
+    assert RunningReduce(None).result() is None
+    with pytest.raises(ValueError):
+        RunningReduce("min").result()
+
+
+def test_concat_restores_job_order_for_out_of_order_results():
+    acc = ResultAccumulator("concat")
+    acc.add(_result(2, [5, 6]), index=2)
+    acc.add(_result(0, [1, 2]), index=0)
+    acc.add(_result(1, None, success=False), index=1)
+    acc.add(_result(1, [3, 4]), index=1)
+    assert acc.result() == [1, 2, 3, 4, 5, 6]
+
+
+def test_range_average_uses_job_counts():
+    acc = ResultAccumulator("range", "average")
+    acc.add(_result(0, 3, count=3))
+    acc.add(_result(1, 12, count=3))
+    assert acc.result() == 2.5
+    assert acc.stats == {"results_seen": 2, "elements_reduced": 2}
+
+
+def test_reduce_keeps_only_running_value():
+    acc = ResultAccumulator("reduce", "sum")
+    for index in range(100):
+        acc.add(_result(index, list(range(10))))
+    assert acc.result() == 4500
+    assert acc.stats["elements_reduced"] == 1000
+
+
+def test_first_falls_back_to_failed_output():
+    acc = ResultAccumulator("first")
+    assert acc.result() is None
+    acc.add(_result(0, "boom", success=False))
+    assert acc.result() == "boom"
+    acc.add(_result(1, "ok"))
+    assert acc.result() == "ok"
+
+
+@pytest.mark.asyncio
+async def test_streaming_execute_matches_batch_combine():
+    executor = TaskExecutor(max_concurrent_jobs=4)
+    task = Task.create_map_reduce(
+        owner_id="tester",
+        data=list(range(1, 101)),
+        map_function="square",
+        reduce_function="sum",
+        task_params={"chunk_size": 7},
+    )
+    result = await executor.execute(task)
+    assert result["success"]
+    assert result["result"] == sum(x * x for x in range(1, 101))
+
+    jobs = executor.split_task_to_jobs(task)
+    job_results = [await executor._execute_job(task, job) for job in jobs]
+    assert executor.combine_job_results(task, job_results) == result["result"]
+
+
+def test_running_reduce_merges_partials():
+    reducer = RunningReduce("average")
+    reducer.merge(6, 3)
+    reducer.merge(0, 0)
+    reducer.merge(15, 2)
+    assert reducer.result() == 21 / 5
+    minimum = RunningReduce("min")
+    minimum.merge(None, 0)
+    minimum.merge(4, 2)
+    minimum.merge(1, 5)
+    assert minimum.result() == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("reduce_function", ["sum", "product", "min", "max", "count", "average"])
+async def test_worker_side_combiner_ships_one_scalar_per_job(reduce_function):
+    executor = TaskExecutor()
+    data = list(range(1, 41))
+    task = Task.create_generic(
+        owner_id="tester",
+        code_ref={"type": "builtin", "handler": "map_reduce", "map_function": "x", "reduce_function": reduce_function},
+        input_data=data,
+        parallel={"mode": "map_reduce", "chunk_size": 16},
+    )
+    jobs = executor.split_task_to_jobs(task)
+    job_results = [await executor._execute_job(task, job) for job in jobs]
+    assert [res.output["count"] for res in job_results] == [16, 16, 8]
+
+    expected = {
+        "sum": sum(data),
+        "product": math.prod(data),
+        "min": 1,
+        "max": 40,
+        "count": 40,
+        "average": sum(data) / len(data),
+    }[reduce_function]
+    assert executor.combine_job_results(task, job_results) == expected
+    assert (await executor.execute(task))["result"] == expected
+
+
+@pytest.mark.asyncio
+async def test_worker_side_combiner_can_be_disabled():
+    executor = TaskExecutor()
+    task = Task.create_generic(
+        owner_id="tester",
+        code_ref={"type": "builtin", "handler": "map_reduce", "map_function": "square", "reduce_function": "sum"},
+        input_data=[1, 2, 3, 4],
+        parallel={"mode": "map_reduce", "chunk_size": 2, "combiner": False},
+    )
+    jobs = executor.split_task_to_jobs(task)
+    job_results = [await executor._execute_job(task, job) for job in jobs]
+    assert [res.output for res in job_results] == [[1, 4], [9, 16]]
+    assert executor.combine_job_results(task, job_results) == 30
@@ -0,0 +1,194 @@
+import asyncio
+import json
+from decimal import Decimal
+
+import pytest
+
+from core.job import TaskStatus
+from core.node import NodeCapability
+from core.task import Task
+from main import ComputeNetwork
+
+
+def make_network(tmp_path, state_dir=None):
+    config = {"sandbox": {"type": "process_isolation"}}
+    if state_dir is not None:
+        config["state"] = {"directory": str(state_dir)}
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps(config))
+    network = ComputeNetwork("127.0.0.1", 0, config_file=str(config_file))
+    network.credit_manager.initialize_node("owner", Decimal("1000"))
+
+    async def send_message(message, target):
+        pass
+
+    network.node.send_message = send_message
+    return network
+
+
+def add_peer(network, peer_id="peer"):
+    network.node.peers[peer_id] = NodeCapability(
+        node_id=peer_id, cpu_score=100, gpu_score=0, ram_gb=16, max_parallel_tasks=4, min_price={}
+    ).to_dict()
+
+
+def blocking_executor(network, blocked):
+    """Задачи из `blocked` выполняются, пока не выставлено событие; остальные — сразу."""
+    release = asyncio.Event()
+
+    async def execute(task):
+        if task.task_id in blocked:
+            await release.wait()
+        return {"success": True, "result": 0, "task_status": TaskStatus.COMPLETED.value}
+
+    network.task_executor.execute = execute
+    return release
+
+
+async def wait_until(predicate, timeout=1.0):
+    # Заметно меньше прежнего 5-секундного цикла планировщика
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+def task_data():
+    return Task.create_range_reduce("owner", 0, 100, "sum").to_dict()
+
+
+@pytest.mark.asyncio
+async def test_submitted_task_is_scheduled_without_polling(tmp_path):
+    network = make_network(tmp_path)
+    add_peer(network)
+    blocking_executor(network, set())
+    network.running = True
+    scheduler = asyncio.create_task(network.task_scheduler())
+    try:
+        task_id = await network.submit_task(task_data())
+        await wait_until(lambda: task_id in network.active_tasks)
+        await wait_until(lambda: network.active_tasks[task_id]["status"] == TaskStatus.COMPLETED.value)
+        # Завершённой задаче таймер зависания не нужен
+        assert task_id not in network._stall_timers
+    finally:
+        await network.stop()
+        await scheduler
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("event", ["peers_changed", "job_result"])
+async def test_parked_task_is_requeued_on_node_event(tmp_path, event):
+    network = make_network(tmp_path)
+    blocking_executor(network, set())
+    network.running = True
+    scheduler = asyncio.create_task(network.task_scheduler())
+    try:
+        task_id = await network.submit_task(task_data())
+        # Пиров нет: задача откладывается и не переназначается сама по себе
+        await wait_until(lambda: task_id in network._parked_tasks)
+        assert task_id in network.pending_tasks
+        add_peer(network)
+        await asyncio.sleep(0.05)
+        assert task_id in network.pending_tasks
+        network.node._notify(event)
+        await wait_until(lambda: task_id in network.active_tasks)
+        assert not network._parked_tasks
+    finally:
+        await network.stop()
+        await scheduler
+
+
+@pytest.mark.asyncio
+async def test_task_parked_for_credits_is_requeued_on_top_up(tmp_path):
+    network = make_network(tmp_path)
+    add_peer(network)
+    blocking_executor(network, set())
+    network.running = True
+    scheduler = asyncio.create_task(network.task_scheduler())
+    try:
+        poor, other = (Task.create_range_reduce(owner, 0, 100, "sum").to_dict() for owner in ("poor", "other"))
+        poor_id, other_id = [await network.submit_task(task) for task in (poor, other)]
+        await wait_until(lambda: {poor_id, other_id} <= network._parked_tasks)
+        # Пополнение баланса будит только задачи этого владельца
+        network.credit_manager.add_credits("poor", Decimal("1000"))
+        await wait_until(lambda: poor_id in network.active_tasks)
+        assert other_id in network._parked_tasks
+        network.credit_manager.transfer_credits("owner", "other", Decimal("500"))
+        await wait_until(lambda: other_id in network.active_tasks)
+        assert not network._parked_tasks
+    finally:
+        await network.stop()
+        await scheduler
+
+
+@pytest.mark.asyncio
+async def test_stall_timer_is_cancelled_on_completion_and_cancel(tmp_path):
+    network = make_network(tmp_path)
+    add_peer(network)
+    network.running = True
+    scheduler = asyncio.create_task(network.task_scheduler())
+    try:
+        finishing, cancelled = [await network.submit_task(task_data()) for _ in range(2)]
+        release = blocking_executor(network, {finishing, cancelled})
+        await wait_until(lambda: finishing in network._stall_timers and cancelled in network._stall_timers)
+        timers = dict(network._stall_timers)
+        descriptors = network.node.task_descriptors
+        for task_id in (finishing, cancelled):
+            descriptors.describe(network.active_tasks[task_id]["task"])
+
+        await network.cancel_task(cancelled, "test")
+        assert cancelled not in network._stall_timers
+        assert timers[cancelled].cancelled()
+        assert not timers[finishing].cancelled()
+        # Дескриптор отменённой задачи координатору больше не нужен
+        assert cancelled not in descriptors
+        assert finishing in descriptors
+
+        release.set()
+        await wait_until(lambda: network.active_tasks[finishing]["status"] == TaskStatus.COMPLETED.value)
+        assert finishing not in network._stall_timers
+        assert timers[finishing].cancelled()
+        assert finishing not in descriptors
+    finally:
+        await network.stop()
+        await scheduler
+
+
+@pytest.mark.asyncio
+async def test_task_journal_recovers_pending_and_active_tasks(tmp_path):
+    state_dir = tmp_path / "state"
+    network = make_network(tmp_path, state_dir)
+    add_peer(network)
+    waiting, running, cancelled, completed = [await network.submit_task(task_data()) for _ in range(4)]
+    release = blocking_executor(network, {running, cancelled})
+    for task_id in (running, cancelled, completed):
+        await network.assign_task(task_id, network.pending_tasks[task_id])
+    await wait_until(lambda: network.active_tasks[completed]["status"] == TaskStatus.COMPLETED.value)
+    await wait_until(lambda: network.active_tasks[running]["status"] == TaskStatus.RUNNING.value)
+    await network.cancel_task(cancelled, "test")
+    assert cancelled not in network.active_tasks
+    await network.stop()
+    release.set()
+
+    recovered = make_network(tmp_path, state_dir)
+    # Прерванная задача возвращается в pending и снова стоит в очереди планировщика
+    assert set(recovered.pending_tasks) == {waiting, running}
+    assert recovered.pending_tasks[running]["status"] == TaskStatus.PENDING.value
+    assert recovered.pending_tasks[running]["task"]["task_id"] == running
+    assert set(recovered.active_tasks) == {completed}
+    completed_info = recovered.active_tasks[completed]
+    assert completed_info["status"] == TaskStatus.COMPLETED.value
+    assert completed_info["worker_id"] == "peer"
+    assert isinstance(completed_info["task"], Task)
+    queued = {recovered._schedule_queue.get_nowait() for _ in range(recovered._schedule_queue.qsize())}
+    assert queued == {waiting, running}
+    # Второй рестарт читает снапшот (_task_snapshot_records), а не историю переходов
+    recovered.task_journal.compact()
+    await recovered.stop()
+
+    again = make_network(tmp_path, state_dir)
+    assert again.task_journal.snapshot_size > 0
+    assert set(again.pending_tasks) == {waiting, running}
+    assert set(again.active_tasks) == {completed}
+    assert again.active_tasks[completed]["status"] == TaskStatus.COMPLETED.value
+    await again.stop()
@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 
 from core.task import Task, TaskExecutor, TaskPriority
@@ -84,3 +86,56 @@ async def test_generic_map_reduce():
     result = await executor.execute(task)
     assert result["success"]
     assert result["result"] == 6
+
+
+class _SlowExecutor(TaskExecutor):
+    """Executor, который считает одновременно исполняемые job'ы."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.active = 0
+        self.peak = 0
+        self.fail_once = set()
+
+    async def _execute_job(self, task, job):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            # последние чанки завершаются раньше первых
+            await asyncio.sleep(0.01 * (10 - job.index))
+            if job.job_id in self.fail_once:
+                self.fail_once.discard(job.job_id)
+                raise RuntimeError("flaky worker")
+            return await super()._execute_job(task, job)
+        finally:
+            self.active -= 1
+
+
+@pytest.mark.asyncio
+async def test_execute_dispatches_jobs_concurrently():
+    executor = _SlowExecutor(max_concurrent_jobs=4)
+    task = Task.create_generic(
+        owner_id="tester",
+        code_ref={"type": "builtin", "handler": "map_expression", "function": "square"},
+        input_data=list(range(10)),
+        parallel={"mode": "map", "chunk_size": 1},
+    )
+    executor.fail_once.add(f"{task.task_id}:3")
+    result = await executor.execute(task)
+    assert result["success"]
+    assert result["result"] == [x ** 2 for x in range(10)]
+    assert executor.peak == 4
+
+
+@pytest.mark.asyncio
+async def test_max_in_flight_override_per_task():
+    executor = _SlowExecutor(max_concurrent_jobs=8)
+    task = Task.create_generic(
+        owner_id="tester",
+        code_ref={"type": "builtin", "handler": "map_expression", "function": "x"},
+        input_data=[1, 2, 3, 4],
+        parallel={"mode": "map", "chunk_size": 1, "max_in_flight": 1},
+    )
+    result = await executor.execute(task)
+    assert result["result"] == [1, 2, 3, 4]
+    assert executor.peak == 1
@@ -0,0 +1,48 @@
+import asyncio
+import json
+
+import pytest
+
+from core.framing import FrameDecoder, FrameTooLarge, decode_json, encode_json_frame, read_frame
+
+
+def test_decoder_handles_split_and_coalesced_frames():
+    messages = [{"n": n, "blob": "x" * (n * 3000)} for n in range(5)]
+    stream = b"".join(encode_json_frame(message) for message in messages)
+    decoder = FrameDecoder()
+    decoded = []
+    # Куски не совпадают с границами кадров: и 4 KB, и по байту заголовка
+    for size in (4096, 1, 7):
+        decoded.clear()
+        for start in range(0, len(stream), size):
+            decoded.extend(decode_json(body) for body in decoder.feed(stream[start:start + size]))
+        assert decoded == messages
+        assert decoder.pending == 0
+
+    decoded = [decode_json(body) for body in decoder.feed(stream)]
+    assert decoded == messages
+
+
+def test_decoder_rejects_oversized_frame_before_buffering():
+    decoder = FrameDecoder(max_frame_size=1024)
+    frame = encode_json_frame({"blob": "x" * 4096})
+    with pytest.raises(FrameTooLarge):
+        decoder.feed(frame[:8])
+    with pytest.raises(FrameTooLarge):
+        encode_json_frame({"blob": "x" * 4096}, max_frame_size=1024)
+
+
+@pytest.mark.asyncio
+async def test_read_frame_from_stream():
+    reader = asyncio.StreamReader()
+    reader.feed_data(encode_json_frame({"a": 1}) + encode_json_frame({"b": [1, 2]}))
+    reader.feed_eof()
+    assert json.loads(await read_frame(reader)) == {"a": 1}
+    assert json.loads(await read_frame(reader)) == {"b": [1, 2]}
+    assert await read_frame(reader) is None
+
+    truncated = asyncio.StreamReader()
+    truncated.feed_data(encode_json_frame({"a": 1})[:-2])
+    truncated.feed_eof()
+    with pytest.raises(asyncio.IncompleteReadError):
+        await read_frame(truncated)
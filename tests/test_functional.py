@@ -17,8 +17,25 @@ async def test_privacy_mask_map_restores_order():
     )
     result = await executor.execute(task)
     assert result["success"]
-    # Порядок восстановлен, функция increment (по текущей реализации map) даёт +1
-    assert result["result"] == [2, 3, 4, 5]
+    # Порядок восстановлен после маскировки
+    assert result["result"] == [1, 4, 9, 16]
+
+
+@pytest.mark.asyncio
+async def test_chunked_typed_map_runs_each_chunk_with_its_function():
+    executor = TaskExecutor()
+    task = Task.create_map(
+        owner_id="tester",
+        data=[1, 2, 3, 4, 5],
+        function="square",
+        task_params={"chunk_size": 2},
+        privacy={"mode": "none", "zk_verify": "off"},
+        requirements={"cpu_percent": 1.0, "ram_gb": 0.1},
+        config={"priority": TaskPriority.NORMAL.value},
+    )
+    result = await executor.execute(task)
+    assert result["success"]
+    assert result["result"] == [1, 4, 9, 16, 25]
 
 
 @pytest.mark.asyncio
@@ -58,6 +75,32 @@ async def test_generic_python_script_with_sandbox():
     assert result["result"].strip() == "6"
 
 
+@pytest.mark.asyncio
+async def test_generic_python_script_result_channel():
+    executor = TaskExecutor()
+    executor.sandbox_executor = ProcessSandboxExecutor()
+    task = Task.create_generic(
+        owner_id="tester",
+        code_ref={
+            "type": "python_script",
+            "entry": "script.py",
+            "source": (
+                "from sandbox.result_channel import emit\n"
+                "print('log line')\n"
+                "emit({'total': 6, 'values': [1.5, 2.5, 3.5]})\n"
+            ),
+        },
+        input_data=None,
+        requirements={"cpu_percent": 1.0, "ram_gb": 0.1, "timeout_seconds": 5},
+        config={"priority": TaskPriority.NORMAL.value},
+        parallel={"mode": "single"},
+    )
+    result = await executor.execute(task)
+    assert result["success"]
+    # Значение из канала результата, а не stdout
+    assert result["result"] == {"total": 6, "values": [1.5, 2.5, 3.5]}
+
+
 @pytest.mark.asyncio
 async def test_pipeline_map_reduce_flow():
     executor = TaskExecutor()
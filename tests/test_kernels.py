@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from core import kernels
+from core.task import MapReduceTask, MapTask, TaskExecutor
+
+
+def test_vector_map_matches_python_for_homogeneous_chunks():
+    ints = list(range(-500, 500))
+    floats = [x / 3 for x in ints]
+    assert kernels.vector_map("square", ints) == [x ** 2 for x in ints]
+    assert kernels.vector_map("increment", ints, {"increment": 7}) == [x + 7 for x in ints]
+    assert kernels.vector_map("square", floats) == [x ** 2 for x in floats]
+    result = kernels.vector_map("square", ints)
+    assert all(type(x) is int for x in result)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        [1, 2.5] * 200,  # смешанные типы
+        [True, False] * 200,  # bool не считаем числами
+        [2 ** 40] * 300,  # квадрат переполнит int64
+        [2 ** 70] * 300,  # не помещается в int64
+        list(range(10)),  # слишком короткий чанк
+    ],
+)
+def test_vector_map_falls_back(data):
+    assert kernels.vector_map("square", data) is None
+
+
+def test_vector_map_keeps_ndarray_end_to_end():
+    arr = np.arange(10, dtype=np.int64)
+    result = kernels.vector_map("square", arr)
+    assert isinstance(result, np.ndarray)
+    assert result.tolist() == [x ** 2 for x in range(10)]
+
+
+def test_vector_map_reduce_and_overflow_guards():
+    data = list(range(1, 1001))
+    assert kernels.vector_map_reduce("square", "sum", data) == sum(x ** 2 for x in data)
+    assert kernels.vector_map_reduce("x", "count", data) == 1000
+    assert kernels.vector_map_reduce("x", "product", [0] + data) == 0
+    # произведение 1..1000 не помещается в int64 — уходим в python
+    assert kernels.vector_map_reduce("x", "product", data) is None
+    assert kernels.vector_reduce("sum", [3] * 300) == 900
+
+
+def test_executor_uses_kernels_transparently():
+    executor = TaskExecutor()
+    data = list(range(2000))
+    assert executor._execute_map(MapTask(data=data, function="square")) == [x ** 2 for x in data]
+    mixed = [1, "a"] * 200
+    assert executor._execute_map(MapTask(data=mixed, function="x")) == mixed
+    task = MapReduceTask(data=data, map_function="increment", reduce_function="sum", params={"increment": 2})
+    assert executor._execute_map_reduce(task) == sum(x + 2 for x in data)
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from core import matrix
+from core.task import Task, TaskExecutor
+
+
+def _random(n, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, n))
+
+
+def test_multiply_matches_pure_python_and_keeps_lists():
+    a = [[1, 2, 3], [4, 5, 6]]
+    b = [[7, 8], [9, 10], [11, 12]]
+    assert matrix.execute("multiply", a, b) == [[58, 64], [139, 154]]
+    # большие int не переполняют int64, а считаются точно
+    big = [[2 ** 40, 1], [1, 2 ** 40]]
+    assert matrix.execute("multiply", big, big)[0][0] == 2 ** 80 + 1
+
+
+def test_ndarray_inputs_stay_arrays():
+    a = _random(8)
+    result = matrix.execute("multiply", a, np.eye(8))
+    assert isinstance(result, np.ndarray)
+    assert np.allclose(result, a)
+    assert isinstance(matrix.execute("transpose", a), np.ndarray)
+
+
+@pytest.mark.parametrize("method", ["lu", "qr", "svd", "cholesky"])
+def test_decompositions_reconstruct_input(method):
+    a = _random(6, seed=1)
+    if method == "cholesky":
+        a = a @ a.T + 6 * np.eye(6)
+    factors = matrix.execute("decompose", a, params={"method": method})
+    if method == "lu":
+        rebuilt = factors["p"] @ factors["l"] @ factors["u"]
+        assert np.allclose(np.triu(factors["u"]), factors["u"])
+    elif method == "qr":
+        rebuilt = factors["q"] @ factors["r"]
+    elif method == "svd":
+        rebuilt = factors["u"] @ np.diag(factors["s"]) @ factors["vt"]
+    else:
+        rebuilt = factors["l"] @ factors["l"].T
+    assert np.allclose(rebuilt, a)
+
+
+def test_invalid_inputs_raise_value_error():
+    with pytest.raises(ValueError):
+        matrix.execute("multiply", [[1, 2]], [[1, 2]])
+    with pytest.raises(ValueError):
+        matrix.execute("decompose", [[1.0, 2.0], [2.0, 1.0]], params={"method": "cholesky"})
+    with pytest.raises(ValueError):
+        matrix.execute("decompose", [[1.0]], params={"method": "eigen"})
+
+
+@pytest.mark.asyncio
+async def test_execute_matrix_ops_task_end_to_end():
+    executor = TaskExecutor()
+    a = _random(5, seed=2)
+    task = Task.create_matrix_ops("o", "inverse", a)
+    result = await executor.execute(task)
+    assert result["success"]
+    assert np.allclose(result["result"] @ a, np.eye(5))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("as_array", [False, True])
+async def test_tiled_multiply_fans_out_and_assembles(as_array):
+    executor = TaskExecutor()
+    rng = np.random.default_rng(3)
+    a = rng.integers(-5, 5, size=(7, 5))
+    b = rng.integers(-5, 5, size=(5, 6))
+    if not as_array:
+        a, b = a.tolist(), b.tolist()
+    task = Task.create_matrix_ops("o", "multiply", a, b, task_params={"tile_size": 3})
+    jobs = executor.split_task_to_jobs(task)
+    # 3 блока по строкам x 2 по столбцам x 2 по внутренней размерности
+    assert len(jobs) == 12
+    assert {tuple(job.input_payload["tile"]) for job in jobs} == {
+        (i, j, k) for i in (0, 3, 6) for j in (0, 3) for k in (0, 3)
+    }
+    result = await executor.execute(task)
+    assert result["success"]
+    assert isinstance(result["result"], np.ndarray) == as_array
+    assert np.array_equal(np.asarray(result["result"]), np.asarray(a) @ np.asarray(b))
+
+
+def test_tiled_combine_requires_every_tile():
+    executor = TaskExecutor()
+    task = Task.create_matrix_ops("o", "multiply", [[1, 2], [3, 4]], [[1, 0], [0, 1]], task_params={"tile_size": 1})
+    from core.job import JobResult
+
+    partial = [
+        JobResult(job_id="j", task_id=task.task_id, worker_id="w", output={"tile": [0, 0, 0], "block": [[1]]}, success=True)
+    ]
+    assert executor.combine_job_results(task, partial) is None
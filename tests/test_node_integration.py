@@ -2,9 +2,10 @@ import asyncio
 
 import pytest
 
-from core.job import Job, JobStatus
+from core.job import Job, JobResult, JobStatus
 from core.node import ComputeNode
 from core.protocol import JobResultPayload, MessageEnvelope, MessageType
+from core.speculation import RuntimeDistribution, SpeculationPolicy
 from core.task import Task, TaskPriority, TaskType
 from core.transport import InMemoryTransport
 
@@ -135,3 +136,272 @@ async def test_node_job_result_failure_records_reputation():
     )
     await node._handle_job_result(envelope)
     assert rep.events  # reputation event added
+
+
+@pytest.mark.asyncio
+async def test_task_snapshot_sent_once_per_worker_and_resent_after_eviction():
+    transport = InMemoryTransport()
+    coordinator = ComputeNode(host="127.0.0.1", port=7020, transport=transport)
+    worker = ComputeNode(host="127.0.0.1", port=7021, transport=transport)
+    assigns = []
+    worker_handler = transport._handlers[worker.node_id]
+
+    async def spy(envelope):
+        if envelope.msg_type == MessageType.JOB_ASSIGN:
+            assigns.append("task_snapshot" in envelope.payload["input_payload"])
+        await worker_handler(envelope)
+
+    transport.register_handler(worker.node_id, spy)
+    task = Task.create_map(owner_id=coordinator.node_id, data=list(range(6)), function="square")
+
+    def make_job(index):
+        data = list(range(index * 2, index * 2 + 2))
+        return Job(
+            job_id=f"{task.task_id}:{index}",
+            task_id=task.task_id,
+            index=index,
+            task_type=TaskType.MAP.value,
+            input_payload={"function": "square", "data": data, "params": {}},
+        )
+
+    outputs = [(await coordinator.assign_single_job_to_worker(worker.node_id, make_job(i), task)).output for i in range(2)]
+    assert outputs == [[0, 1], [4, 9]]
+    assert assigns == [True, False]
+    assert worker.task_cache.hits == 1
+
+    # Воркер потерял дескриптор: job переотправляется со snapshot без штрафа
+    worker.task_cache = type(worker.task_cache)()
+    result = await coordinator.assign_single_job_to_worker(worker.node_id, make_job(2), task)
+    assert result.output == [16, 25]
+    assert assigns == [True, False, False, True]
+    assert coordinator.reputation["penalties"] == 0
+
+    # Завершённая задача забыта: ни snapshot, ни отметок воркеров не остаётся
+    task_hash, _ = coordinator.task_descriptors.describe(task)
+    coordinator.task_descriptors.forget(task.task_id)
+    assert task.task_id not in coordinator.task_descriptors
+    assert not coordinator.task_descriptors.worker_has(worker.node_id, task_hash)
+
+
+@pytest.mark.asyncio
+async def test_assign_jobs_pipelines_across_workers_within_window():
+    transport = InMemoryTransport()
+    coordinator = ComputeNode(host="127.0.0.1", port=7030, transport=transport)
+    workers = [ComputeNode(host="127.0.0.1", port=7031 + i, transport=transport) for i in range(2)]
+    active = {worker.node_id: 0 for worker in workers}
+    peak = dict(active)
+
+    def tracking(worker):
+        original = worker.job_executor.execute_single_job
+
+        async def execute(task, job):
+            active[worker.node_id] += 1
+            peak[worker.node_id] = max(peak[worker.node_id], active[worker.node_id])
+            await asyncio.sleep(0.01)
+            try:
+                return await original(task, job)
+            finally:
+                active[worker.node_id] -= 1
+
+        return execute
+
+    for worker in workers:
+        worker.job_executor.execute_single_job = tracking(worker)
+    task = Task.create_map(owner_id=coordinator.node_id, data=list(range(20)), function="increment")
+    jobs = (
+        Job(
+            job_id=f"{task.task_id}:{i}",
+            task_id=task.task_id,
+            index=i,
+            task_type=TaskType.MAP.value,
+            input_payload={"function": "increment", "data": [i], "params": {"increment": 1}},
+        )
+        for i in range(20)
+    )
+
+    results = [result async for result in coordinator.assign_jobs(jobs, task, [w.node_id for w in workers], window=3)]
+    assert sorted(result.output[0] for result in results) == list(range(1, 21))
+    assert all(result.success for result in results)
+    assert {result.worker_id for result in results} == {w.node_id for w in workers}
+    assert all(1 < value <= 3 for value in peak.values())
+
+
+@pytest.mark.asyncio
+async def test_assign_jobs_speculates_on_straggler_and_cancels_loser():
+    transport = InMemoryTransport()
+    coordinator = ComputeNode(host="127.0.0.1", port=7040, transport=transport)
+    fast, slow = (ComputeNode(host="127.0.0.1", port=7041 + i, transport=transport) for i in range(2))
+    cancelled = []
+    original = slow.job_executor.execute_single_job
+
+    async def straggle(task, job):
+        if job.job_id.endswith(":9"):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(job.job_id)
+                raise
+        return await original(task, job)
+
+    slow.job_executor.execute_single_job = straggle
+    task = Task.create_map(owner_id=coordinator.node_id, data=list(range(10)), function="increment")
+    jobs = [
+        Job(
+            job_id=f"{task.task_id}:{i}",
+            task_id=task.task_id,
+            index=i,
+            task_type=TaskType.MAP.value,
+            input_payload={"function": "increment", "data": [i], "params": {"increment": 1}},
+        )
+        for i in range(10)
+    ]
+    # Первые job'ы наполняют распределение runtime задачи
+    for job in jobs[:9]:
+        await coordinator.assign_single_job_to_worker(fast.node_id, job, task)
+    policy = SpeculationPolicy(min_samples=5, min_delay_s=0.05)
+
+    started = asyncio.get_running_loop().time()
+    results = [
+        result
+        async for result in coordinator.assign_jobs(jobs[9:], task, [slow.node_id, fast.node_id], window=1, speculation=policy)
+    ]
+    elapsed = asyncio.get_running_loop().time() - started
+    assert elapsed < 2
+    assert [result.output for result in results] == [[10]]
+    assert results[0].worker_id == fast.node_id
+    assert coordinator.speculation_stats == {"launched": 1, "won": 1}
+    await asyncio.sleep(0.01)
+    assert cancelled == [jobs[9].job_id]
+    assert coordinator.scheduler_state.jobs_by_id[jobs[9].job_id].status == JobStatus.COMPLETED
+
+    # Поздний результат проигравшей копии отбрасывается
+    late = JobResultPayload(
+        task_id=task.task_id, job_id=jobs[9].job_id, success=False, output=None,
+        error="late", runtime_ms=5000.0, worker_id=slow.node_id, attempt=1,
+    )
+    failed_before = coordinator.reputation["failed_tasks"]
+    await coordinator._handle_job_result(
+        MessageEnvelope.create(MessageType.JOB_RESULT, slow.node_id, coordinator.node_id, late.to_dict())
+    )
+    assert coordinator.reputation["failed_tasks"] == failed_before
+    assert coordinator.scheduler_state.jobs_by_id[jobs[9].job_id].status == JobStatus.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_speculative_backup_wins_over_slow_failing_primary():
+    transport = InMemoryTransport()
+    coordinator = ComputeNode(host="127.0.0.1", port=7050, transport=transport)
+    primary, backup = (ComputeNode(host="127.0.0.1", port=7051 + i, transport=transport) for i in range(2))
+
+    def delayed(node, delay, fail):
+        original = node.job_executor.execute_single_job
+
+        async def execute(task, job):
+            if job.job_id.endswith(":9"):
+                await asyncio.sleep(delay)
+                if fail:
+                    return JobResult(job.job_id, task.task_id, node.node_id, None, False, "primary failed")
+            return await original(task, job)
+
+        node.job_executor.execute_single_job = execute
+
+    # Неудача исходной копии приходит раньше успеха резервной
+    delayed(primary, 0.2, fail=True)
+    delayed(backup, 0.4, fail=False)
+    task = Task.create_map(owner_id=coordinator.node_id, data=list(range(10)), function="increment")
+    jobs = [
+        Job(
+            job_id=f"{task.task_id}:{i}",
+            task_id=task.task_id,
+            index=i,
+            task_type=TaskType.MAP.value,
+            input_payload={"function": "increment", "data": [i], "params": {"increment": 1}},
+        )
+        for i in range(10)
+    ]
+    for job in jobs[:9]:
+        await coordinator.assign_single_job_to_worker(backup.node_id, job, task)
+    policy = SpeculationPolicy(min_samples=5, min_delay_s=0.05)
+
+    result = await coordinator.assign_single_job_to_worker(
+        primary.node_id, jobs[9], task, speculation=policy, backup_workers=[primary.node_id, backup.node_id],
+    )
+    assert result.success
+    assert result.output == [10]
+    assert result.worker_id == backup.node_id
+    assert result.attempt == 1
+    assert coordinator.speculation_stats == {"launched": 1, "won": 1}
+    assert coordinator.scheduler_state.jobs_by_id[jobs[9].job_id].status == JobStatus.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_speculative_copy_without_descriptor_is_resent_with_snapshot():
+    transport = InMemoryTransport()
+    coordinator = ComputeNode(host="127.0.0.1", port=7060, transport=transport)
+    fast, slow = (ComputeNode(host="127.0.0.1", port=7061 + i, transport=transport) for i in range(2))
+    cancelled = []
+    assigns = []
+    original = slow.job_executor.execute_single_job
+    fast_handler = transport._handlers[fast.node_id]
+
+    async def straggle(task, job):
+        if job.job_id.endswith(":9"):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(job.job_id)
+                raise
+        return await original(task, job)
+
+    async def spy(envelope):
+        if envelope.msg_type == MessageType.JOB_ASSIGN and envelope.payload["job_id"].endswith(":9"):
+            assigns.append("task_snapshot" in envelope.payload["input_payload"])
+        await fast_handler(envelope)
+
+    slow.job_executor.execute_single_job = straggle
+    transport.register_handler(fast.node_id, spy)
+    task = Task.create_map(owner_id=coordinator.node_id, data=list(range(10)), function="increment")
+    jobs = [
+        Job(
+            job_id=f"{task.task_id}:{i}",
+            task_id=task.task_id,
+            index=i,
+            task_type=TaskType.MAP.value,
+            input_payload={"function": "increment", "data": [i], "params": {"increment": 1}},
+        )
+        for i in range(10)
+    ]
+    for job in jobs[:9]:
+        await coordinator.assign_single_job_to_worker(fast.node_id, job, task)
+    # Резервный воркер вытеснил дескриптор: его копия ответит TASK_DESCRIPTOR_MISSING
+    fast.task_cache = type(fast.task_cache)()
+    policy = SpeculationPolicy(min_samples=5, min_delay_s=0.05)
+
+    started = asyncio.get_running_loop().time()
+    result = await coordinator.assign_single_job_to_worker(
+        slow.node_id, jobs[9], task, speculation=policy, backup_workers=[slow.node_id, fast.node_id],
+    )
+    assert asyncio.get_running_loop().time() - started < 2
+    assert result.success
+    assert result.output == [10]
+    assert result.worker_id == fast.node_id
+    assert result.attempt == 1
+    assert assigns == [False, True]
+    assert coordinator.speculation_stats == {"launched": 1, "won": 1}
+    assert coordinator.reputation["penalties"] == 0
+    await asyncio.sleep(0.01)
+    assert cancelled == [jobs[9].job_id]
+
+
+def test_runtime_distribution_threshold():
+    runtimes = RuntimeDistribution(window=4)
+    policy = SpeculationPolicy(percentile=0.5, multiplier=2.0, min_samples=3, min_delay_s=0.0)
+    runtimes.observe(100.0)
+    runtimes.observe(300.0)
+    assert policy.threshold_s(runtimes) is None
+    runtimes.observe(200.0)
+    assert policy.threshold_s(runtimes) == pytest.approx(0.4)
+    # Окно скользящее: старые выбросы вытесняются
+    for _ in range(4):
+        runtimes.observe(10.0)
+    assert runtimes.percentile(1.0) == 10.0
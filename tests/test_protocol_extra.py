@@ -12,3 +12,35 @@ def test_job_fail_payload_roundtrip():
     as_dict = payload.to_dict()
     restored = JobFailPayload.from_dict(as_dict)
     assert restored.reason == "no_resources"
+
+
+def test_binary_codec_roundtrip_and_detection():
+    import numpy as np
+
+    from core.protocol import BINARY_CODEC, JSON_CODEC, MessageEnvelope, MessageType, codec_for_body
+
+    envelope = MessageEnvelope.create(
+        MessageType.JOB_RESULT,
+        "a",
+        "b",
+        {"output": np.random.default_rng(0).random((3, 4)), "big": 2 ** 90, "items": [1, -2.5, None, True, "ж"]},
+    )
+    body = BINARY_CODEC.encode(envelope.to_dict())
+    assert codec_for_body(body) is BINARY_CODEC
+    restored = MessageEnvelope.from_dict(BINARY_CODEC.decode(body))
+    assert restored.msg_type == MessageType.JOB_RESULT
+    assert restored.payload["output"].shape == (3, 4)
+    assert restored.payload["output"].tolist() == envelope.payload["output"].tolist()
+    assert restored.payload["big"] == 2 ** 90
+    assert restored.payload["items"] == [1, -2.5, None, True, "ж"]
+    # Массив идёт сырым буфером: заметно компактнее JSON
+    assert len(body) < len(JSON_CODEC.encode(envelope.to_dict()))
+    assert codec_for_body(JSON_CODEC.encode({"a": 1})) is JSON_CODEC
+
+
+def test_negotiate_codec_prefers_local_order_and_falls_back_to_json():
+    from core.protocol import negotiate_codec
+
+    assert negotiate_codec(["binary/1", "json/1"], ["json/1", "binary/1"]) == "binary/1"
+    assert negotiate_codec(["binary/1", "json/1"], ["json/1"]) == "json/1"
+    assert negotiate_codec(["binary/1"], ["binary/2"]) == "json/1"
@@ -1,5 +1,9 @@
 import asyncio
+import os
 
+import pytest
+
+from sandbox.bundle_cache import BundleCache
 from sandbox.execution import (
     CodeBundle,
     ContainerSandboxExecutor,
@@ -40,3 +44,303 @@ def test_sandbox_selftest_and_fallbacks():
 
     wasm = WasmSandboxExecutor()
     assert isinstance(run(wasm.run_self_test()), bool)
+
+
+def test_process_sandbox_pool_reuses_workers_in_clean_namespace():
+    executor = ProcessSandboxExecutor(pool_size=1, max_jobs_per_worker=3)
+    limits = SandboxLimits(wall_time_seconds=10)
+
+    async def scenario():
+        results = []
+        for index in range(4):
+            bundle = CodeBundle(
+                entrypoint="main.py",
+                source=(
+                    "import os, sys, helper\n"
+                    "print(os.getpid(), helper.VALUE, os.environ.get('JOB_MARK'), globals().get('leak'))\n"
+                    "leak = 1\n"
+                    "os.environ['LEAKED'] = 'x'\n"
+                    "print(os.environ.get('LEAKED_BEFORE'), file=sys.stderr)\n"
+                    "os.environ['LEAKED_BEFORE'] = 'y'\n"
+                ),
+                files={"helper.py": f"VALUE = {index}\n"},
+                env={"JOB_MARK": str(index)},
+            )
+            results.append(await executor.execute(job=None, code_bundle=bundle, limits=limits))
+        stdin_bundle = CodeBundle(entrypoint="main.py", source="import sys; print(sys.stdin.read().upper())", stdin=b"abc")
+        results.append(await executor.execute(job=None, code_bundle=stdin_bundle, limits=limits))
+        await executor.close()
+        return results
+
+    results = run(scenario())
+    assert all(result.success for result in results)
+    rows = [result.stdout.split() for result in results[:4]]
+    # Модуль из рабочего каталога и env не переживают job
+    assert [row[1:] for row in rows] == [[str(i), str(i), "None"] for i in range(4)]
+    assert all(result.stderr.strip() == "None" for result in results[:4])
+    # Три job'а в одном процессе, затем процесс пересоздан
+    assert rows[0][0] == rows[1][0] == rows[2][0] != rows[3][0]
+    assert results[4].stdout.strip() == "ABC"
+    assert executor.pool.stats["recycled"] == 1
+
+
+def test_process_sandbox_pool_recycles_on_timeout_and_failures():
+    executor = ProcessSandboxExecutor(pool_size=1)
+
+    async def scenario():
+        sleepy = CodeBundle(entrypoint="main.py", source="import time; time.sleep(5)")
+        timed_out = await executor.execute(job=None, code_bundle=sleepy, limits=SandboxLimits(wall_time_seconds=0.2))
+        failing = CodeBundle(entrypoint="main.py", source="import sys; print('partial'); sys.exit(3)")
+        failed = await executor.execute(job=None, code_bundle=failing, limits=SandboxLimits(wall_time_seconds=10))
+        hungry = CodeBundle(entrypoint="main.py", source="data = bytearray(512 * 1024 * 1024)")
+        oom = await executor.execute(
+            job=None,
+            code_bundle=hungry,
+            limits=SandboxLimits(wall_time_seconds=10, memory_bytes=128 * 1024 * 1024),
+        )
+        healthy = await executor.execute(
+            job=None,
+            code_bundle=CodeBundle(entrypoint="main.py", source="print('ok')"),
+            limits=SandboxLimits(wall_time_seconds=10),
+        )
+        await executor.close()
+        return timed_out, failed, oom, healthy
+
+    timed_out, failed, oom, healthy = run(scenario())
+    assert timed_out.timed_out and timed_out.reason == "timeout" and not timed_out.success
+    assert failed.exit_code == 3 and failed.stdout.strip() == "partial" and not failed.success
+    assert not oom.success and oom.reason == "memory_limit" and "MemoryError" in oom.stderr
+    assert healthy.success and healthy.stdout.strip() == "ok"
+    # Таймаут и нарушение лимита памяти пересоздают процесс
+    assert executor.pool.stats["recycled"] == 2
+
+
+def test_process_sandbox_fork_server_forks_isolated_children():
+    executor = ProcessSandboxExecutor(fork_server=True, preload=["json"])
+
+    async def scenario():
+        source = (
+            "import json, os, sys\n"
+            "print(os.getpid(), os.getsid(0) == os.getpid(), 'json' in sys.modules, os.environ.get('JOB_MARK'))\n"
+            "sys.modules['json'].leaked = True\n"
+        )
+        results = await asyncio.gather(
+            *(
+                executor.execute(
+                    job=None,
+                    code_bundle=CodeBundle(entrypoint="main.py", source=source, env={"JOB_MARK": str(index)}),
+                    limits=SandboxLimits(wall_time_seconds=10),
+                )
+                for index in range(3)
+            )
+        )
+        leak = await executor.execute(
+            job=None,
+            code_bundle=CodeBundle(entrypoint="main.py", source="import json; print(hasattr(json, 'leaked'))"),
+            limits=SandboxLimits(wall_time_seconds=10),
+        )
+        sleepy = await executor.execute(
+            job=None,
+            code_bundle=CodeBundle(entrypoint="main.py", source="import time; print('started', flush=True); time.sleep(5)"),
+            limits=SandboxLimits(wall_time_seconds=0.5),
+        )
+        failing = await executor.execute(
+            job=None,
+            code_bundle=CodeBundle(entrypoint="main.py", source="raise ValueError('boom')"),
+            limits=SandboxLimits(wall_time_seconds=10),
+        )
+        spinning = await executor.execute(
+            job=None,
+            code_bundle=CodeBundle(entrypoint="main.py", source="while True: pass"),
+            limits=SandboxLimits(cpu_time_seconds=1, wall_time_seconds=10),
+        )
+        stats = dict(executor.fork_server.stats)
+        await executor.close()
+        return results, leak, sleepy, failing, spinning, stats
+
+    results, leak, sleepy, failing, spinning, stats = run(scenario())
+    rows = [result.stdout.split() for result in results]
+    assert all(result.success for result in results)
+    # Свой процесс и сессия на job, предзагруженный json, своё окружение
+    assert len({row[0] for row in rows}) == 3
+    assert [row[1:] for row in rows] == [["True", "True", str(index)] for index in range(3)]
+    assert leak.success and leak.stdout.strip() == "False"
+    assert sleepy.timed_out and sleepy.reason == "timeout" and sleepy.stdout.strip() == "started"
+    assert not failing.success and failing.exit_code == 1 and "ValueError: boom" in failing.stderr
+    assert not spinning.success and spinning.reason == "cpu_time_limit"
+    assert stats == {"started": 1, "jobs": 7}
+
+
+def test_process_sandbox_bundle_cache_links_identical_bundles(tmp_path):
+    cache = BundleCache(root=str(tmp_path / "bundles"), quota_bytes=4096)
+    executor = ProcessSandboxExecutor(bundle_cache=cache)
+    limits = SandboxLimits(wall_time_seconds=10)
+    source = (
+        "import os\n"
+        "print(open('data/input.txt').read(), os.stat('data/input.txt').st_nlink > 1)\n"
+        "with open('data/input.txt', 'a') as fh:\n"
+        "    fh.write('!')\n"
+    )
+
+    async def scenario():
+        results = []
+        for _ in range(3):
+            bundle = CodeBundle(entrypoint="main.py", source=source, files={"data/input.txt": "payload"})
+            results.append(await executor.execute(job=None, code_bundle=bundle, limits=limits))
+        return results
+
+    def reader(index):
+        return CodeBundle(entrypoint="main.py", source=f"print({index})", files={"blob.bin": b"x" * 1500})
+
+    results = run(scenario())
+    # Job дописал в файл бандла: кэш замечает порчу и материализует бандл заново
+    assert [result.stdout.split() for result in results] == [["payload", "True"]] * 3
+    assert cache.stats["tampered"] == 3 and cache.stats["misses"] == 3
+
+    plain = CodeBundle(entrypoint="main.py", source="print(open('input.txt').read())", files={"input.txt": "same"})
+    for _ in range(3):
+        assert run(executor.execute(job=None, code_bundle=plain, limits=limits)).stdout.strip() == "same"
+    assert cache.stats["hits"] == 2
+
+    # Квота 4 KB: третий бандл по 1.5 KB вытесняет самый старый
+    for index in range(3):
+        assert run(executor.execute(job=None, code_bundle=reader(index), limits=limits)).stdout.strip() == str(index)
+    assert cache.stats["evictions"] >= 1 and cache.bytes <= cache.quota_bytes
+    assert len(os.listdir(cache.root)) == len(cache)
+    run(executor.close())
+
+
+def test_process_sandbox_caps_output_and_spills(tmp_path):
+    executor = ProcessSandboxExecutor()
+    bundle = CodeBundle(
+        entrypoint="main.py",
+        source="import sys\nsys.stdout.write('x' * 200000)\nsys.stderr.write('e' * 10)\n",
+    )
+    limits = SandboxLimits(wall_time_seconds=10, stdout_max_bytes=1000, spill_dir=str(tmp_path))
+    result = run(executor.execute(job=None, code_bundle=bundle, limits=limits))
+    assert result.success
+    assert result.stdout.startswith("x" * 1000) and "[output truncated: 199000 bytes dropped]" in result.stdout
+    assert result.stderr == "e" * 10
+    assert result.truncated == {"stdout": 199000} and set(result.spill_paths) == {"stdout"}
+    with open(result.spill_paths["stdout"], "rb") as fh:
+        assert fh.read() == b"x" * 200000
+
+
+def test_process_sandbox_stream_yields_output_while_running():
+    source = "import sys, time\nprint('first', flush=True)\ntime.sleep(0.5)\nprint('second', flush=True)\nprint('oops', file=sys.stderr)\n"
+    limits = SandboxLimits(wall_time_seconds=10)
+
+    async def consume(executor):
+        stream = executor.stream(job=None, code_bundle=CodeBundle(entrypoint="main.py", source=source), limits=limits)
+        started = asyncio.get_running_loop().time()
+        seen = []
+        async for chunk in stream:
+            seen.append((chunk.stream, chunk.data, asyncio.get_running_loop().time() - started))
+        await executor.close()
+        return seen, stream.result
+
+    for executor in (ProcessSandboxExecutor(), ProcessSandboxExecutor(pool_size=1)):
+        seen, result = run(consume(executor))
+        assert result.success and result.stdout == "first\nsecond\n" and result.stderr == "oops\n"
+        stdout_chunks = [(data, at) for name, data, at in seen if name == "stdout"]
+        assert b"".join(data for data, _ in stdout_chunks) == b"first\nsecond\n"
+        # "first" пришёл до того, как job досчитал
+        first_at = next(at for data, at in stdout_chunks if b"\n" in data)
+        assert first_at < 0.45 < seen[-1][2]
+
+
+def test_process_sandbox_stream_break_kills_job(tmp_path):
+    marker = tmp_path / "finished"
+    source = f"import time\nprint('go', flush=True)\ntime.sleep(1)\nopen({str(marker)!r}, 'w').close()\n"
+
+    async def scenario():
+        bundle = CodeBundle(entrypoint="main.py", source=source)
+        async with ProcessSandboxExecutor().stream(None, bundle, SandboxLimits(wall_time_seconds=10)) as stream:
+            async for chunk in stream:
+                assert chunk.data.startswith(b"go")
+                break
+        await asyncio.sleep(1.5)
+        return stream.result
+
+    assert run(scenario()) is None
+    assert not marker.exists()
+
+
+def test_process_sandbox_result_channel_decodes_values():
+    emitting = CodeBundle(
+        entrypoint="main.py",
+        source=(
+            "from sandbox.result_channel import emit\n"
+            "emit({'rows': list(range(1000)), 'blob': b'\\x00\\x01'})\n"
+            "print('done')\n"
+        ),
+    )
+    raw_json = CodeBundle(
+        entrypoint="main.py",
+        source="import os\nopen(os.environ['SANDBOX_RESULT_PATH'], 'w').write('[1, 2]')\n",
+    )
+    garbage = CodeBundle(
+        entrypoint="main.py",
+        source="import os\nopen(os.environ['SANDBOX_RESULT_PATH'], 'wb').write(b'\\xb7\\x01l\\x05')\n",
+    )
+    silent = CodeBundle(entrypoint="main.py", source="print('text only')")
+    limits = SandboxLimits(wall_time_seconds=10)
+
+    async def scenario(executor):
+        results = [await executor.execute(job=None, code_bundle=b, limits=limits) for b in (emitting, raw_json, garbage, silent)]
+        await executor.close()
+        return results
+
+    for executor in (ProcessSandboxExecutor(), ProcessSandboxExecutor(pool_size=1), ProcessSandboxExecutor(fork_server=True, preload=[])):
+        emitted, json_value, broken, plain = run(scenario(executor))
+        assert emitted.success and emitted.has_value and emitted.stdout == "done\n"
+        assert emitted.value == {"rows": list(range(1000)), "blob": b"\x00\x01"}
+        assert json_value.value == [1, 2]
+        assert not broken.has_value and broken.value_error
+        assert not plain.has_value and plain.value is None and plain.stdout == "text only\n"
+
+
+def test_pool_protocol_rejects_oversized_frames():
+    from core.framing import FRAME_HEADER, FrameTooLarge
+    from sandbox import pool_worker
+    from sandbox.pool import receive_message
+
+    async def receive_huge():
+        reader = asyncio.StreamReader()
+        # Сломанный процесс объявляет 4 ГБ: узел не должен пытаться их прочитать
+        reader.feed_data(FRAME_HEADER.pack(2**32 - 1))
+        await receive_message(reader)
+
+    with pytest.raises(FrameTooLarge):
+        run(receive_huge())
+
+    read_fd, write_fd = os.pipe()
+    try:
+        os.write(write_fd, pool_worker.HEADER.pack(pool_worker.MAX_MESSAGE_SIZE + 1))
+        with pytest.raises(ValueError):
+            pool_worker.read_message(read_fd)
+        pool_worker.write_message(write_fd, {"ok": True})
+        assert pool_worker.read_message(read_fd) == {"ok": True}
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+
+
+def test_process_sandbox_pool_retires_workers_without_cpu_headroom():
+    # Жёсткий RLIMIT_CPU процесса пула копится за всю его жизнь
+    executor = ProcessSandboxExecutor(pool_size=1, pool_limits=SandboxLimits(cpu_time_seconds=3))
+    limits = SandboxLimits(wall_time_seconds=10, cpu_time_seconds=1)
+    burn = CodeBundle(
+        entrypoint="main.py",
+        source="import time\nend = time.process_time() + 0.6\nwhile time.process_time() < end:\n    pass\nprint('ok')\n",
+    )
+
+    async def scenario():
+        results = [await executor.execute(job=None, code_bundle=burn, limits=limits) for _ in range(8)]
+        stats = dict(executor.pool.stats)
+        await executor.close()
+        return results, stats
+
+    results, stats = run(scenario())
+    assert [(result.exit_code, result.reason) for result in results if not result.success] == []
+    assert stats["recycled"] >= 1
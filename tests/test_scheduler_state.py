@@ -0,0 +1,167 @@
+import pytest
+
+from core.job import Job
+from core.job_state import JobStatus
+from core.journal import StateJournal
+from core.scheduler_state import TaskSchedulerState
+from core.task import Task, TaskPriority, TaskType
+
+
+def make_jobs(task, count, prefix):
+    return [
+        Job(job_id=f"{prefix}:{index}", task_id=task.task_id, index=index, task_type=TaskType.MAP.value, input_payload={})
+        for index in range(count)
+    ]
+
+
+def test_next_job_orders_by_priority_then_deadline():
+    state = TaskSchedulerState()
+    low = Task.create_map("o", [1], "square")
+    low.config.priority = TaskPriority.LOW
+    high = Task.create_map("o", [1], "square")
+    high.config.priority = TaskPriority.HIGH
+    state.register_jobs_for_task(low, make_jobs(low, 2, "low"))
+    state.register_jobs_for_task(high, make_jobs(high, 1, "late"), deadline_ts=200.0)
+    state.register_jobs_for_task(high, make_jobs(high, 1, "soon"), deadline_ts=100.0)
+
+    order = []
+    while (record := state.next_job(now=0)) is not None:
+        order.append(record.job.job_id)
+        state.mark_assigned(record.job.job_id, "w", now=0)
+    assert order == ["soon:0", "late:0", "low:0", "low:1"]
+    assert state.status_counters()[JobStatus.ASSIGNED] == 4
+    assert state.status_counters()[JobStatus.PENDING] == 0
+
+
+def test_failed_job_returns_to_queue_after_backoff():
+    state = TaskSchedulerState()
+    task = Task.create_map("o", [1], "square")
+    state.register_jobs_for_task(task, make_jobs(task, 2, "j"))
+    first = state.next_job(now=0)
+    # Без назначения запись остаётся в голове очереди
+    assert state.next_job(now=0) is first
+    state.mark_assigned(first.job.job_id, "w", now=10)
+    state.mark_result(first.job.job_id, success=False, now=10)
+
+    assert state.next_job(now=10).job.job_id == "j:1"
+    state.mark_assigned("j:1", "w", now=10)
+    assert state.next_job(now=10.5) is None
+    assert state.jobs_due_for_retry(now=10.5) == []
+
+    assert state.next_job(now=11).job.job_id == first.job.job_id
+    assert [r.job.job_id for r in state.jobs_due_for_retry(now=11)] == [first.job.job_id]
+    state.mark_assigned(first.job.job_id, "w", now=11)
+    assert state.jobs_due_for_retry(now=20) == []
+    assert first.attempts == 2
+
+
+def test_expire_overdue_only_touches_in_flight_jobs():
+    state = TaskSchedulerState()
+    task = Task.create_map("o", [1], "square")
+    state.register_jobs_for_task(task, make_jobs(task, 3, "e"))
+    state.mark_assigned("e:0", "w", now=0, deadline_ts=5)
+    state.mark_assigned("e:1", "w", now=0, deadline_ts=5)
+    state.mark_ack("e:1", now=1)
+    state.mark_running("e:1", now=1)
+    state.mark_assigned("e:2", "w", now=0, deadline_ts=5)
+    state.mark_result("e:2", success=True, now=2)
+
+    assert state.expire_overdue(now=4) == []
+    expired = state.expire_overdue(now=6)
+    assert sorted(r.job.job_id for r in expired) == ["e:0", "e:1"]
+    counters = state.status_counters()
+    assert counters[JobStatus.EXPIRED] == 2
+    assert counters[JobStatus.COMPLETED] == 1
+    assert {r.job.job_id for r in state.jobs_with_status(JobStatus.EXPIRED)} == {"e:0", "e:1"}
+    assert state.expire_overdue(now=7) == []
+    # Просроченные сразу доступны для ретрая
+    assert {r.job.job_id for r in state.jobs_due_for_retry(now=6)} == {"e:0", "e:1"}
+
+
+def test_lazy_heaps_stay_bounded():
+    state = TaskSchedulerState()
+    task = Task.create_map("o", [1], "square")
+    state.register_jobs_for_task(task, make_jobs(task, 10, "b"))
+    for round_ in range(200):
+        for index in range(10):
+            job_id = f"b:{index}"
+            state.mark_assigned(job_id, "w", now=round_, deadline_ts=round_ + 100)
+            state.mark_result(job_id, success=False, now=round_ - 5)
+        state.next_job(now=round_)
+    assert len(state._ready) <= 64 + 10
+    assert len(state._retry) <= 64 + 10
+    assert len(state._deadlines) <= 64 + 10
+    assert sum(state.status_counters().values()) == 10
+
+
+def test_journal_recovers_state_and_expires_in_flight_jobs(tmp_path):
+    state = TaskSchedulerState()
+    state.attach_journal(StateJournal(tmp_path, "jobs", compact_every=4))
+    task = Task.create_map("o", [1], "square")
+    task.config.priority = TaskPriority.HIGH
+    state.register_jobs_for_task(task, make_jobs(task, 3, "w"), deadline_ts=50.0)
+    state.mark_assigned("w:0", "worker", now=1, deadline_ts=40)
+    state.mark_result("w:0", success=True, now=2)
+    state.mark_assigned("w:1", "worker", now=3)
+    state.mark_ack("w:1", now=4)
+    state.journal.close()
+    # Часть переходов уже в снапшоте, часть — в хвосте WAL
+    assert state.journal.stats["snapshots"] >= 1
+    assert state.journal.appended > 0
+
+    recovered = TaskSchedulerState()
+    assert recovered.attach_journal(StateJournal(tmp_path, "jobs"), now=10) == 3
+    counters = recovered.status_counters()
+    assert counters[JobStatus.COMPLETED] == 1
+    assert counters[JobStatus.EXPIRED] == 1
+    assert counters[JobStatus.PENDING] == 1
+    record = recovered.jobs_by_id["w:1"]
+    assert (record.assigned_to, record.attempts, record.priority) == ("worker", 1, 2)
+    assert recovered.jobs_by_task[task.task_id] == ["w:0", "w:1", "w:2"]
+    # Очередь готовых построена заново: прерванный ретрай и PENDING job
+    assert {recovered.next_job(now=10).job.job_id} <= {"w:1", "w:2"}
+    assert [r.job.job_id for r in recovered.jobs_due_for_retry(now=10)] == ["w:1"]
+
+
+def test_journal_drops_torn_tail_and_stale_wal(tmp_path):
+    task = Task.create_map("o", [1], "square")
+    state = TaskSchedulerState()
+    state.attach_journal(StateJournal(tmp_path, "jobs"))
+    state.register_jobs_for_task(task, make_jobs(task, 2, "t"))
+    state.mark_assigned("t:0", "worker", now=1)
+    state.journal.close()
+    wal = tmp_path / "jobs.wal"
+    with open(wal, "ab") as f:
+        f.write(b'["x","t:0",tr')
+
+    journal = StateJournal(tmp_path, "jobs")
+    recovered = TaskSchedulerState()
+    recovered.attach_journal(journal, now=5)
+    assert journal.stats["torn_bytes"] == len(b'["x","t:0",tr')
+    assert recovered.jobs_by_id["t:0"].status == JobStatus.EXPIRED
+    journal.compact()
+    journal.flush()
+    # Падение между заменой снапшота и очисткой WAL: старый WAL пропускается
+    stale = (tmp_path / "jobs.wal").read_bytes()
+    recovered.mark_result("t:0", success=True, now=6)
+    journal.compact()
+    journal.close()
+    (tmp_path / "jobs.wal").write_bytes(stale)
+    again = TaskSchedulerState()
+    again.attach_journal(StateJournal(tmp_path, "jobs"), now=7)
+    assert again.jobs_by_id["t:0"].status == JobStatus.COMPLETED
+
+
+def test_journal_writer_failure_surfaces_to_owner(tmp_path):
+    journal = StateJournal(tmp_path, "jobs")
+    journal.open(lambda: [])
+    journal.append(["k", "t:0", 1.0])
+    # Запись, которую не закодировать, роняет поток-писатель, а не вызывающего
+    journal.append(["k", object(), 2.0])
+    with pytest.raises(RuntimeError):
+        journal.flush()
+    with pytest.raises(RuntimeError):
+        journal.append(["k", "t:1", 3.0])
+    with pytest.raises(RuntimeError):
+        journal.close()
+    assert list(StateJournal(tmp_path, "jobs").replay()) == [["k", "t:0", 1.0]]
@@ -1,7 +1,5 @@
 import asyncio
 
-import pytest
-
 from core.job import Job, JobResult
 from core.job_state import JobStatus
 from core.task import (
@@ -164,12 +162,12 @@ def test_scheduler_to_event_and_counters():
     assert counters[JobStatus.COMPLETED] >= 1
 
 
-def test_matrix_helpers_and_notimplemented():
+def test_matrix_helpers_and_decompose():
     executor = TaskExecutor()
     a = [[1, 2], [3, 4]]
     b = [[1, 0], [0, 1]]
     assert executor._matrix_multiply(a, b)[0][0] == 1
-    with pytest.raises(NotImplementedError):
-        executor._matrix_decompose(a)
+    factors = executor._matrix_decompose(a)
+    assert set(factors) == {"p", "l", "u"}
     assert executor._pytorch_inference("model", [1])["predictions"]
     assert executor._tensorflow_inference("model", [1])["predictions"]
@@ -13,6 +13,7 @@ from core.scheduler_state import TaskSchedulerState
 from core.task import (
     MapReduceTask,
     MapTask,
+    RangeReduceTask,
     Task,
     TaskExecutor,
     TaskPriority,
@@ -99,8 +100,10 @@ def test_matrix_ops_paths():
     assert added[0][0] == 6
     multiplied = executor._execute_matrix_ops(task=Task.create_matrix_ops("o", "multiply", matrix_a, matrix_b).matrix_ops)
     assert multiplied[0][0] == 19
-    with pytest.raises(NotImplementedError):
-        executor._execute_matrix_ops(task=Task.create_matrix_ops("o", "inverse", matrix_a).matrix_ops)
+    inverse = executor._execute_matrix_ops(task=Task.create_matrix_ops("o", "inverse", matrix_a).matrix_ops)
+    assert [value for row in inverse for value in row] == pytest.approx([-2.0, 1.0, 1.5, -0.5])
+    with pytest.raises(ValueError):
+        executor._execute_matrix_ops(task=Task.create_matrix_ops("o", "inverse", [[1, 2], [2, 4]]).matrix_ops)
 
 
 def test_generic_handlers_builtin_matrix_and_ml():
@@ -278,3 +281,30 @@ def test_privacy_mask_restores_permutation():
     restored = run(engine.finalize_task_result(prepared, job_results))
     expected_increment = sorted([x + 1 for x in [1, 2, 3]])
     assert sorted(restored) in ([1, 4, 9], expected_increment)
+
+
+@pytest.mark.parametrize("start, end", [(1, 11), (-7, 5), (-9, -2), (3, 3), (0, 1)])
+@pytest.mark.parametrize("operation", ["sum", "product", "average", "min", "max"])
+def test_range_reduce_closed_form_matches_iteration(start, end, operation):
+    executor = TaskExecutor()
+    numbers = list(range(start, end))
+    expected = {
+        "sum": sum(numbers),
+        "product": math.prod(numbers),
+        "average": sum(numbers) / len(numbers) if numbers else 0,
+        "min": min(numbers) if numbers else None,
+        "max": max(numbers) if numbers else None,
+    }[operation]
+    task = RangeReduceTask(start=start, end=end, operation=operation)
+    if expected is None:
+        with pytest.raises(ValueError):
+            executor._execute_range_reduce(task)
+    else:
+        assert executor._execute_range_reduce(task) == expected
+
+
+def test_range_reduce_average_over_chunks():
+    executor = TaskExecutor()
+    task = Task.create_range_reduce(owner_id="o", start=0, end=7, operation="average", task_params={"chunk_size": 2})
+    result = run(executor.execute(task))
+    assert math.isclose(result["result"], 3.0)
@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+
+from core.job import Job
+from core.node import ComputeNode
+from core.protocol import MessageEnvelope, MessageType
+from core.task import Task, TaskType
+from core.transport import TcpTransport
+
+
+async def _pair():
+    left, right = TcpTransport(), TcpTransport()
+    await left.start()
+    await right.start()
+    return left, right
+
+
+@pytest.mark.asyncio
+async def test_messages_share_one_connection_and_replies_use_it():
+    left, right = await _pair()
+    received = asyncio.Queue()
+
+    async def on_right(envelope):
+        await right.send(envelope.src_node, MessageEnvelope.create(MessageType.JOB_ACK, "b", envelope.src_node, {"n": envelope.payload["n"]}))
+
+    async def on_left(envelope):
+        await received.put(envelope.payload["n"])
+
+    left.register_handler("a", on_left)
+    right.register_handler("b", on_right)
+    left.add_peer("b", "127.0.0.1", right.port)
+    try:
+        for n in range(20):
+            await left.send("b", MessageEnvelope.create(MessageType.WORKER_HEARTBEAT, "a", "b", {"n": n}))
+        replies = sorted([await asyncio.wait_for(received.get(), 2) for _ in range(20)])
+        assert replies == list(range(20))
+        # right не знает адреса "a": ответы ушли по входящему соединению
+        assert left.stats["connections_opened"] == 1
+        assert right.stats["connections_opened"] == 0
+    finally:
+        await left.close()
+        await right.close()
+
+
+@pytest.mark.asyncio
+async def test_reconnects_after_connection_drop_and_carries_large_frames():
+    left, right = await _pair()
+    received = asyncio.Queue()
+
+    async def on_right(envelope):
+        await received.put(envelope.payload["blob"])
+
+    right.register_handler("b", on_right)
+    left.add_peer("b", "127.0.0.1", right.port)
+    try:
+        await left.send("b", MessageEnvelope.create(MessageType.WORKER_HEARTBEAT, "a", "b", {"blob": "x"}))
+        assert await asyncio.wait_for(received.get(), 2) == "x"
+        for conn in list(right._all_connections):
+            right._drop_connection(conn)
+        await asyncio.sleep(0.05)
+
+        blob = "y" * 200_000
+        await left.send("b", MessageEnvelope.create(MessageType.WORKER_HEARTBEAT, "a", "b", {"blob": blob}))
+        assert await asyncio.wait_for(received.get(), 2) == blob
+        assert left.stats["connections_opened"] == 2
+    finally:
+        await left.close()
+        await right.close()
+
+
+@pytest.mark.asyncio
+async def test_compute_nodes_exchange_jobs_over_tcp():
+    coordinator_transport, worker_transport = await _pair()
+    coordinator = ComputeNode(host="127.0.0.1", port=6200, transport=coordinator_transport)
+    worker = ComputeNode(host="127.0.0.1", port=6201, transport=worker_transport)
+    coordinator_transport.add_peer(worker.node_id, "127.0.0.1", worker_transport.port)
+    task = Task.create_map(owner_id=coordinator.node_id, data=[1, 2, 3], function="square")
+    job = Job(
+        job_id=f"{task.task_id}:0",
+        task_id=task.task_id,
+        index=0,
+        task_type=TaskType.MAP.value,
+        input_payload={"function": "square", "data": [1, 2, 3], "params": {}},
+    )
+    try:
+        result = await coordinator.assign_single_job_to_worker(worker.node_id, job, task)
+        assert result.success
+        assert result.output == [1, 4, 9]
+    finally:
+        await coordinator_transport.close()
+        await worker_transport.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(("right_codecs", "expected"), [(("binary/1", "json/1"), "binary/1"), (("json/1",), "json/1")])
+async def test_codec_is_negotiated_per_connection(right_codecs, expected):
+    np = pytest.importorskip("numpy")
+    left, right = TcpTransport(), TcpTransport(codecs=right_codecs)
+    await left.start()
+    await right.start()
+    received = asyncio.Queue()
+
+    async def on_right(envelope):
+        await received.put(envelope.payload["matrix"])
+
+    right.register_handler("b", on_right)
+    left.add_peer("b", "127.0.0.1", right.port)
+    matrix = np.arange(6, dtype=np.int64).reshape(2, 3)
+    try:
+        for _ in range(3):
+            await left.send("b", MessageEnvelope.create(MessageType.WORKER_HEARTBEAT, "a", "b", {"matrix": matrix}))
+            got = await asyncio.wait_for(received.get(), 2)
+            assert np.asarray(got).tolist() == matrix.tolist()
+        (conn,) = left._all_connections
+        assert conn.codec.name == expected
+        assert expected in right.codec_summary()
+    finally:
+        await left.close()
+        await right.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sends_are_coalesced_into_batch_frames():
+    left, right = TcpTransport(batch_max_messages=16, max_frame_size=4096), TcpTransport(max_frame_size=4096)
+    await left.start()
+    await right.start()
+    received = []
+    done = asyncio.Event()
+
+    async def on_right(envelope):
+        received.append(envelope.payload["n"])
+        if len(received) == 100:
+            done.set()
+
+    right.register_handler("b", on_right)
+    left.add_peer("b", "127.0.0.1", right.port)
+    try:
+        # Соединение открыто заранее: дальше send'ы из разных задач сходятся в одной итерации loop
+        await left.send("b", MessageEnvelope.create(MessageType.JOB_ACK, "a", "b", {"n": -1}))
+        await asyncio.sleep(0.05)
+        received.clear()
+        frames_before = left.stats["frames_sent"]
+        sends = [
+            left.send("b", MessageEnvelope.create(MessageType.JOB_ACK, "a", "b", {"n": n, "blob": "x" * 500}))
+            for n in range(100)
+        ]
+        oversized = left.send("b", MessageEnvelope.create(MessageType.JOB_ACK, "a", "b", {"blob": "x" * 8192}))
+        results = await asyncio.gather(*sends, oversized, return_exceptions=True)
+        assert all(result is None for result in results[:-1])
+        assert isinstance(results[-1], ValueError)
+        await asyncio.wait_for(done.wait(), 2)
+        # Порядок сохраняется, кадров заметно меньше, чем сообщений
+        assert received == list(range(100))
+        assert left.stats["messages_sent"] == 101
+        # Пачки по 16 не влезают в 4 KB и делятся, но кадров всё равно заметно меньше
+        assert 1 < left.stats["frames_sent"] - frames_before < 50
+    finally:
+        await left.close()
+        await right.close()